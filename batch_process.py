@@ -1,45 +1,323 @@
+"""
+Bulk client for the classification service.
+
+Scans a directory tree and uploads every supported file over a pooled
+keep-alive connection, several requests at a time. Failed requests are
+retried with exponential backoff, and each result is appended to a JSON
+Lines file as soon as it arrives. The output doubles as a checkpoint: an
+interrupted run started again with the same ``--output`` skips the files
+it already classified.
+
+Usage:
+    python batch_process.py files/
+    python batch_process.py /archive --output results.jsonl --concurrency 16
+"""
+
+import argparse
+import json
+import logging
 import os
-import requests
-from tabulate import tabulate
-
-def process_file(file_path):
-    with open(file_path, 'rb') as f:
-        files = {'file': (os.path.basename(file_path), f, 'application/octet-stream')}
-        response = requests.post('http://localhost:8000/classify_file', files=files)
-        if response.status_code == 200:
+import random
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx', '.doc', '.jpg', '.jpeg', '.png')
+
+# Responses worth retrying: rate limiting and transient server/proxy failures
+RETRY_STATUSES = {429, 502, 503, 504}
+
+def iter_files(root: str, recursive: bool = True) -> Iterator[str]:
+    """
+    Yield supported files under root in a stable order.
+
+    Args:
+        root: Directory to scan
+        recursive: Descend into subdirectories
+
+    Returns:
+        Iterator over file paths
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.')) if recursive else []
+        for filename in sorted(filenames):
+            if not filename.startswith('.') and filename.lower().endswith(SUPPORTED_EXTENSIONS):
+                yield os.path.join(dirpath, filename)
+
+def load_checkpoint(path: str) -> Set[str]:
+    """
+    Read the files already classified by an earlier run.
+
+    Args:
+        path: JSON Lines output of the earlier run
+
+    Returns:
+        Paths whose results have no error; failed files are tried again
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A line cut short when the earlier run was killed
+                continue
+            if not record.get('error'):
+                done.add(record['path'])
+    return done
+
+def parse_result(path: str, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Normalize a Flask or FastAPI result into one output record."""
+    return {
+        'path': path,
+        'file_class': data.get('file_class', data.get('predicted_class')),
+        'confidence': data.get('confidence', 0.0),
+        'error': data.get('error'),
+    }
+
+class BulkClassifier:
+    """
+    Uploads many files to the service concurrently.
+
+    One ``httpx.Client`` is shared by all worker threads, so connections
+    are kept alive and reused instead of opened per file.
+    """
+
+    def __init__(self,
+                 url: str = "http://localhost:8000",
+                 api_key: Optional[str] = None,
+                 concurrency: int = 8,
+                 batch_size: int = 1,
+                 retries: int = 3,
+                 backoff: float = 0.5,
+                 timeout: float = 60.0,
+                 client: Optional[httpx.Client] = None):
+        """
+        Initialize the client.
+
+        Args:
+            url: Base URL of the service
+            api_key: Bearer token for the FastAPI service
+            concurrency: Requests in flight at once
+            batch_size: Files per request; above 1, files go to /classify_files
+            retries: Extra attempts after a failed request
+            backoff: Base delay in seconds, doubled on every retry
+            timeout: Seconds allowed per request
+            client: HTTP client to use instead of a new pooled one
+        """
+        if concurrency < 1 or batch_size < 1:
+            raise ValueError("concurrency and batch_size must be at least 1")
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.retries = retries
+        self.backoff = backoff
+        headers = {'Authorization': f"Bearer {api_key}"} if api_key else {}
+        self.client = client or httpx.Client(
+            base_url=url,
+            headers=headers,
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+        )
+
+    def close(self):
+        self.client.close()
+
+    def _delay(self, attempt: int, response: Optional[httpx.Response]) -> float:
+        """Seconds to wait before the next attempt, honouring Retry-After."""
+        if response is not None:
+            try:
+                return float(response.headers['Retry-After'])
+            except (KeyError, ValueError):
+                pass
+        # Full jitter keeps many clients from retrying in lockstep
+        return random.uniform(0, self.backoff * 2 ** attempt)
+
+    def _post(self, endpoint: str, field: str, paths: List[str]) -> httpx.Response:
+        """POST files, retrying transport errors and retryable statuses."""
+        attempt = 0
+        while True:
+            response = None
+            handles = [open(path, 'rb') for path in paths]
+            try:
+                files = [(field, (os.path.basename(path), handle, 'application/octet-stream'))
+                         for path, handle in zip(paths, handles)]
+                response = self.client.post(endpoint, files=files)
+                if response.status_code not in RETRY_STATUSES or attempt >= self.retries:
+                    return response
+            except httpx.TransportError:
+                if attempt >= self.retries:
+                    raise
+            finally:
+                for handle in handles:
+                    handle.close()
+            delay = self._delay(attempt, response)
+            attempt += 1
+            logger.warning(f"Retrying {len(paths)} file(s) in {delay:.2f}s (attempt {attempt + 1})")
+            time.sleep(delay)
+
+    def classify(self, paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Classify a group of files in one request.
+
+        Errors are reported per file instead of raised.
+
+        Args:
+            paths: Files to upload; more than one uses /classify_files
+
+        Returns:
+            One output record per path, in order
+        """
+        try:
+            if len(paths) == 1:
+                response = self._post('/classify_file', 'file', paths)
+            else:
+                response = self._post('/classify_files', 'files', paths)
             data = response.json()
-            return data['file_class'], data.get('confidence', 0.0)
-        else:
-            return f"Error: {response.json().get('error', 'Unknown error')}", 0.0
+        except (httpx.HTTPError, OSError, ValueError) as e:
+            return [{'path': path, 'file_class': None, 'confidence': 0.0, 'error': str(e)}
+                    for path in paths]
 
-def main():
-    results = []
-    files_dir = 'files'
-    
-    # Process all files in the directory
-    for filename in os.listdir(files_dir):
-        if filename.endswith(('.pdf', '.docx', '.doc', '.jpg', '.png')):
-            file_path = os.path.join(files_dir, filename)
-            classification, confidence = process_file(file_path)
-            results.append([filename, classification, confidence])
-    
-    # Sort results by filename
-    results.sort(key=lambda x: x[0])
-    
-    # Display results in a table
+        if response.status_code != 200:
+            error = data.get('error') or data.get('detail') or f"HTTP {response.status_code}"
+            return [{'path': path, 'file_class': None, 'confidence': 0.0, 'error': str(error)}
+                    for path in paths]
+        if len(paths) == 1:
+            return [parse_result(paths[0], data)]
+        return [parse_result(path, result) for path, result in zip(paths, data['results'])]
+
+    def run(self, paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """
+        Classify every file, yielding records as requests complete.
+
+        At most ``2 * concurrency`` requests are queued at a time, so a huge
+        archive is never listed into memory all at once.
+
+        Args:
+            paths: Files to classify
+
+        Returns:
+            Iterator over output records, in completion order
+        """
+        groups = iter(_chunked(paths, self.batch_size))
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            pending = set()
+            while True:
+                for group in groups:
+                    pending.add(executor.submit(self.classify, group))
+                    if len(pending) >= 2 * self.concurrency:
+                        break
+                if not pending:
+                    return
+                finished, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    yield from future.result()
+
+def _chunked(items: Iterable[str], size: int) -> Iterator[List[str]]:
+    group = []
+    for item in items:
+        group.append(item)
+        if len(group) >= size:
+            yield group
+            group = []
+    if group:
+        yield group
+
+def print_table(results: List[Dict[str, Any]]):
+    """Display results in a table."""
+    from tabulate import tabulate
+
+    rows = []
+    for record in sorted(results, key=lambda record: record['path']):
+        classification = record['file_class'] if not record['error'] else f"Error: {record['error']}"
+        rows.append([record['path'], classification, record['confidence']])
     headers = ['Filename', 'Classification', 'Confidence']
     print("\nDocument Classification Results:")
-    print(tabulate(results, headers=headers, tablefmt='grid', floatfmt=".2%"))
-    
-    # Print summary statistics
+    print(tabulate(rows, headers=headers, tablefmt='grid', floatfmt=".2%"))
+
+def print_summary(counts: Dict[str, int], errors: int, skipped: int, elapsed: float):
     print("\nSummary:")
-    classifications = {}
-    for _, cls, conf in results:
-        if not str(cls).startswith('Error'):
-            classifications[cls] = classifications.get(cls, 0) + 1
-    
-    for cls, count in sorted(classifications.items()):
+    for cls, count in sorted(counts.items()):
         print(f"{cls}: {count} documents")
+    if errors:
+        print(f"errors: {errors} documents")
+    if skipped:
+        print(f"skipped (already in checkpoint): {skipped} documents")
+    total = sum(counts.values()) + errors
+    print(f"{total} documents in {elapsed:.1f}s ({total / max(elapsed, 1e-9):.1f}/s)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Classify every document under a directory")
+    parser.add_argument('directory', nargs='?', default='files')
+    parser.add_argument('--url', default=os.getenv("CLASSIFIER_URL", "http://localhost:8000"))
+    parser.add_argument('--api-key', default=os.getenv("API_KEY"),
+                        help="Bearer token for the FastAPI service")
+    parser.add_argument('--concurrency', type=int, default=8, help="Requests in flight at once")
+    parser.add_argument('--batch-size', type=int, default=1,
+                        help="Files per request; above 1 uses /classify_files")
+    parser.add_argument('--retries', type=int, default=3)
+    parser.add_argument('--backoff', type=float, default=0.5,
+                        help="Base retry delay in seconds, doubled per attempt")
+    parser.add_argument('--timeout', type=float, default=60.0, help="Seconds allowed per request")
+    parser.add_argument('--output', help="Append results to this JSON Lines file and skip "
+                                         "files it already lists as classified")
+    parser.add_argument('--no-recursive', action='store_true', help="Only scan the top directory")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING)
+
+    done = load_checkpoint(args.output) if args.output else set()
+    skipped = 0
+
+    def todo():
+        nonlocal skipped
+        for path in iter_files(args.directory, recursive=not args.no_recursive):
+            if path in done:
+                skipped += 1
+            else:
+                yield path
+
+    bulk = BulkClassifier(
+        url=args.url,
+        api_key=args.api_key,
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        retries=args.retries,
+        backoff=args.backoff,
+        timeout=args.timeout
+    )
+    output = open(args.output, 'a', encoding='utf-8') if args.output else None
+    results = []
+    counts: Dict[str, int] = {}
+    errors = 0
+    start = time.perf_counter()
+    try:
+        for record in bulk.run(todo()):
+            if record['error']:
+                errors += 1
+            else:
+                counts[record['file_class']] = counts.get(record['file_class'], 0) + 1
+            if output is not None:
+                # Flushed per line so an interrupted run loses at most the requests in flight
+                output.write(json.dumps(record) + '\n')
+                output.flush()
+            else:
+                results.append(record)
+    except KeyboardInterrupt:
+        print("\nInterrupted; re-run with the same --output to resume", file=sys.stderr)
+    finally:
+        bulk.close()
+        if output is not None:
+            output.close()
+
+    if output is None:
+        print_table(results)
+    print_summary(counts, errors, skipped, time.perf_counter() - start)
 
 if __name__ == '__main__':
-    main() 
\ No newline at end of file
+    main()
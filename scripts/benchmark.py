@@ -0,0 +1,505 @@
+"""
+Benchmark the classification path.
+
+Measures time spent in extraction, TF-IDF vectorization, predict_proba and
+end-to-end HTTP handling of both services, over the documents in files/
+plus synthetic documents built from the same templates as
+create_test_files.py. Results (throughput and p50/p95/p99 latency) are
+written as JSON so runs can be compared.
+
+Usage:
+    python scripts/benchmark.py --output bench_results.json
+    python scripts/benchmark.py --quick --compare bench_results.json
+"""
+import argparse
+import io
+import json
+import logging
+import os
+import platform
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+# Every request must reach the extractors and the model, not the result cache
+os.environ.setdefault("RESULT_CACHE_SIZE", "0")
+os.environ.setdefault("API_KEY", "benchmark")
+
+from src.cache import ExtractionCache
+from src.extractor.registry import default_registry
+from src.extractor.sniff import SNIFF_BYTES
+
+logging.basicConfig(level=logging.WARNING)
+logger = logging.getLogger(__name__)
+
+SUPPORTED_EXTENSIONS = ('.pdf', '.docx')
+
+CLIENTS = ["Tech Corp", "Digital Solutions", "Cloud Systems Inc", "Northwind", "Globex"]
+ITEMS = ["Web Development", "UI Design", "Mobile App Development", "Testing",
+         "Cloud Migration", "Training", "Support Contract", "Consulting"]
+BANKS = ["Pacific Bank", "Atlantic Bank", "Mountain Bank", "River Credit Union"]
+TRANSACTIONS = ["Salary Credit: $3000", "Rent Payment: -$1500", "Investment Return: $500",
+                "Utility Bill: -$200", "Business Income: $5000", "Office Supplies: -$300"]
+STATES = ["California", "New York", "Texas", "Oregon", "Florida"]
+NAMES = ["John Smith", "Emma Johnson", "Michael Brown", "Olivia Davis", "Liam Wilson"]
+
+def synthetic_text(doc_type, rng):
+    """Build one page of document text using the create_test_files.py templates."""
+    if doc_type == "invoice":
+        items = rng.sample(ITEMS, 2)
+        return f"""INVOICE
+
+Invoice Number: INV-2024-{rng.randint(1, 999):03d}
+Client: {rng.choice(CLIENTS)}
+
+Items:
+{chr(10).join(f"- {item}" for item in items)}
+
+Total Amount: ${rng.randint(500, 9000)}
+
+Payment Terms: Net 30
+Thank you for your business!"""
+    if doc_type == "bank_statement":
+        return f"""BANK STATEMENT
+
+Bank: {rng.choice(BANKS)}
+Account: ****{rng.randint(1000, 9999)}
+Statement Date: March {rng.randint(1, 28)}, 2024
+
+Current Balance: ${rng.randint(1000, 20000)}
+
+Recent Transactions:
+{chr(10).join(rng.sample(TRANSACTIONS, 2))}
+
+This is an official bank statement."""
+    state = rng.choice(STATES)
+    return f"""DRIVER LICENSE
+
+State of {state}
+DL Number: {state[:2].upper()}{rng.randint(10000000, 99999999)}
+
+Name: {rng.choice(NAMES)}
+Date of Birth: 19{rng.randint(50, 99)}-0{rng.randint(1, 9)}-{rng.randint(10, 28)}
+
+Class: C
+Restrictions: None
+Endorsements: None"""
+
+def make_pdf(pages):
+    """Render page texts into PDF bytes."""
+    import fitz
+    doc = fitz.open()
+    for text in pages:
+        page = doc.new_page()
+        page.insert_text((72, 72), text, fontsize=11)
+    return doc.tobytes()
+
+def make_docx(pages):
+    """Render page texts into DOCX bytes."""
+    import docx
+    doc = docx.Document()
+    for text in pages:
+        for line in text.split('\n'):
+            doc.add_paragraph(line)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def load_corpus(files_dir, synthetic, pages, seed):
+    """
+    Collect benchmark documents.
+
+    Returns:
+        List of dicts with name, data and label keys
+    """
+    corpus = []
+    for filename in sorted(os.listdir(files_dir)):
+        if filename.lower().endswith(SUPPORTED_EXTENSIONS):
+            with open(os.path.join(files_dir, filename), 'rb') as f:
+                corpus.append({'name': filename, 'data': f.read(), 'label': None})
+
+    rng = random.Random(seed)
+    doc_types = ["invoice", "bank_statement", "drivers_license"]
+    for i in range(synthetic):
+        doc_type = doc_types[i % len(doc_types)]
+        page_texts = [synthetic_text(doc_type, rng) for _ in range(pages)]
+        if i % 2 == 0:
+            corpus.append({'name': f"synthetic_{doc_type}_{i}.pdf",
+                           'data': make_pdf(page_texts), 'label': doc_type})
+        else:
+            corpus.append({'name': f"synthetic_{doc_type}_{i}.docx",
+                           'data': make_docx(page_texts), 'label': doc_type})
+    return corpus
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(q / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+def summarize(latencies, elapsed, items, **params):
+    """
+    Summarize one measurement.
+
+    Args:
+        latencies: Per-call latencies in seconds
+        elapsed: Wall-clock time for all calls in seconds
+        items: Number of documents processed
+        params: Settings recorded alongside the numbers
+
+    Returns:
+        Dict with throughput (documents/s) and latency percentiles (ms)
+    """
+    ordered = sorted(latencies)
+    return {
+        **params,
+        'calls': len(latencies),
+        'items': items,
+        'elapsed_s': round(elapsed, 6),
+        'throughput_per_s': round(items / elapsed, 3) if elapsed > 0 else 0.0,
+        'mean_ms': round(1000 * sum(ordered) / len(ordered), 4) if ordered else 0.0,
+        'p50_ms': round(1000 * percentile(ordered, 50), 4),
+        'p95_ms': round(1000 * percentile(ordered, 95), 4),
+        'p99_ms': round(1000 * percentile(ordered, 99), 4),
+    }
+
+def time_calls(fn, inputs, concurrency=1):
+    """
+    Call fn once per input, timing each call.
+
+    Returns:
+        Tuple of (latencies, elapsed)
+    """
+    def timed(arg):
+        start = time.perf_counter()
+        fn(arg)
+        return time.perf_counter() - start
+
+    start = time.perf_counter()
+    if concurrency <= 1:
+        latencies = [timed(arg) for arg in inputs]
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            latencies = list(executor.map(timed, inputs))
+    return latencies, time.perf_counter() - start
+
+def batches(items, size):
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+def bench_extraction(corpus, repeat):
+    """Time each extractor backend over the corpus."""
+    results = {}
+    for backend in ('pymupdf', 'pypdf2'):
+        registry = default_registry(pdf_backend=backend)
+        jobs = [(registry.get(doc['name'], doc['data'][:SNIFF_BYTES]), doc['data'])
+                for doc in corpus] * repeat
+        for file_format in ('pdf', 'docx'):
+            selected = [(extractor, data) for extractor, data in jobs
+                        if extractor is not None and file_format in extractor.formats]
+            if not selected or (file_format == 'docx' and backend != 'pymupdf'):
+                continue
+            name = f"extract/{file_format}" + (f"/{backend}" if file_format == 'pdf' else "")
+            latencies, elapsed = time_calls(
+                lambda job: job[0].extract(io.BytesIO(job[1])), selected
+            )
+            results[name] = summarize(latencies, elapsed, len(selected), stage='extract')
+    return results
+
+def extract_texts(corpus, cache=None):
+    """Extract the model-stage inputs, through the extraction cache if given."""
+    registry = default_registry()
+    texts = []
+    for doc in corpus:
+        extractor = registry.get(doc['name'], doc['data'][:SNIFF_BYTES])
+        if cache is not None:
+            texts.append(cache.extract(extractor, doc['data'])['text'])
+        else:
+            texts.append(extractor.extract(io.BytesIO(doc['data']))['text'])
+    return texts
+
+def bench_model(classifier, texts, batch_sizes, repeat):
+    """Time vectorization, predict_proba and predict_batch at several batch sizes."""
+    from src.model.forest import TreeEnsemble
+
+    results = {}
+    texts = texts * repeat
+    forest = TreeEnsemble.from_sklearn(classifier.model)
+    for batch_size in batch_sizes:
+        groups = batches(texts, batch_size)
+        features = [classifier.vectorizer.transform(group) for group in groups]
+
+        latencies, elapsed = time_calls(classifier.vectorizer.transform, groups)
+        results[f"vectorize/batch={batch_size}"] = summarize(
+            latencies, elapsed, len(texts), stage='vectorize', batch_size=batch_size)
+
+        latencies, elapsed = time_calls(classifier.model.predict_proba, features)
+        results[f"predict_proba/batch={batch_size}"] = summarize(
+            latencies, elapsed, len(texts), stage='predict_proba', batch_size=batch_size)
+
+        latencies, elapsed = time_calls(forest.predict_proba, features)
+        results[f"predict_proba/numpy/batch={batch_size}"] = summarize(
+            latencies, elapsed, len(texts), stage='predict_proba', backend='numpy',
+            batch_size=batch_size)
+
+        latencies, elapsed = time_calls(classifier.predict_batch, groups)
+        results[f"predict_batch/batch={batch_size}"] = summarize(
+            latencies, elapsed, len(texts), stage='predict_batch', batch_size=batch_size)
+    return results
+
+def bench_index(size, dim, n_queries, seed):
+    """Time top-10 queries on a synthetic vector index, exact and partitioned."""
+    import numpy as np
+    from src.embedding.index import VectorIndex
+
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((max(size // 500, 1), dim)).astype(np.float32)
+
+    def sample(n):
+        return centres[rng.integers(0, len(centres), n)] + 0.6 * rng.standard_normal((n, dim)).astype(np.float32)
+
+    queries = list(sample(n_queries))
+    results = {}
+    for storage in ('float16', 'int8'):
+        index = VectorIndex(dim, storage=storage)
+        for start in range(0, size, 100000):
+            count = min(100000, size - start)
+            index.add(sample(count), ['synthetic'] * count)
+
+        # Exact search is slow on large indexes, so only a few queries are timed
+        exact = queries[:10]
+        latencies, elapsed = time_calls(lambda query: index.search(query, k=10), exact)
+        results[f"index/exact/{storage}"] = summarize(
+            latencies, elapsed, len(exact), stage='index', storage=storage, size=size, dim=dim)
+        exact_ids = [set(index.ids[index.search(query, k=10)[1][0]]) for query in exact]
+
+        index.train(n_lists=max(1, int(np.sqrt(size))), n_probe=8, iterations=5, seed=seed)
+        latencies, elapsed = time_calls(lambda query: index.search(query, k=10), queries)
+        recall = np.mean([len(ids & set(index.ids[index.search(query, k=10)[1][0]])) / 10
+                          for ids, query in zip(exact_ids, exact)])
+        results[f"index/ivf/{storage}"] = summarize(
+            latencies, elapsed, len(queries), stage='index', storage=storage, size=size, dim=dim,
+            n_lists=index.n_lists, n_probe=index.n_probe, recall_at_10=round(float(recall), 4))
+    return results
+
+def bench_zero_shot(model, corpus, texts, batch_sizes, repeat, num_threads):
+    """Time the zero-shot engine with and without int8 quantization, and compare their accuracy."""
+    from src.zero_shot import ZeroShotEngine, compare_quantization
+
+    labels = ["invoice", "bank_statement", "drivers_license"]
+    engines = {quantize: ZeroShotEngine(model, labels, quantize=quantize, num_threads=num_threads)
+               for quantize in (False, True)}
+    report = compare_quantization(engines[False], engines[True], texts, [doc['label'] for doc in corpus])
+
+    results = {}
+    texts = texts * repeat
+    for quantize, engine in engines.items():
+        precision = 'int8' if quantize else 'fp32'
+        accuracy = report.get('quantized_accuracy' if quantize else 'full_accuracy')
+        for batch_size in batch_sizes:
+            engine.batch_size = batch_size
+            latencies, elapsed = time_calls(engine.scores, batches(texts, batch_size))
+            results[f"zero_shot/{precision}/batch={batch_size}"] = summarize(
+                latencies, elapsed, len(texts), stage='zero_shot', precision=precision,
+                batch_size=batch_size, accuracy=accuracy,
+                **({'accuracy_delta': report.get('accuracy_delta'),
+                    'agreement': report['agreement']} if quantize else {}))
+    return results
+
+def bench_flask(corpus, concurrency_levels, batch_sizes, repeat):
+    """Time end-to-end requests against the Flask service."""
+    from src.app import app
+
+    results = {}
+    docs = corpus * repeat
+
+    def post_one(doc):
+        client = app.test_client()
+        data = {'file': (io.BytesIO(doc['data']), doc['name'])}
+        response = client.post('/classify_file', data=data, content_type='multipart/form-data')
+        if response.status_code != 200:
+            raise RuntimeError(f"{doc['name']}: {response.status_code} {response.get_data(as_text=True)}")
+
+    def post_many(group):
+        client = app.test_client()
+        data = {'files': [(io.BytesIO(doc['data']), doc['name']) for doc in group]}
+        response = client.post('/classify_files', data=data, content_type='multipart/form-data')
+        if response.status_code != 200:
+            raise RuntimeError(f"batch: {response.status_code}")
+
+    for concurrency in concurrency_levels:
+        latencies, elapsed = time_calls(post_one, docs, concurrency)
+        results[f"http/flask/classify_file/c={concurrency}"] = summarize(
+            latencies, elapsed, len(docs), stage='http', service='flask', concurrency=concurrency)
+    for batch_size in batch_sizes:
+        groups = batches(docs, batch_size)
+        latencies, elapsed = time_calls(post_many, groups)
+        results[f"http/flask/classify_files/batch={batch_size}"] = summarize(
+            latencies, elapsed, len(docs), stage='http', service='flask', batch_size=batch_size)
+    return results
+
+def bench_fastapi(corpus, concurrency_levels, batch_sizes, repeat):
+    """Time end-to-end requests against the FastAPI service."""
+    from fastapi.testclient import TestClient
+    from src.api import app
+
+    results = {}
+    docs = corpus * repeat
+    headers = {"Authorization": f"Bearer {os.environ['API_KEY']}"}
+
+    with TestClient(app) as client:
+        def post_one(doc):
+            response = client.post('/classify_file', headers=headers,
+                                   files={'file': (doc['name'], doc['data'])})
+            if response.status_code != 200 or response.json().get('error'):
+                raise RuntimeError(f"{doc['name']}: {response.status_code} {response.text}")
+
+        def post_many(group):
+            files = [('files', (doc['name'], doc['data'])) for doc in group]
+            response = client.post('/classify_files', headers=headers, files=files)
+            if response.status_code != 200:
+                raise RuntimeError(f"batch: {response.status_code}")
+
+        for concurrency in concurrency_levels:
+            latencies, elapsed = time_calls(post_one, docs, concurrency)
+            results[f"http/fastapi/classify_file/c={concurrency}"] = summarize(
+                latencies, elapsed, len(docs), stage='http', service='fastapi',
+                concurrency=concurrency)
+        for batch_size in batch_sizes:
+            groups = batches(docs, batch_size)
+            latencies, elapsed = time_calls(post_many, groups)
+            results[f"http/fastapi/classify_files/batch={batch_size}"] = summarize(
+                latencies, elapsed, len(docs), stage='http', service='fastapi',
+                batch_size=batch_size)
+    return results
+
+def compare(results, baseline_path, tolerance):
+    """
+    Compare results against a saved run.
+
+    A measurement regresses when its p95 latency grows, or its throughput
+    falls, by more than ``tolerance`` (a fraction).
+
+    Returns:
+        Number of regressions found
+    """
+    with open(baseline_path) as f:
+        baseline = json.load(f)['results']
+
+    regressions = 0
+    print(f"\n{'Benchmark':<48} {'p95 ms (base)':>15} {'p95 ms':>10} {'docs/s (base)':>15} {'docs/s':>10}")
+    for name, current in results.items():
+        previous = baseline.get(name)
+        if previous is None:
+            continue
+        slower = current['p95_ms'] > previous['p95_ms'] * (1 + tolerance)
+        fewer = current['throughput_per_s'] < previous['throughput_per_s'] * (1 - tolerance)
+        flag = "  REGRESSION" if slower or fewer else ""
+        regressions += bool(flag)
+        print(f"{name:<48} {previous['p95_ms']:>15.3f} {current['p95_ms']:>10.3f} "
+              f"{previous['throughput_per_s']:>15.1f} {current['throughput_per_s']:>10.1f}{flag}")
+    return regressions
+
+def parse_list(value):
+    return [int(part) for part in value.split(',') if part]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the document classification path")
+    parser.add_argument('--files-dir', default=os.path.join(project_root, 'files'))
+    parser.add_argument('--synthetic', type=int, default=30, help="Synthetic documents to generate")
+    parser.add_argument('--pages', type=int, default=3, help="Pages per synthetic document")
+    parser.add_argument('--repeat', type=int, default=3, help="Passes over the corpus per measurement")
+    parser.add_argument('--concurrency', type=parse_list, default=[1, 4, 16])
+    parser.add_argument('--batch-sizes', type=parse_list, default=[1, 8, 32])
+    parser.add_argument('--stages', default='extract,model,flask,fastapi',
+                        help="Comma-separated stages to run ('index' and 'zero_shot' are also available)")
+    parser.add_argument('--index-size', type=int, default=100000,
+                        help="Vectors in the synthetic index for the 'index' stage")
+    parser.add_argument('--index-dim', type=int, default=384, help="Dimensionality of the index vectors")
+    parser.add_argument('--zero-shot-model', default=os.getenv("ZERO_SHOT_MODEL", "facebook/bart-large-mnli"),
+                        help="NLI model name or local directory for the 'zero_shot' stage")
+    parser.add_argument('--threads', type=int, default=None, help="Torch threads for the 'zero_shot' stage")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--extraction-cache', default=os.getenv("EXTRACTION_CACHE_DB"),
+                        help="SQLite extraction cache used to prepare model-stage inputs "
+                             "(extraction timings never use it)")
+    parser.add_argument('--quick', action='store_true', help="Small corpus and one pass")
+    parser.add_argument('--output', help="Write results to this JSON file")
+    parser.add_argument('--compare', help="Compare against a previous results file")
+    parser.add_argument('--tolerance', type=float, default=0.2,
+                        help="Allowed relative slowdown before flagging a regression")
+    args = parser.parse_args()
+
+    if args.quick:
+        args.synthetic, args.repeat = min(args.synthetic, 6), 1
+        args.concurrency, args.batch_sizes = args.concurrency[:2], args.batch_sizes[:2]
+    stages = set(args.stages.split(','))
+
+    corpus = load_corpus(args.files_dir, args.synthetic, args.pages, args.seed)
+    print(f"Benchmark corpus: {len(corpus)} documents")
+
+    results = {}
+    if 'extract' in stages:
+        results.update(bench_extraction(corpus, args.repeat))
+    cache = ExtractionCache(args.extraction_cache) if args.extraction_cache else None
+    if 'model' in stages:
+        from src.model.classifier import DocumentClassifier
+        classifier = DocumentClassifier()
+        start = time.perf_counter()
+        classifier.load(
+            os.path.join(project_root, "models", "classifier.joblib"),
+            os.path.join(project_root, "models", "vectorizer.joblib"),
+            os.path.join(project_root, "models", "label_encoder.joblib")
+        )
+        results['model_load'] = summarize([time.perf_counter() - start],
+                                          time.perf_counter() - start, 1, stage='load')
+        texts = extract_texts(corpus, cache)
+        results.update(bench_model(classifier, texts, args.batch_sizes, args.repeat))
+    if 'index' in stages:
+        results.update(bench_index(args.index_size, args.index_dim,
+                                   200 if not args.quick else 20, args.seed))
+    if 'zero_shot' in stages:
+        results.update(bench_zero_shot(args.zero_shot_model, corpus, extract_texts(corpus, cache),
+                                       args.batch_sizes, args.repeat, args.threads))
+    if 'flask' in stages:
+        results.update(bench_flask(corpus, args.concurrency, args.batch_sizes, args.repeat))
+    if 'fastapi' in stages:
+        results.update(bench_fastapi(corpus, args.concurrency, args.batch_sizes, args.repeat))
+
+    print(f"\n{'Benchmark':<48} {'docs/s':>10} {'p50 ms':>10} {'p95 ms':>10} {'p99 ms':>10}")
+    for name, summary in results.items():
+        print(f"{name:<48} {summary['throughput_per_s']:>10.1f} {summary['p50_ms']:>10.3f} "
+              f"{summary['p95_ms']:>10.3f} {summary['p99_ms']:>10.3f}")
+
+    if args.output:
+        report = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'documents': len(corpus),
+                'args': {key: value for key, value in vars(args).items()
+                         if key not in ('output', 'compare')},
+            },
+            'results': results,
+        }
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"\nResults written to {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n{regressions} regression(s) beyond {args.tolerance:.0%}")
+            return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,72 @@
+"""
+Build the character n-gram table used for language detection.
+
+Reads the n-gram frequency profiles that ship with langdetect and writes
+them as a hashed log-probability table, so detection at request time
+needs only NumPy.
+
+Usage:
+    python scripts/build_language_profiles.py [--output models/language_profiles.npz]
+"""
+import argparse
+import json
+import os
+import sys
+import logging
+
+import numpy as np
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.language import PROFILE_FORMAT_VERSION, SPACE, build_profile
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def build_char_map():
+    """Map every Basic Multilingual Plane character to langdetect's normalized, lower-case form."""
+    from langdetect.utils.ngram import NGram
+
+    char_map = np.full(0x10000, SPACE, dtype=np.uint16)
+    for code in range(0x10000):
+        if 0xD800 <= code < 0xE000:
+            continue
+        char = NGram.normalize(chr(code))
+        lower = char.lower()
+        char_map[code] = ord(lower if len(lower) == 1 else char)
+    return char_map
+
+def load_profiles(profiles_dir):
+    """Read langdetect's JSON profiles, one file per language."""
+    profiles = {}
+    for language in sorted(os.listdir(profiles_dir)):
+        with open(os.path.join(profiles_dir, language), encoding='utf-8') as f:
+            profiles[language] = json.load(f)
+    return profiles
+
+def main():
+    import langdetect
+
+    parser = argparse.ArgumentParser(description="Build the language detection n-gram table")
+    parser.add_argument('--profiles-dir', default=os.path.join(os.path.dirname(langdetect.__file__), 'profiles'))
+    parser.add_argument('--output', default=os.path.join(project_root, 'models', 'language_profiles.npz'))
+    parser.add_argument('--buckets', type=int, default=2 ** 15, help="Hash buckets (a power of two)")
+    args = parser.parse_args()
+
+    char_map = build_char_map()
+    languages, log_probs = build_profile(load_profiles(args.profiles_dir), char_map, args.buckets)
+    os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+    np.savez_compressed(
+        args.output,
+        format_version=np.array(PROFILE_FORMAT_VERSION),
+        languages=np.array(languages),
+        log_probs=log_probs.astype(np.float16),
+        char_map=char_map,
+    )
+    logger.info(f"Wrote {len(languages)} languages, {args.buckets} buckets to {args.output}")
+
+if __name__ == '__main__':
+    main()
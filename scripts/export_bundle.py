@@ -0,0 +1,43 @@
+"""
+Convert the joblib model artifacts into a memory-mappable model bundle.
+
+Usage:
+    python scripts/export_bundle.py [--models-dir models] [--output models/bundle]
+"""
+import argparse
+import os
+import sys
+import logging
+
+# Add the project root to Python path
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(project_root)
+
+from src.model.classifier import DocumentClassifier
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+def main():
+    parser = argparse.ArgumentParser(description="Export joblib model artifacts as a model bundle")
+    parser.add_argument('--models-dir', default=os.path.join(project_root, 'models'))
+    parser.add_argument('--output', help="Bundle directory (default: <models-dir>/bundle)")
+    args = parser.parse_args()
+
+    classifier = DocumentClassifier()
+    classifier.load(
+        os.path.join(args.models_dir, "classifier.joblib"),
+        os.path.join(args.models_dir, "vectorizer.joblib"),
+        os.path.join(args.models_dir, "label_encoder.joblib")
+    )
+
+    output = args.output or os.path.join(args.models_dir, 'bundle')
+    manifest = classifier.save_bundle(output)
+    logger.info(
+        f"Wrote bundle {manifest['model_version']} to {output}: "
+        f"{manifest['forest']['n_trees']} trees, {len(manifest['classes'])} classes"
+    )
+
+if __name__ == '__main__':
+    main()
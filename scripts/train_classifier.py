@@ -1,35 +1,59 @@
+import argparse
+import io
 import os
 import sys
 import logging
+import numpy as np
 from PIL import Image
-import docx
-from io import BytesIO
 
 # Add the project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
+from src.cache import ExtractionCache, file_content_key
+from src.extractor.registry import default_registry
+from src.extractor.sniff import SNIFF_BYTES
 from src.model.classifier import DocumentClassifier
+from src.model.hashing import HashingTfidfVectorizer
+from src.model.thumbnail import ThumbnailClassifier, image_features, thumbnail_features
+from src.model.training import StreamingTrainer, iter_directory, iter_manifest
+from src.extractor.pool import ExtractionPool
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def extract_metadata_from_image(file_path):
+# Bump when extract_metadata_from_image changes its output
+IMAGE_METADATA_VERSION = "image-metadata/2"
+
+# Default location of the extraction cache shared by training and benchmarks
+DEFAULT_EXTRACTION_CACHE = ".cache/extractions.db"
+
+def extract_metadata_from_image(file_path, cache=None):
     """Extract metadata from an image file."""
+    key = None
+    if cache is not None:
+        # The metadata text includes the filename, so it is part of the key
+        key = file_content_key(file_path, IMAGE_METADATA_VERSION, os.path.basename(file_path))
+        cached = cache.get(key)
+        if cached is not None:
+            return cached['text']
     try:
-        img = Image.open(file_path)
-        # Extract basic image properties as text
-        metadata = f"Image format: {img.format}\n"
-        metadata += f"Image size: {img.size}\n"
-        metadata += f"Color mode: {img.mode}\n"
-        metadata += f"Filename features: {os.path.basename(file_path)}\n"
-        
-        # Add color statistics if available
-        if img.mode in ('RGB', 'RGBA'):
-            # Calculate average color
-            avg_color = tuple(sum(x) // len(x) for x in zip(*img.getdata()))
-            metadata += f"Average color (RGB): {avg_color}\n"
+        with Image.open(file_path) as img:
+            # Extract basic image properties as text
+            metadata = f"Image format: {img.format}\n"
+            metadata += f"Image size: {img.size}\n"
+            metadata += f"Color mode: {img.mode}\n"
+            metadata += f"Filename features: {os.path.basename(file_path)}\n"
+            
+            # Add color statistics if available
+            if img.mode in ('RGB', 'RGBA'):
+                # Average color of the thumbnail; the first features are the channel means
+                features = thumbnail_features(img)
+                avg_color = tuple(int(value * 255) for value in features[:3])
+                metadata += f"Average color (RGB): {avg_color}\n"
         
+        if key is not None:
+            cache.set(key, {'text': metadata, 'metadata': {}, 'error': None})
         return metadata
     except Exception as e:
         logger.error(f"Error extracting metadata from {file_path}: {e}")
@@ -46,33 +70,76 @@ def get_document_type(filename):
         return "bank_statement"
     return "unknown"
 
-def extract_text_from_pdf(file_path):
-    """Extract text from PDF file."""
-    try:
-        with open(file_path, 'rb') as f:
-            content = f.read().decode('utf-8', errors='ignore')
-            return content
-    except Exception as e:
-        logger.error(f"Error extracting text from PDF {file_path}: {e}")
-        return ""
+# Use the same extractors as the services so training text matches serving text
+extractors = default_registry()
 
-def extract_text_from_docx(file_path):
-    """Extract text from DOCX file."""
+def extract_text_from_document(file_path, cache=None):
+    """Extract text from a PDF or DOCX file, reusing cached text when possible."""
     try:
-        doc = docx.Document(file_path)
-        return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        extractor = extractors.get(file_path, data[:SNIFF_BYTES])
+        if extractor is None:
+            logger.error(f"No extractor for {file_path}")
+            return ""
+        if cache is not None:
+            content = cache.extract(extractor, data)
+        else:
+            content = extractor.extract(io.BytesIO(data))
+        if content['error']:
+            logger.error(f"Error extracting text from {file_path}: {content['error']}")
+            return ""
+        return content['text']
     except Exception as e:
-        logger.error(f"Error extracting text from DOCX {file_path}: {e}")
+        logger.error(f"Error extracting text from {file_path}: {e}")
         return ""
 
 def main():
+    parser = argparse.ArgumentParser(description="Train the document classifier")
+    parser.add_argument('--featurizer', choices=('tfidf', 'hashing'), default='tfidf',
+                        help="Vocabulary-based TF-IDF or feature hashing")
+    parser.add_argument('--hash-features', type=int, default=2 ** 18,
+                        help="Number of hash buckets for the hashing featurizer")
+    parser.add_argument('--streaming', action='store_true',
+                        help="Train out of core in chunks (implies --featurizer hashing)")
+    parser.add_argument('--source', default="files",
+                        help="Corpus directory: label subdirectories, or files named by type")
+    parser.add_argument('--manifest', help="JSONL or CSV file listing path and label, instead of --source")
+    parser.add_argument('--chunk-size', type=int, default=1000,
+                        help="Documents per chunk when streaming")
+    parser.add_argument('--trees-per-chunk', type=int, default=10,
+                        help="Trees added per chunk when streaming")
+    parser.add_argument('--max-trees', type=int, default=200,
+                        help="Most trees in the streamed forest, however large the corpus")
+    parser.add_argument('--workers', type=int, help="Extraction worker processes (default: CPU count)")
+    parser.add_argument('--extraction-cache',
+                        default=os.getenv("EXTRACTION_CACHE_DB", DEFAULT_EXTRACTION_CACHE),
+                        help="SQLite file caching extracted text between runs")
+    parser.add_argument('--no-extraction-cache', action='store_true',
+                        help="Re-extract every document instead of using the cache")
+    args = parser.parse_args()
+    
+    cache = None
+    if args.extraction_cache and not args.no_extraction_cache:
+        cache = ExtractionCache(args.extraction_cache)
+    
+    if args.streaming or args.manifest:
+        train_streaming(args, cache)
+        return
+    
     # Initialize classifier
-    classifier = DocumentClassifier()
+    if args.featurizer == 'hashing':
+        classifier = DocumentClassifier(
+            vectorizer=HashingTfidfVectorizer(n_features=args.hash_features, min_df=2, max_df=0.9)
+        )
+    else:
+        classifier = DocumentClassifier()
     
     # Process files
-    files_dir = "files"
+    files_dir = args.source
     texts = []
     labels = []
+    images = []
     
     logger.info("Processing training files...")
     for filename in os.listdir(files_dir):
@@ -90,12 +157,11 @@ def main():
         
         # Extract text based on file type
         text = ""
-        if filename.lower().endswith('.pdf'):
-            text = extract_text_from_pdf(file_path)
-        elif filename.lower().endswith('.docx'):
-            text = extract_text_from_docx(file_path)
+        if filename.lower().endswith(('.pdf', '.docx')):
+            text = extract_text_from_document(file_path, cache)
         elif filename.lower().endswith(('.jpg', '.jpeg', '.png')):
-            text = extract_metadata_from_image(file_path)
+            text = extract_metadata_from_image(file_path, cache)
+            images.append((file_path, doc_type))
         else:
             logger.warning(f"Unsupported file type: {filename}")
             continue
@@ -107,6 +173,9 @@ def main():
         else:
             logger.warning(f"No text extracted from {filename}")
     
+    if cache is not None:
+        logger.info(f"Extraction cache: {cache.stats()}")
+    
     if not texts:
         logger.error("No valid documents found for training")
         return
@@ -121,13 +190,67 @@ def main():
     metrics = classifier.train(texts, labels)
     logger.info(f"Training metrics: {metrics}")
     
-    # Save models
+    save_models(classifier)
+    train_thumbnail_classifier(images)
+
+def train_thumbnail_classifier(images, path="models/thumbnail.npz"):
+    """Train the image pre-classifier the services consult before OCR."""
+    features = []
+    labels = []
+    for file_path, doc_type in images:
+        try:
+            features.append(image_features(file_path))
+            labels.append(doc_type)
+        except Exception as e:
+            logger.error(f"Error computing thumbnail features for {file_path}: {e}")
+    
+    if len(set(labels)) < 2:
+        logger.warning("Thumbnail classifier not trained: need images of at least 2 classes")
+        return
+    
+    logger.info(f"Training thumbnail classifier with {len(labels)} images...")
+    ThumbnailClassifier().fit(np.stack(features), labels).save(path)
+    logger.info(f"Thumbnail classifier saved to {path}")
+
+def train_streaming(args, cache=None):
+    """Train over a large corpus in bounded memory."""
+    if args.manifest:
+        documents = iter_manifest(args.manifest)
+    else:
+        def label_for(filename):
+            doc_type = get_document_type(filename)
+            return None if doc_type == "unknown" else doc_type
+        documents = iter_directory(args.source, label_for)
+    
+    trainer = StreamingTrainer(
+        n_features=args.hash_features,
+        chunk_size=args.chunk_size,
+        trees_per_chunk=args.trees_per_chunk,
+        max_trees=args.max_trees,
+        pool=ExtractionPool(max_workers=args.workers),
+        registry=extractors,
+        cache=cache
+    )
+    logger.info("Training classifier in streaming mode...")
+    try:
+        classifier, metrics = trainer.fit(documents)
+    finally:
+        trainer.pool.shutdown()
+    if cache is not None:
+        logger.info(f"Extraction cache: {cache.stats()}")
+    logger.info(f"Training metrics: {metrics}")
+    save_models(classifier)
+
+def save_models(classifier):
+    """Write the joblib artifacts and the model bundle."""
     os.makedirs("models", exist_ok=True)
     classifier.save(
         "models/classifier.joblib",
         "models/vectorizer.joblib",
         "models/label_encoder.joblib"
     )
+    # Memory-mappable copy used by the services for fast startup
+    classifier.save_bundle("models/bundle")
     logger.info("Models saved successfully")
 
 if __name__ == '__main__':
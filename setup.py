@@ -16,5 +16,10 @@ setup(
         "pandas>=2.2.1",
         "pydantic>=2.6.1",
     ],
+    entry_points={
+        "console_scripts": [
+            "classify-documents=src.cli:main",
+        ],
+    },
     python_requires=">=3.12",
 ) 
\ No newline at end of file
@@ -0,0 +1,171 @@
+import asyncio
+import contextvars
+import time
+from concurrent.futures import Executor, Future
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+class Overloaded(Exception):
+    """Raised when a request cannot be admitted because the queue is full."""
+    pass
+
+class _Lease:
+    """One held slot, freed once its holder has left and its blocking calls have returned."""
+
+    def __init__(self, controller: 'AdmissionController', loop: asyncio.AbstractEventLoop):
+        self.controller = controller
+        self.loop = loop
+        self.running = 0
+        self.left = False
+
+    def hold(self, future: Future):
+        """Keep the slot until a blocking call's future is done."""
+        self.running += 1
+        future.add_done_callback(lambda _: self._call_returned())
+
+    def _call_returned(self):
+        # Executor callbacks run on the worker thread
+        try:
+            self.loop.call_soon_threadsafe(self._returned)
+        except RuntimeError:
+            pass  # The loop is closed; nothing is left to release
+
+    def _returned(self):
+        self.running -= 1
+        if self.left and self.running == 0:
+            self.controller.abandoned -= 1
+            self.controller._release()
+
+    def leave(self):
+        self.left = True
+        if self.running == 0:
+            self.controller._release()
+        else:
+            self.controller.abandoned += 1
+
+# The slot held by the current task, if any
+_current_lease: contextvars.ContextVar[Optional[_Lease]] = contextvars.ContextVar('slot', default=None)
+
+class AdmissionController:
+    """
+    Bounds the work an async service accepts.
+
+    At most ``max_concurrent`` documents are processed at once and at most
+    ``max_queue`` more wait for a slot. Requests beyond that are refused
+    immediately with ``Overloaded`` instead of queueing without limit, so
+    latency stays bounded under load and clients can back off and retry.
+
+    Blocking calls made through ``run_in_executor`` keep their slot until
+    they return, even when the request that made them has given up (e.g.
+    on its deadline), so abandoned work still counts against the limit.
+    """
+
+    def __init__(self, max_concurrent: int = 16, max_queue: int = 64):
+        """
+        Initialize the controller.
+
+        Args:
+            max_concurrent: Documents processed at the same time
+            max_queue: Documents allowed to wait for a free slot
+        """
+        if max_concurrent < 1:
+            raise ValueError("max_concurrent must be at least 1")
+        if max_queue < 0:
+            raise ValueError("max_queue must not be negative")
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.outstanding = 0
+        self.active = 0
+        self.admitted = 0
+        self.rejected = 0
+        # Slots still held by blocking calls of requests that gave up
+        self.abandoned = 0
+        self._wait_seconds = 0.0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_concurrent + self.max_queue
+
+    @asynccontextmanager
+    async def admit(self, count: int = 1) -> AsyncIterator[None]:
+        """
+        Reserve room for ``count`` documents for the duration of a request.
+
+        A request is admitted whole or not at all, so a batch upload never
+        ends up half queued. An idle service admits any request, however
+        large, so oversized batches are slow rather than impossible.
+
+        Raises:
+            Overloaded: If the documents do not fit in the remaining capacity
+        """
+        if self.outstanding + count > self.capacity and self.outstanding > 0:
+            self.rejected += 1
+            raise Overloaded(f"Server busy: {self.outstanding} documents in progress")
+        self.outstanding += count
+        self.admitted += 1
+        try:
+            yield
+        finally:
+            self.outstanding -= count
+
+    @asynccontextmanager
+    async def slot(self) -> AsyncIterator[None]:
+        """
+        Wait for, then hold, one processing slot.
+
+        The slot is freed on leaving the block, or, if blocking calls made
+        through ``run_in_executor`` are still running, once they return.
+        """
+        start = time.monotonic()
+        await self._semaphore.acquire()
+        self._wait_seconds += time.monotonic() - start
+        self.active += 1
+        lease = _Lease(self, asyncio.get_running_loop())
+        token = _current_lease.set(lease)
+        try:
+            yield
+        finally:
+            _current_lease.reset(token)
+            lease.leave()
+
+    def _release(self):
+        self.active -= 1
+        self._semaphore.release()
+
+    async def run_in_executor(self, executor: Executor, fn: Callable, *args: Any) -> Any:
+        """
+        Run a blocking call on an executor, tied to the caller's slot.
+
+        If the caller is cancelled while the call runs, the call cannot be
+        interrupted; its slot then stays taken until it returns.
+
+        Args:
+            executor: Executor to run the call on
+            fn: Blocking function
+            args: Its arguments
+
+        Returns:
+            The function's return value
+        """
+        future = executor.submit(fn, *args)
+        lease = _current_lease.get()
+        if lease is not None:
+            lease.hold(future)
+        return await asyncio.wrap_future(future)
+
+    def retry_after(self) -> int:
+        """Suggested seconds before a refused client retries."""
+        return max(1, round(self.outstanding / self.max_concurrent))
+
+    def stats(self) -> Dict[str, float]:
+        """Get the current load and admission counters."""
+        return {
+            'active': self.active,
+            'queued': max(0, self.outstanding - self.active),
+            'capacity': self.capacity,
+            'admitted': self.admitted,
+            'rejected': self.rejected,
+            'abandoned': self.abandoned,
+            'wait_seconds': round(self._wait_seconds, 6),
+        }
@@ -1,30 +1,102 @@
+import asyncio
 import os
-from typing import Optional
-from fastapi import FastAPI, File, UploadFile, HTTPException, Security, Depends
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Awaitable, List, Optional, Tuple, TypeVar
+from fastapi import FastAPI, File, Request, Response, UploadFile, HTTPException, Security, Depends
+from fastapi.responses import JSONResponse
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from pydantic import BaseModel
 import uvicorn
 
-from .extractor.pdf import PDFExtractor
-from .model.classifier import DocumentClassifier
+from .admission import AdmissionController, Overloaded
+from .batching import MicroBatcher
+from .cache import ResultCache
+from .extractor.pool import ExtractionPool
+from .extractor.registry import OCR_FORMATS, default_registry, needs_ocr
+from .extractor.sniff import MAX_UPLOAD_BYTES, MULTIPART_OVERHEAD, detect_format, read_head, stream_size
+from .extractor.uploads import SpooledUpload, spool_upload
+from .metrics import (count_document, observe_document, observe_request,
+                      register_stats, render_metrics, stage_timer)
+from .middleware import BodySizeLimitMiddleware
+from .model.classifier import DocumentClassifier, load_classifier
+from .model.thumbnail import ThumbnailClassifier, upload_features
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start the extraction workers before serving, and stop them after."""
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(loop.run_in_executor(None, extraction_pool.warm),
+                         loop.run_in_executor(None, ocr_pool.warm))
+    yield
+    extraction_pool.shutdown()
+    ocr_pool.shutdown()
 
 # Initialize FastAPI app
-app = FastAPI(title="Document Classification Service")
+app = FastAPI(title="Document Classification Service", lifespan=lifespan)
 security = HTTPBearer()
 
+# Size limits; bodies over the request limit are refused before they are read,
+# and a single-file upload may not be much larger than one file
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_MB", "100")) * 1024 * 1024
+app.add_middleware(
+    BodySizeLimitMiddleware,
+    max_body_bytes=MAX_REQUEST_BYTES,
+    path_limits={"/classify_file": MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD}
+)
+
 # Initialize components
-pdf_extractor = PDFExtractor()
-classifier = DocumentClassifier()
+extractors = default_registry(
+    # Only the leading pages needed for classification are parsed
+    max_pages=int(os.getenv("EXTRACTION_MAX_PAGES", "20")) or None,
+    max_chars=int(os.getenv("EXTRACTION_MAX_CHARS", "100000")) or None
+)
+extraction_pool = ExtractionPool.from_env()
+# Image OCR is much slower than parsing, so it gets its own pool (OCR_WORKERS, OCR_TIMEOUT, ...)
+ocr_pool = ExtractionPool.from_env('OCR')
+
+# Bounded concurrency: documents processed at once, documents allowed to wait
+# for a slot (beyond which requests get 429), and a deadline per request (504)
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", str(2 * (os.cpu_count() or 1))))
+API_MAX_QUEUE = int(os.getenv("API_MAX_QUEUE", "64"))
+API_REQUEST_TIMEOUT = float(os.getenv("API_REQUEST_TIMEOUT", "60")) or None
 
-# Load the classifier model
-MODEL_PATH = os.getenv("MODEL_PATH", "models/classifier.joblib")
-VECTORIZER_PATH = os.getenv("VECTORIZER_PATH", "models/vectorizer.joblib")
-LABEL_ENCODER_PATH = os.getenv("LABEL_ENCODER_PATH", "models/label_encoder.joblib")
+admission = AdmissionController(max_concurrent=API_MAX_CONCURRENCY, max_queue=API_MAX_QUEUE)
+# Spooling and hashing uploads, cache lookups and waits on the extraction
+# workers run here, never on the event loop
+blocking_executor = ThreadPoolExecutor(max_workers=API_MAX_CONCURRENCY, thread_name_prefix="classify")
 
+# Load the classifier model, preferring the memory-mapped bundle when present
 try:
-    classifier.load(MODEL_PATH, VECTORIZER_PATH, LABEL_ENCODER_PATH)
+    classifier = load_classifier()
 except Exception as e:
     print(f"Warning: Could not load model: {e}")
+    classifier = DocumentClassifier()
+
+# Optional image pre-classifier (THUMBNAIL_MODEL); confident predictions skip OCR
+try:
+    thumbnail_classifier = ThumbnailClassifier.from_env("models/thumbnail.npz")
+except Exception as e:
+    print(f"Warning: Could not load thumbnail model: {e}")
+    thumbnail_classifier = None
+
+# Concurrent requests are grouped into one vectorized prediction call
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
+batcher = MicroBatcher(
+    classifier.predict_batch,
+    max_batch_size=BATCH_MAX_SIZE,
+    max_wait_ms=BATCH_MAX_WAIT_MS
+)
+
+# Results for previously seen uploads, keyed by content hash and model version
+result_cache = ResultCache.from_env()
+
+register_stats('batcher', batcher.stats)
+register_stats('result_cache', result_cache.stats)
+register_stats('admission', admission.stats)
 
 class ClassificationResponse(BaseModel):
     filename: str
@@ -32,11 +104,42 @@ class ClassificationResponse(BaseModel):
     confidence: float
     error: Optional[str] = None
 
+class BatchClassificationResponse(BaseModel):
+    results: List[ClassificationResponse]
+
+# Request latency is recorded for the classification endpoints only
+TIMED_ENDPOINTS = {"/classify_file", "/classify_files"}
+
+@app.middleware("http")
+async def record_request(request: Request, call_next):
+    """Record the latency and status of classification requests."""
+    start = time.perf_counter()
+    response = await call_next(request)
+    if request.url.path in TIMED_ENDPOINTS:
+        observe_request(request.url.path, response.status_code, time.perf_counter() - start)
+    return response
+
 @app.get("/")
 async def health_check():
     """Health check endpoint."""
     return {"status": "ok", "message": "Document classification service is running"}
 
+@app.get("/stats")
+async def stats():
+    """Report prediction batcher statistics."""
+    return {"batcher": batcher.stats(), "cache": result_cache.stats(), "admission": admission.stats()}
+
+@app.get("/metrics")
+async def metrics():
+    """Expose Prometheus metrics."""
+    payload, content_type = render_metrics()
+    return Response(content=payload, media_type=content_type)
+
+def result_cache_key(filename: str, upload: SpooledUpload) -> str:
+    """Key a cached result by upload content, file type and model version."""
+    extension = os.path.splitext(filename)[1].lower()
+    return upload.key(extension, classifier.version or '')
+
 # API key validation
 def verify_api_key(credentials: HTTPAuthorizationCredentials = Security(security)) -> str:
     """Verify the API key from the Authorization header."""
@@ -53,6 +156,153 @@ def verify_api_key(credentials: HTTPAuthorizationCredentials = Security(security
         )
     return credentials.credentials
 
+def validate_upload(file: UploadFile):
+    """
+    Check an upload's size and real format without reading all of it.
+    
+    Raises:
+        HTTPException: 413 if the file is too large, 400 if its content is
+            not a supported format
+    """
+    with stage_timer('sniff'):
+        size = stream_size(file.file)
+        file_format = detect_format(read_head(file.file), file.filename)
+    
+    if size > MAX_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=413,
+            detail=f"File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)"
+        )
+    
+    if extractors.for_format(file_format or '') is None:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unsupported file format: {file.filename}"
+        )
+
+T = TypeVar('T')
+
+def overloaded_error(e: Overloaded) -> HTTPException:
+    """Build the 429 response telling clients when to retry."""
+    return HTTPException(
+        status_code=429,
+        detail=str(e),
+        headers={"Retry-After": str(admission.retry_after())}
+    )
+
+async def with_deadline(work: Awaitable[T]) -> T:
+    """
+    Await work within the per-request timeout.
+    
+    Raises:
+        HTTPException: 504 if the work does not finish in time
+    """
+    try:
+        return await asyncio.wait_for(work, API_REQUEST_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=504,
+            detail=f"Classification timed out after {API_REQUEST_TIMEOUT:g}s"
+        )
+
+async def run_blocking(fn, *args):
+    """
+    Run a blocking call on the bounded executor.
+
+    Inside a processing slot the call keeps that slot until it returns,
+    even after a 504, so the executor never has more calls than slots.
+    """
+    return await admission.run_in_executor(blocking_executor, fn, *args)
+
+async def prescreen(filename: str, upload: SpooledUpload) -> Optional[Tuple[str, float]]:
+    """
+    Classify an image from its thumbnail alone, before any OCR.
+    
+    The untrusted image is decoded in an OCR worker, under that pool's
+    memory and time limits. Returns (predicted_class, confidence) when the
+    thumbnail classifier is confident enough, or None when the upload needs
+    full extraction.
+    """
+    if detect_format(upload.head, filename) not in OCR_FORMATS:
+        return None
+    with stage_timer('prescreen'):
+        try:
+            features = await run_blocking(ocr_pool.run, upload_features, upload, thumbnail_classifier.size)
+        except Exception:
+            return None
+        return thumbnail_classifier.predict_confident_features(features)
+
+async def classify_upload(file: UploadFile) -> ClassificationResponse:
+    """Classify one upload of a supported format, consulting the result cache first."""
+    async with admission.slot():
+        # The body is copied once, hashed on the way; large bodies go to disk
+        with stage_timer('read'):
+            upload = await run_blocking(spool_upload, file.file)
+        with upload:
+            return await classify_spooled(file.filename, upload)
+
+async def classify_spooled(filename: str, upload: SpooledUpload) -> ClassificationResponse:
+    """Classify one spooled upload once it holds a processing slot."""
+    # Re-submitted documents skip extraction and prediction
+    observe_document(upload.size)
+    cache_key = result_cache_key(filename, upload)
+    cached = await run_blocking(result_cache.get, cache_key)
+    if cached is not None:
+        count_document(cached['predicted_class'], 'cached')
+        return ClassificationResponse(filename=filename, **cached)
+    
+    # Images the thumbnail classifier is sure about skip OCR entirely
+    if thumbnail_classifier is not None:
+        prediction = await prescreen(filename, upload)
+        if prediction is not None:
+            predicted_class, confidence = prediction
+            await run_blocking(result_cache.set, cache_key, {
+                "predicted_class": predicted_class,
+                "confidence": confidence
+            })
+            count_document(predicted_class, 'prescreened')
+            return ClassificationResponse(
+                filename=filename,
+                predicted_class=predicted_class,
+                confidence=confidence
+            )
+    
+    # Extract content in a worker process, which reads spooled bodies from disk
+    extractor = extractors.get(filename, upload.head)
+    if extractor is None:
+        raise ValueError(f"Unsupported file format: {filename}")
+    with stage_timer('extract'):
+        pool = ocr_pool if needs_ocr(extractor) else extraction_pool
+        content = await run_blocking(pool.extract, extractor, upload)
+    observe_document(None, content.get('metadata'))
+    if content.get('error'):
+        count_document('unknown', 'error')
+        return ClassificationResponse(
+            filename=filename,
+            predicted_class="unknown",
+            confidence=0.0,
+            error=content['error']
+        )
+    
+    # Get prediction from the shared batcher
+    predicted_class, confidence = await batcher.submit(content['text'])
+    await run_blocking(result_cache.set, cache_key, {
+        "predicted_class": predicted_class,
+        "confidence": confidence
+    })
+    count_document(predicted_class, 'success')
+    
+    return ClassificationResponse(
+        filename=filename,
+        predicted_class=predicted_class,
+        confidence=confidence
+    )
+
+def render(body: BaseModel) -> JSONResponse:
+    """Encode a response body to JSON here, so the serialize stage times the real encoding."""
+    with stage_timer('serialize'):
+        return JSONResponse(body.model_dump())
+
 @app.post("/classify_file", response_model=ClassificationResponse)
 async def classify_file(
     file: UploadFile = File(...),
@@ -69,33 +319,20 @@ async def classify_file(
         ClassificationResponse containing the predicted class and confidence
     """
     try:
-        # Validate file format
-        if not pdf_extractor.supports_format(file.filename):
-            raise HTTPException(
-                status_code=400,
-                detail=f"Unsupported file format: {file.filename}"
-            )
-        
-        # Extract content
-        content = pdf_extractor.extract(file.file)
-        if content.get('error'):
-            return ClassificationResponse(
-                filename=file.filename,
-                predicted_class="unknown",
-                confidence=0.0,
-                error=content['error']
-            )
-        
-        # Get prediction
-        predicted_class, confidence = classifier.predict(content['text'])
-        
-        return ClassificationResponse(
-            filename=file.filename,
-            predicted_class=predicted_class,
-            confidence=confidence
-        )
+        async with admission.admit():
+            # Validate file size and format from its leading bytes
+            validate_upload(file)
+            
+            return render(await with_deadline(classify_upload(file)))
         
+    except Overloaded as e:
+        count_document('unknown', 'rejected')
+        raise overloaded_error(e)
+    except HTTPException as e:
+        count_document('unknown', 'error' if e.status_code >= 500 else 'rejected')
+        raise
     except Exception as e:
+        count_document('unknown', 'error')
         return ClassificationResponse(
             filename=file.filename,
             predicted_class="unknown",
@@ -103,5 +340,54 @@ async def classify_file(
             error=str(e)
         )
 
+@app.post("/classify_files", response_model=BatchClassificationResponse)
+async def classify_files(
+    files: List[UploadFile] = File(...),
+    api_key: str = Depends(verify_api_key)
+):
+    """
+    Classify many uploaded document files in one request.
+    
+    Files are extracted concurrently and classified through the shared
+    prediction batcher; files that fail are reported individually.
+    
+    Args:
+        files: The document files to classify
+        api_key: API key for authentication
+        
+    Returns:
+        BatchClassificationResponse with one result per file, in upload order
+    """
+    async def classify_or_reject(file: UploadFile) -> ClassificationResponse:
+        validate_upload(file)
+        return await classify_upload(file)
+    
+    try:
+        async with admission.admit(len(files)):
+            outcomes = await with_deadline(asyncio.gather(
+                *(classify_or_reject(file) for file in files),
+                return_exceptions=True
+            ))
+    except Overloaded as e:
+        count_document('unknown', 'rejected', len(files))
+        raise overloaded_error(e)
+    except HTTPException:
+        count_document('unknown', 'error', len(files))
+        raise
+    
+    results = []
+    for file, outcome in zip(files, outcomes):
+        if isinstance(outcome, Exception):
+            count_document('unknown', 'rejected' if isinstance(outcome, HTTPException) else 'error')
+            outcome = ClassificationResponse(
+                filename=file.filename,
+                predicted_class="unknown",
+                confidence=0.0,
+                error=outcome.detail if isinstance(outcome, HTTPException) else str(outcome)
+            )
+        results.append(outcome)
+    
+    return render(BatchClassificationResponse(results=results))
+
 if __name__ == "__main__":
     uvicorn.run("src.api:app", host="0.0.0.0", port=8000, reload=True) 
\ No newline at end of file
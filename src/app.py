@@ -1,17 +1,27 @@
 import os
 import sys
+import time
+from contextlib import ExitStack
 from pathlib import Path
 
 # Add the project root to Python path
 project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
-from flask import Flask, request, jsonify
-import docx
-from io import BytesIO
+from flask import Flask, Response, g, request, jsonify
+from werkzeug.exceptions import RequestEntityTooLarge
 import logging
 
-from src.model.classifier import DocumentClassifier
+from src.cache import ResultCache
+from src.extractor.pool import ExtractionPool
+from src.extractor.registry import OCR_FORMATS, default_registry, needs_ocr
+from src.extractor.sniff import (MAX_UPLOAD_BYTES, MULTIPART_OVERHEAD, detect_format, read_head,
+                                stream_size)
+from src.extractor.uploads import spool_upload
+from src.metrics import (count_document, observe_document, observe_request,
+                         register_stats, render_metrics, stage_timer)
+from src.model.classifier import DocumentClassifier, load_classifier
+from src.model.thumbnail import ThumbnailClassifier, upload_features
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
@@ -19,45 +29,161 @@ logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
-# Initialize classifier
-classifier = DocumentClassifier()
-
-# Load the classifier model
-MODEL_PATH = os.path.join(project_root, "models", "classifier.joblib")
-VECTORIZER_PATH = os.path.join(project_root, "models", "vectorizer.joblib")
-LABEL_ENCODER_PATH = os.path.join(project_root, "models", "label_encoder.joblib")
+# Size limits; bodies over the request limit are refused before they are read
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_MB", "100")) * 1024 * 1024
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
 
+# Load the classifier model, preferring the memory-mapped bundle when present
 try:
-    classifier.load(MODEL_PATH, VECTORIZER_PATH, LABEL_ENCODER_PATH)
+    classifier = load_classifier()
     logger.info("Classifier loaded successfully")
 except Exception as e:
     logger.error(f"Error loading classifier: {e}")
+    classifier = DocumentClassifier()
+
+# Optional image pre-classifier (THUMBNAIL_MODEL); confident predictions skip OCR
+try:
+    thumbnail_classifier = ThumbnailClassifier.from_env(os.path.join(project_root, "models", "thumbnail.npz"))
+except Exception as e:
+    logger.error(f"Error loading thumbnail classifier: {e}")
+    thumbnail_classifier = None
+
+# Shared extractors; only the leading pages needed for classification are parsed
+extractors = default_registry(
+    max_pages=int(os.getenv("EXTRACTION_MAX_PAGES", "20")) or None,
+    max_chars=int(os.getenv("EXTRACTION_MAX_CHARS", "100000")) or None
+)
+
+# Document parsing runs in worker processes, off the request thread; image
+# OCR gets its own pool (OCR_WORKERS, OCR_TIMEOUT, ...) as it is much slower
+extraction_pool = ExtractionPool.from_env()
+ocr_pool = ExtractionPool.from_env('OCR')
+
+# Results for previously seen uploads, keyed by content hash and model version
+result_cache = ResultCache.from_env()
+register_stats('result_cache', result_cache.stats)
 
 ALLOWED_EXTENSIONS = {'pdf', 'png', 'jpg', 'doc', 'docx'}
+ALLOWED_FORMATS = {'pdf', 'png', 'jpg', 'doc', 'docx'}
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
-def extract_text_from_docx(file_stream):
-    doc = docx.Document(BytesIO(file_stream.read()))
-    return '\n'.join([paragraph.text for paragraph in doc.paragraphs])
+def validate_upload(file):
+    """
+    Check an upload's size and real format without reading all of it.
+    
+    Returns an (error, status) tuple, or None if the upload is acceptable.
+    """
+    with stage_timer('sniff'):
+        if stream_size(file.stream) > MAX_UPLOAD_BYTES:
+            return f"File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)", 413
+
+        if detect_format(read_head(file.stream), file.filename) not in ALLOWED_FORMATS:
+            if allowed_file(file.filename):
+                return "File content does not match its type", 400
+            return "File type not allowed", 400
+
+    return None
+
+def result_cache_key(filename, upload):
+    """Key a cached result by upload content, file type and model version."""
+    extension = filename.rsplit('.', 1)[-1].lower()
+    return upload.key(extension, classifier.version or '')
 
-def extract_text(file):
+def prescreen(filename, upload):
+    """
+    Classify an image from its thumbnail alone, before any OCR.
+    
+    The untrusted image is decoded in an OCR worker, under that pool's
+    memory and time limits. Returns (file_class, confidence) when the
+    thumbnail classifier is confident enough, or None when the upload needs
+    full extraction.
+    """
+    if thumbnail_classifier is None or detect_format(upload.head, filename) not in OCR_FORMATS:
+        return None
+    with stage_timer('prescreen'):
+        try:
+            features = ocr_pool.run(upload_features, upload, thumbnail_classifier.size)
+        except Exception as e:
+            logger.warning(f"Thumbnail classification failed for {filename}: {e}")
+            return None
+        return thumbnail_classifier.predict_confident_features(features)
+
+def pool_for(extractor):
+    """OCR runs in its own pool so slow scans never hold up PDF and DOCX parsing."""
+    return ocr_pool if needs_ocr(extractor) else extraction_pool
+
+def extract_texts(uploads):
+    """
+    Extract text from (filename, SpooledUpload) pairs in parallel worker processes.
+    
+    Returns one entry per upload: the text, or the exception explaining why
+    extraction failed. Formats without an extractor (.doc, or images when
+    pytesseract is missing) yield "".
+    """
+    jobs = {}
+    texts = [""] * len(uploads)
+    for position, (filename, upload) in enumerate(uploads):
+        extractor = extractors.get(filename, upload.head)
+        if extractor is not None:
+            jobs.setdefault(pool_for(extractor), []).append((position, (extractor, upload)))
+
+    with stage_timer('extract'):
+        for pool, pool_jobs in jobs.items():
+            contents = pool.extract_many([job for _, job in pool_jobs])
+            for (position, _), content in zip(pool_jobs, contents):
+                observe_document(None, content['metadata'])
+                if content['error']:
+                    texts[position] = ValueError(content['error'])
+                else:
+                    texts[position] = content['text']
+    return texts
+
+def extract_text(filename, upload):
     """Extract text from various file types."""
-    if file.filename.lower().endswith('.docx'):
-        return extract_text_from_docx(file)
-    elif file.filename.lower().endswith('.pdf'):
-        # Use the text extraction from classifier
-        return file.read().decode('utf-8', errors='ignore')
-    else:
-        return ""
+    text = extract_texts([(filename, upload)])[0]
+    if isinstance(text, Exception):
+        raise text
+    return text
+
+# Request latency is recorded for the classification endpoints only
+TIMED_ENDPOINTS = {'classify_file_route': '/classify_file', 'classify_files_route': '/classify_files'}
+
+@app.before_request
+def start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request(response):
+    endpoint = TIMED_ENDPOINTS.get(request.endpoint)
+    if endpoint and 'request_start' in g:
+        observe_request(endpoint, response.status_code, time.perf_counter() - g.request_start)
+    return response
 
 @app.route('/')
 def health_check():
     return jsonify({"status": "healthy"}), 200
 
+@app.errorhandler(RequestEntityTooLarge)
+def request_too_large(e):
+    return jsonify({"error": "Request too large"}), 413
+
+@app.route('/stats')
+def stats():
+    return jsonify({"cache": result_cache.stats()}), 200
+
+@app.route('/metrics')
+def metrics():
+    payload, content_type = render_metrics()
+    return Response(payload, mimetype=content_type)
+
 @app.route('/classify_file', methods=['POST'])
 def classify_file_route():
+    # Refuse oversize bodies from their headers, before the upload is parsed
+    if request.content_length and request.content_length > MAX_UPLOAD_BYTES + MULTIPART_OVERHEAD:
+        return jsonify({"error": f"File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)"}), 413
+
     if 'file' not in request.files:
         return jsonify({"error": "No file part in the request"}), 400
 
@@ -65,27 +191,143 @@ def classify_file_route():
     if file.filename == '':
         return jsonify({"error": "No selected file"}), 400
 
-    if not allowed_file(file.filename):
-        return jsonify({"error": f"File type not allowed"}), 400
+    invalid = validate_upload(file)
+    if invalid:
+        error, status = invalid
+        count_document('unknown', 'rejected')
+        return jsonify({"error": error}), status
 
+    upload = None
     try:
-        # Extract text from file
-        text = extract_text(file)
-        
-        # Get classification
-        predicted_class, confidence = classifier.predict(text)
+        # The body is copied once, hashed on the way; large bodies go to disk
+        with stage_timer('read'):
+            upload = spool_upload(file.stream)
+        observe_document(upload.size)
+        # Re-submitted documents skip extraction and prediction
+        cache_key = result_cache_key(file.filename, upload)
+        cached = result_cache.get(cache_key)
+        if cached is not None:
+            count_document(cached['file_class'], 'cached')
+            return jsonify(cached), 200
+
+        # Images the thumbnail classifier is sure about skip OCR entirely
+        prediction = prescreen(file.filename, upload)
+        outcome = 'prescreened'
+        if prediction is None:
+            # Extract text from file in a worker process
+            text = extract_text(file.filename, upload)
+            
+            # Get classification
+            prediction = classifier.predict(text)
+            outcome = 'success'
+        predicted_class, confidence = prediction
         
-        return jsonify({
+        result = {
             "file_class": predicted_class,
             "confidence": confidence
-        }), 200
+        }
+        result_cache.set(cache_key, result)
+        count_document(predicted_class, outcome)
+        with stage_timer('serialize'):
+            response = jsonify(result)
+        return response, 200
     except Exception as e:
         logger.error(f"Classification error: {e}")
+        count_document('unknown', 'error')
         return jsonify({"error": str(e)}), 500
+    finally:
+        if upload is not None:
+            upload.close()
+
+@app.route('/classify_files', methods=['POST'])
+def classify_files_route():
+    files = request.files.getlist('files')
+    if not files:
+        return jsonify({"error": "No files part in the request"}), 400
+
+    results = []
+    uploads = []
+    pending = []
+    cache_keys = []
+    # Every spooled upload is deleted on the way out, even if a later file fails
+    with ExitStack() as spooled:
+        for file in files:
+            if file.filename == '':
+                results.append({"filename": file.filename, "error": "No selected file"})
+                count_document('unknown', 'rejected')
+                continue
+
+            invalid = validate_upload(file)
+            if invalid:
+                results.append({"filename": file.filename, "error": invalid[0]})
+                count_document('unknown', 'rejected')
+                continue
+
+            with stage_timer('read'):
+                upload = spooled.enter_context(spool_upload(file.stream))
+            observe_document(upload.size)
+            cache_key = result_cache_key(file.filename, upload)
+            cached = result_cache.get(cache_key)
+            if cached is not None:
+                upload.close()
+                results.append({"filename": file.filename, **cached})
+                count_document(cached['file_class'], 'cached')
+                continue
+
+            prediction = prescreen(file.filename, upload)
+            if prediction is not None:
+                upload.close()
+                result = {"file_class": prediction[0], "confidence": prediction[1]}
+                result_cache.set(cache_key, result)
+                results.append({"filename": file.filename, **result})
+                count_document(prediction[0], 'prescreened')
+                continue
+
+            uploads.append((file.filename, upload))
+            pending.append(len(results))
+            cache_keys.append(cache_key)
+            results.append({"filename": file.filename})
+
+        # Extract every document in parallel across the worker processes
+        extracted_texts = extract_texts(uploads)
+
+    texts = []
+    extracted = []
+    for index, cache_key, text in zip(pending, cache_keys, extracted_texts):
+        if isinstance(text, Exception):
+            logger.error(f"Extraction error for {results[index]['filename']}: {text}")
+            results[index]["error"] = str(text)
+            count_document('unknown', 'error')
+            continue
+        texts.append(text)
+        extracted.append((index, cache_key))
+
+    try:
+        # Classify every extracted document in a single model call
+        predictions = classifier.predict_batch(texts)
+    except Exception as e:
+        logger.error(f"Classification error: {e}")
+        count_document('unknown', 'error', len(texts))
+        return jsonify({"error": str(e)}), 500
+
+    for (index, cache_key), (predicted_class, confidence) in zip(extracted, predictions):
+        result = {"file_class": predicted_class, "confidence": confidence}
+        result_cache.set(cache_key, result)
+        results[index].update(result)
+        count_document(predicted_class, 'success')
+
+    with stage_timer('serialize'):
+        response = jsonify({"results": results})
+    return response, 200
 
 if __name__ == '__main__':
     try:
         logger.info("Starting the server...")
+        # Start the workers before the first request, but only in the serving
+        # process, not in the debug reloader's parent that only watches files
+        if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+            extraction_pool.warm()
+            ocr_pool.warm()
         app.run(debug=True, port=8000)
     except Exception as e:
         logger.critical(f"Failed to start server: {str(e)}")
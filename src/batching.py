@@ -0,0 +1,142 @@
+import asyncio
+import logging
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+class MicroBatcher:
+    """
+    Groups concurrent single-item requests into batches.
+
+    Callers ``await submit(item)``; a background task collects queued items
+    until either ``max_batch_size`` items are waiting or ``max_wait_ms`` has
+    passed since the first one arrived, then runs ``batch_fn`` once for the
+    whole batch in an executor so the event loop is never blocked.
+    """
+
+    def __init__(self,
+                 batch_fn: Callable[[List[Any]], Sequence[Any]],
+                 max_batch_size: int = 32,
+                 max_wait_ms: float = 5.0,
+                 executor: Optional[Executor] = None):
+        """
+        Initialize the batcher.
+
+        Args:
+            batch_fn: Function mapping a list of items to a list of results
+            max_batch_size: Largest number of items passed to ``batch_fn``
+            max_wait_ms: Longest time the first queued item waits for company
+            executor: Executor to run ``batch_fn`` in (default loop executor)
+        """
+        if max_batch_size < 1:
+            raise ValueError("max_batch_size must be at least 1")
+        if max_wait_ms < 0:
+            raise ValueError("max_wait_ms must not be negative")
+
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self.executor = executor
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+
+        # Histogram buckets are powers of two up to max_batch_size
+        self._buckets = []
+        bound = 1
+        while bound < max_batch_size:
+            self._buckets.append(bound)
+            bound *= 2
+        self._buckets.append(max_batch_size)
+        self._histogram = {bound: 0 for bound in self._buckets}
+        self._batches = 0
+        self._items = 0
+
+    async def submit(self, item: Any) -> Any:
+        """
+        Queue an item and wait for its result.
+
+        Args:
+            item: Input passed to ``batch_fn`` as part of a batch
+
+        Returns:
+            The result ``batch_fn`` produced for this item
+        """
+        self._ensure_worker()
+        future = self._loop.create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    def _ensure_worker(self):
+        """Start the collector task on the running event loop if needed."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        """Collect queued items into batches and dispatch them."""
+        while True:
+            batch = [await self._queue.get()]
+            deadline = self._loop.time() + self.max_wait_ms / 1000.0
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - self._loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            await self._dispatch(batch)
+
+    async def _dispatch(self, batch: List[tuple]):
+        """Run ``batch_fn`` off the event loop and resolve the waiting futures."""
+        items = [item for item, _ in batch]
+        self._record(len(items))
+        try:
+            results = await self._loop.run_in_executor(self.executor, self.batch_fn, items)
+            if len(results) != len(items):
+                raise RuntimeError(
+                    f"Batch function returned {len(results)} results for {len(items)} items"
+                )
+        except Exception as e:
+            logger.error(f"Batch of {len(items)} failed: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _record(self, size: int):
+        """Update batch-size statistics."""
+        self._batches += 1
+        self._items += size
+        for bound in self._buckets:
+            if size <= bound:
+                self._histogram[bound] += 1
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Get a snapshot of batcher statistics.
+
+        Returns:
+            Dict containing:
+                - queue_depth: int, Items currently waiting to be batched
+                - batches: int, Number of batches dispatched
+                - items: int, Number of items dispatched
+                - batch_size_histogram: Dict[int, int], Batch counts keyed by
+                  the upper bound of each size bucket
+        """
+        return {
+            'queue_depth': self._queue.qsize() if self._queue is not None else 0,
+            'batches': self._batches,
+            'items': self._items,
+            'batch_size_histogram': dict(self._histogram),
+        }
@@ -0,0 +1,342 @@
+import hashlib
+import io
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+def content_key(data: bytes, *parts: str) -> str:
+    """
+    Build a cache key from raw content and any qualifying strings.
+
+    Args:
+        data: Raw document bytes
+        parts: Extra key components such as a model or extractor version
+
+    Returns:
+        Hex SHA-256 digest identifying the content and its context
+    """
+    digest = hashlib.sha256(data)
+    for part in parts:
+        digest.update(b'\0')
+        digest.update(str(part).encode('utf-8'))
+    return digest.hexdigest()
+
+def file_content_key(path: str, *parts: str, block_size: int = 1 << 20) -> str:
+    """
+    Build the same key as ``content_key`` for a file, reading it in blocks.
+
+    Args:
+        path: File to hash
+        parts: Extra key components such as an extractor fingerprint
+        block_size: Bytes read at a time
+
+    Returns:
+        Hex SHA-256 digest identifying the content and its context
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    for part in parts:
+        digest.update(b'\0')
+        digest.update(str(part).encode('utf-8'))
+    return digest.hexdigest()
+
+class LRUCache:
+    """Thread-safe in-process LRU cache with optional time-to-live."""
+
+    def __init__(self, max_size: int = 1024, ttl: Optional[float] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of entries kept before evicting the oldest
+            ttl: Seconds an entry stays valid, or None to keep entries forever
+        """
+        if max_size < 1:
+            raise ValueError("max_size must be at least 1")
+        self.max_size = max_size
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value for key, or None if absent or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, expires = entry
+                if expires is None or expires > time.monotonic():
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: str, value: Any):
+        """Store a value, evicting the least recently used entry if full."""
+        expires = time.monotonic() + self.ttl if self.ttl else None
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Remove every entry."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss/eviction counters and the current size."""
+        return {
+            'size': len(self._data),
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+        }
+
+class SQLiteStore:
+    """
+    Persistent key/value store backed by SQLite.
+
+    Values are stored as JSON. The database runs in WAL mode so several
+    processes (e.g. gunicorn workers) can share one file safely.
+    """
+
+    def __init__(self, path: str, table: str = 'cache', ttl: Optional[float] = None):
+        """
+        Initialize the store, creating the database file if needed.
+
+        Args:
+            path: Path to the SQLite database file
+            table: Table name, allowing several stores to share one file
+            ttl: Seconds an entry stays valid, or None to keep entries forever
+        """
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        self.path = path
+        self.table = table
+        self.ttl = ttl
+        self._local = threading.local()
+        self.hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        conn = self._connection()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} "
+            "(key TEXT PRIMARY KEY, value TEXT NOT NULL, created REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the stored value for key, or None if absent or expired."""
+        row = self._connection().execute(
+            f"SELECT value, created FROM {self.table} WHERE key = ?", (key,)
+        ).fetchone()
+        if row is not None and (not self.ttl or row[1] + self.ttl > time.time()):
+            self.hits += 1
+            return json.loads(row[0])
+        self.misses += 1
+        return None
+
+    def set(self, key: str, value: Any):
+        """Store a JSON-serializable value."""
+        conn = self._connection()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, created) VALUES (?, ?, ?)",
+            (key, json.dumps(value), time.time())
+        )
+        conn.commit()
+
+    def purge_expired(self) -> int:
+        """Delete expired entries and return how many were removed."""
+        if not self.ttl:
+            return 0
+        conn = self._connection()
+        cursor = conn.execute(
+            f"DELETE FROM {self.table} WHERE created <= ?", (time.time() - self.ttl,)
+        )
+        conn.commit()
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and the number of stored entries."""
+        size = self._connection().execute(
+            f"SELECT COUNT(*) FROM {self.table}"
+        ).fetchone()[0]
+        return {'size': size, 'hits': self.hits, 'misses': self.misses}
+
+class ResultCache:
+    """
+    Two-tier cache for classification results.
+
+    Lookups go to an in-process LRU first and then, if configured, to a
+    shared SQLite file; disk hits are promoted into memory. A ``max_size``
+    of 0 disables caching entirely.
+    """
+
+    def __init__(self,
+                 max_size: int = 1024,
+                 ttl: Optional[float] = None,
+                 db_path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            max_size: Maximum number of results held in memory, or 0 to disable
+            ttl: Seconds a result stays valid, or None to keep results forever
+            db_path: Optional SQLite file for a persistent, shared tier
+        """
+        self.enabled = max_size > 0
+        self.memory = LRUCache(max_size=max(max_size, 1), ttl=ttl)
+        self.disk = None
+        if db_path and self.enabled:
+            self.disk = SQLiteStore(db_path, table='results', ttl=ttl)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached result for key, or None."""
+        if not self.enabled:
+            return None
+        value = self.memory.get(key)
+        if value is None and self.disk is not None:
+            try:
+                value = self.disk.get(key)
+            except sqlite3.Error as e:
+                logger.error(f"Result cache read failed: {e}")
+                value = None
+            if value is not None:
+                self.memory.set(key, value)
+        return value
+
+    def set(self, key: str, value: Dict[str, Any]):
+        """Store a result in every tier."""
+        if not self.enabled:
+            return
+        self.memory.set(key, value)
+        if self.disk is not None:
+            try:
+                self.disk.set(key, value)
+            except sqlite3.Error as e:
+                logger.error(f"Result cache write failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Get counters for each tier."""
+        stats = {'memory': self.memory.stats()}
+        if self.disk is not None:
+            stats['disk'] = self.disk.stats()
+        return stats
+
+    @classmethod
+    def from_env(cls, prefix: str = 'RESULT_CACHE') -> 'ResultCache':
+        """
+        Build a cache from ``<prefix>_SIZE``, ``<prefix>_TTL`` and
+        ``<prefix>_DB`` environment variables. A size of 0 disables the
+        cache and a TTL of 0 disables expiry.
+        """
+        ttl = float(os.getenv(f"{prefix}_TTL", "3600")) or None
+        return cls(
+            max_size=int(os.getenv(f"{prefix}_SIZE", "1024")),
+            ttl=ttl,
+            db_path=os.getenv(f"{prefix}_DB") or None
+        )
+
+class ExtractionCache:
+    """
+    Persistent cache of extracted document content.
+
+    Entries are keyed by the document's SHA-256 and the extractor's
+    fingerprint, so a changed extractor version or setting misses instead
+    of returning stale text. Training, evaluation and benchmark runs share
+    one SQLite file and only parse documents they have not seen before.
+    Failed extractions are not cached.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the cache.
+
+        Args:
+            db_path: SQLite file holding the extractions
+        """
+        self.store = SQLiteStore(db_path, table='extractions')
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached extraction for key, or None."""
+        try:
+            return self.store.get(key)
+        except sqlite3.Error as e:
+            logger.error(f"Extraction cache read failed: {e}")
+            return None
+
+    def set(self, key: str, content: Dict[str, Any]):
+        """Store an extraction result unless it failed."""
+        if content.get('error'):
+            return
+        try:
+            self.store.set(key, content)
+        except sqlite3.Error as e:
+            logger.error(f"Extraction cache write failed: {e}")
+
+    def extract(self, extractor: Any, data: bytes) -> Dict[str, Any]:
+        """
+        Extract raw document bytes, using the cached result when present.
+
+        Args:
+            extractor: A BaseExtractor
+            data: Raw document bytes
+
+        Returns:
+            The extractor's result dict
+        """
+        key = content_key(data, extractor.fingerprint())
+        content = self.get(key)
+        if content is None:
+            content = extractor.extract(io.BytesIO(data))
+            self.set(key, content)
+        return content
+
+    def stats(self) -> Dict[str, int]:
+        """Get hit/miss counters and the number of stored extractions."""
+        return self.store.stats()
+
+    @classmethod
+    def from_env(cls, default: Optional[str] = None) -> Optional['ExtractionCache']:
+        """
+        Build a cache from the ``EXTRACTION_CACHE_DB`` environment variable.
+
+        Args:
+            default: Path used when the variable is unset
+
+        Returns:
+            The cache, or None if no path is configured or it is set to empty
+        """
+        path = os.getenv("EXTRACTION_CACHE_DB", default)
+        return cls(path) if path else None
@@ -0,0 +1,192 @@
+import logging
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from .metrics import count_cascade_decision, tier_timer
+
+logger = logging.getLogger(__name__)
+
+# Classifies a batch of documents from their (filenames, texts)
+TierFn = Callable[[Sequence[str], Sequence[str]], List[Tuple[str, float]]]
+
+class CascadeTier:
+    """A classifier in a cascade, and the confidence at which its answer is final."""
+
+    def __init__(self, name: str, classify: TierFn, threshold: float):
+        """
+        Initialize the tier.
+
+        Args:
+            name: Name recorded for the documents this tier decides
+            classify: Function from (filenames, texts) to one (label, confidence) per document
+            threshold: Smallest confidence accepted without escalating
+        """
+        self.name = name
+        self.classify = classify
+        self.threshold = threshold
+
+class ClassificationCascade:
+    """
+    Runs classifiers from cheapest to most expensive.
+
+    Each tier sees only the documents that earlier tiers were not confident
+    about, as one batch. A document is decided by the first tier whose
+    confidence reaches that tier's threshold; if none does, the most
+    confident known label from any tier is used and the result is marked
+    as not confident. A tier that fails passes its documents on.
+    """
+
+    def __init__(self, tiers: Sequence[CascadeTier]):
+        """
+        Initialize the cascade.
+
+        Args:
+            tiers: Tiers in the order they run, cheapest first
+        """
+        if not tiers:
+            raise ValueError("Need at least one tier")
+        names = [tier.name for tier in tiers]
+        if len(set(names)) != len(names):
+            raise ValueError("Tier names must be unique")
+        self.tiers = list(tiers)
+        self.decisions = {name: 0 for name in names}
+        self.unconfident = 0
+
+    @classmethod
+    def from_spec(cls, spec: str, available: Mapping[str, TierFn]) -> 'ClassificationCascade':
+        """
+        Build a cascade from a spec such as ``"filename:1.0,tfidf:0.8,zero_shot:0.7"``.
+
+        Args:
+            spec: Comma-separated ``name:threshold`` pairs, in running order
+            available: Tier functions by name
+
+        Returns:
+            The cascade; names missing from ``available`` are skipped with a warning
+        """
+        tiers = []
+        for name, threshold in parse_tiers(spec):
+            if name not in available:
+                logger.warning(f"Cascade tier {name} is not available; skipping it")
+                continue
+            tiers.append(CascadeTier(name, available[name], threshold))
+        return cls(tiers)
+
+    def classify_batch(self, filenames: Sequence[str], texts: Sequence[str]) -> List[Dict[str, Any]]:
+        """
+        Classify documents, escalating only the uncertain ones.
+
+        Args:
+            filenames: Name of each document
+            texts: Extracted text of each document
+
+        Returns:
+            One dict per document with ``label``, ``confidence``, the deciding
+            ``tier`` (None if no tier had an answer), ``confident`` and the
+            ``predictions`` of every tier that ran
+        """
+        if len(filenames) != len(texts):
+            raise ValueError("Need one text per filename")
+        results = [{'label': 'unknown', 'confidence': 0.0, 'tier': None, 'confident': False,
+                    'predictions': {}} for _ in texts]
+
+        pending = list(range(len(texts)))
+        for tier in self.tiers:
+            if not pending:
+                break
+            try:
+                with tier_timer(tier.name):
+                    predictions = tier.classify([filenames[i] for i in pending], [texts[i] for i in pending])
+            except Exception as e:
+                logger.error(f"Cascade tier {tier.name} failed: {e}")
+                predictions = [("unknown", 0.0)] * len(pending)
+
+            escalated = []
+            for i, (label, confidence) in zip(pending, predictions):
+                results[i]['predictions'][tier.name] = (label, confidence)
+                if label != "unknown" and confidence >= tier.threshold:
+                    results[i].update(label=label, confidence=confidence, tier=tier.name, confident=True)
+                    self.decisions[tier.name] += 1
+                    count_cascade_decision(tier.name, True)
+                else:
+                    escalated.append(i)
+            pending = escalated
+
+        for i in pending:
+            # No tier was sure: fall back to the most confident known label
+            known = [(confidence, name, label)
+                     for name, (label, confidence) in results[i]['predictions'].items()
+                     if label != "unknown"]
+            if known:
+                confidence, name, label = max(known)
+                results[i].update(label=label, confidence=confidence, tier=name)
+            self.unconfident += 1
+            count_cascade_decision(results[i]['tier'] or 'none', False)
+        return results
+
+    def classify(self, filename: str, text: str) -> Dict[str, Any]:
+        """Classify one document; see ``classify_batch``."""
+        return self.classify_batch([filename], [text])[0]
+
+    def stats(self) -> Dict[str, int]:
+        """Get how many documents each tier decided, and how many none was sure of."""
+        return {**self.decisions, 'unconfident': self.unconfident}
+
+def parse_tiers(spec: str) -> List[Tuple[str, float]]:
+    """
+    Parse a ``name:threshold`` list.
+
+    Args:
+        spec: E.g. ``"filename:1.0,tfidf:0.8"``
+
+    Returns:
+        List of (name, threshold) pairs, in order
+    """
+    tiers = []
+    for part in spec.split(','):
+        if not part.strip():
+            continue
+        name, sep, threshold = part.partition(':')
+        if not sep:
+            raise ValueError(f"Cascade tier needs a threshold: {part.strip()}")
+        tiers.append((name.strip(), float(threshold)))
+    return tiers
+
+def filename_tier(classify_filename: Callable[[str], str], confidence: float = 0.6) -> TierFn:
+    """
+    Wrap a filename-to-label function as a tier function.
+
+    Args:
+        classify_filename: Returns a label, or "unknown", for a filename
+        confidence: Confidence reported for a recognised filename
+
+    Returns:
+        Tier function
+    """
+    def classify(filenames: Sequence[str], texts: Sequence[str]) -> List[Tuple[str, float]]:
+        labels = [classify_filename(filename) for filename in filenames]
+        return [(label, 0.0 if label == "unknown" else confidence) for label in labels]
+    return classify
+
+def model_tier(model, labels: Optional[Mapping[str, str]] = None) -> TierFn:
+    """
+    Wrap a model with ``predict_batch(texts)`` as a tier function.
+
+    Documents without text are not sent to the model.
+
+    Args:
+        model: E.g. a DocumentClassifier or KNNClassifier
+        labels: Renames the model's labels to the cascade's
+
+    Returns:
+        Tier function
+    """
+    labels = labels or {}
+
+    def classify(filenames: Sequence[str], texts: Sequence[str]) -> List[Tuple[str, float]]:
+        results = [("unknown", 0.0)] * len(texts)
+        present = [i for i, text in enumerate(texts) if text.strip()]
+        predictions = model.predict_batch([texts[i] for i in present]) if present else []
+        for i, (label, confidence) in zip(present, predictions):
+            results[i] = (labels.get(label, label), confidence)
+        return results
+    return classify
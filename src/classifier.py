@@ -1,17 +1,17 @@
 import os
 import logging
-from typing import BinaryIO, Dict, List, Tuple, Optional
-import fitz  # PyMuPDF for PDF processing
-import pytesseract
-from PIL import Image
-import io
-from transformers import pipeline
-import numpy as np
+from typing import Dict, List, Tuple
 from werkzeug.datastructures import FileStorage
-from functools import lru_cache
-from langdetect import detect
-import asyncio
-from concurrent.futures import ThreadPoolExecutor
+
+from src.batching import MicroBatcher
+from src.cascade import ClassificationCascade, filename_tier, model_tier
+from src.extractor.pool import ExtractionPool
+from src.extractor.registry import default_registry, needs_ocr
+from src.extractor.sniff import MAX_UPLOAD_BYTES, detect_format, read_head, stream_size
+from src.extractor.uploads import spool_upload
+from src.language import LanguageDetector
+from src.model.classifier import DEFAULT_MODELS_DIR, load_classifier
+from src.zero_shot import ZeroShotEngine
 
 # Configure logging
 logging.basicConfig(
@@ -20,6 +20,18 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Text budget for classification; later pages are never parsed
+MAX_TEXT_CHARS = int(os.getenv("EXTRACTION_MAX_CHARS", "100000")) or None
+MAX_TEXT_PAGES = int(os.getenv("EXTRACTION_MAX_PAGES", "20")) or None
+
+# Classifiers tried in order, cheapest first, each with the confidence at
+# which its answer is final; unsure documents escalate to the next one
+CASCADE_TIERS = os.getenv("CASCADE_TIERS", "filename:1.0,tfidf:0.8,zero_shot:0.7")
+
+# Documents from concurrent requests are classified together
+BATCH_MAX_SIZE = int(os.getenv("BATCH_MAX_SIZE", "32"))
+BATCH_MAX_WAIT_MS = float(os.getenv("BATCH_MAX_WAIT_MS", "5"))
+
 class ClassificationError(Exception):
     """Base exception for classification errors"""
     pass
@@ -38,99 +50,109 @@ class FileValidationError(ClassificationError):
 
 class DocumentClassifier:
     def __init__(self):
-        self.executor = ThreadPoolExecutor(max_workers=3)  # For async processing
-        self._initialize_classifier()
-        
+        self.extractors = default_registry(max_pages=MAX_TEXT_PAGES, max_chars=MAX_TEXT_CHARS)
+        self.extraction_pool = ExtractionPool.from_env()  # PDF parsing off the GIL
+        self.ocr_pool = ExtractionPool.from_env('OCR')  # Image OCR, kept apart from parsing
+        # The committed profile is found relative to the package, not the working directory
+        self.language_detector = LanguageDetector.from_env(
+            os.path.join(DEFAULT_MODELS_DIR, "language_profiles.npz"))
+        if self.language_detector is None:
+            logger.warning("Language profiles not found; language gating is disabled")
+
         # Define document types
         self.document_types = {
             "drivers_licence": "an identification document with personal details",
             "bank_statement": "a document showing bank transactions and balance",
             "invoice": "a document requesting payment for goods or services"
         }
+        self._initialize_classifier()
+        self.cascade = self._build_cascade()
+        self.batcher = MicroBatcher(
+            self._classify_batch,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS
+        )
 
     def _initialize_classifier(self):
         """Initialize the classifier with error handling"""
         try:
-            self.classifier = pipeline("zero-shot-classification", 
-                                    model="facebook/bart-large-mnli",
-                                    device=-1)  # Use CPU for inference
+            self.classifier = ZeroShotEngine.from_env(list(self.document_types.keys()))
             logger.info("Classifier initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize classifier: {str(e)}")
             raise
 
+    def _build_cascade(self) -> ClassificationCascade:
+        """Set up the classification tiers named in CASCADE_TIERS"""
+        tiers = {
+            'filename': filename_tier(self._classify_by_filename),
+            'zero_shot': self._classify_zero_shot,
+        }
+        try:
+            # The TF-IDF model says drivers_license where this interface says drivers_licence
+            tiers['tfidf'] = model_tier(load_classifier(), labels={'drivers_license': 'drivers_licence'})
+        except Exception as e:
+            logger.warning(f"TF-IDF model unavailable, classifying without it: {str(e)}")
+        return ClassificationCascade.from_spec(CASCADE_TIERS, tiers)
+
+    def _classify_zero_shot(self, filenames: List[str], texts: List[str]) -> List[Tuple[str, float]]:
+        """Zero-shot classify texts, all labels of a batch in one NLI pass"""
+        return self.classifier.classify_batch(texts)
+
+    def _classify_batch(self, documents: List[Tuple[str, str]]) -> List[Dict]:
+        """Run the cascade over (filename, text) pairs gathered by the batcher"""
+        return self.cascade.classify_batch([name for name, _ in documents], [text for _, text in documents])
+
     def validate_file(self, file: FileStorage) -> None:
         """Validate file before processing"""
         if not file or not file.filename:
             raise FileValidationError("No file provided")
 
-        # Check file size (10MB limit)
-        file.seek(0, 2)
-        size = file.tell()
-        file.seek(0)
-        if size > 10 * 1024 * 1024:
-            raise FileValidationError("File too large (max 10MB)")
+        # Check file size (MAX_UPLOAD_MB limit)
+        size = stream_size(file.stream)
+        if size > MAX_UPLOAD_BYTES:
+            raise FileValidationError(f"File too large (max {MAX_UPLOAD_BYTES // (1024 * 1024)}MB)")
         if size == 0:
             raise EmptyFileError("File is empty")
 
-        # Validate file type
-        allowed_extensions = {'.pdf', '.jpg', '.jpeg', '.png'}
-        ext = '.' + file.filename.lower().split('.')[-1] if '.' in file.filename else ''
-        if ext not in allowed_extensions:
-            raise FileValidationError(f"Unsupported file type. Allowed: {allowed_extensions}")
+        # Validate file type from its content rather than its name
+        allowed_formats = {'pdf', 'jpg', 'png'}
+        if detect_format(read_head(file.stream), file.filename) not in allowed_formats:
+            raise FileValidationError(f"Unsupported file type. Allowed: {allowed_formats}")
 
     def detect_language(self, text: str) -> str:
-        """Detect text language"""
-        try:
-            if not text.strip():
-                return "unknown"
-            return detect(text)
-        except:
+        """Detect text language from a bounded sample of it"""
+        if self.language_detector is None or not text.strip():
             return "unknown"
+        return self.language_detector.detect(text)
 
     async def extract_text(self, file: FileStorage) -> str:
         """Extract text from file asynchronously"""
         try:
-            file_bytes = file.read()
-            file.seek(0)
-
-            if file.filename.lower().endswith('.pdf'):
-                # Run PDF extraction in thread pool
-                loop = asyncio.get_event_loop()
-                text = await loop.run_in_executor(
-                    self.executor,
-                    self._extract_pdf_text,
-                    file_bytes
-                )
-                return text
-            else:
-                # Skip image processing for now
-                return ""
+            # Copied once; large uploads are spooled to disk and read by the worker
+            with spool_upload(file.stream) as upload:
+                extractor = self.extractors.get(file.filename, upload.head)
+                if extractor is not None:
+                    # Run extraction (or OCR, for images) in a worker process
+                    pool = self.ocr_pool if needs_ocr(extractor) else self.extraction_pool
+                    content = await pool.extract_async(extractor, upload)
+                    if content['error']:
+                        logger.error(f"Extraction failed: {content['error']}")
+                        return ""
+                    return content['text']
+                else:
+                    # No extractor for this format (e.g. pytesseract missing for images)
+                    return ""
         except Exception as e:
             logger.error(f"Text extraction failed: {str(e)}")
             raise ClassificationError(f"Text extraction failed: {str(e)}")
 
-    def _extract_pdf_text(self, file_bytes: bytes) -> str:
-        """Extract text from PDF"""
-        try:
-            doc = fitz.open(stream=file_bytes, filetype="pdf")
-            text = ""
-            for page in doc:
-                text += page.get_text()
-            return text[:100000]  # Limit text length
-        except Exception as e:
-            logger.error(f"PDF extraction failed: {str(e)}")
-            return ""
-
     async def classify_file(self, file: FileStorage) -> Dict:
         """Classify a file with comprehensive error handling"""
         try:
             # Validate file
             self.validate_file(file)
             
-            # First try filename-based classification
-            filename_class = self._classify_by_filename(file.filename.lower())
-            
             # Extract and classify content
             text = await self.extract_text(file)
             
@@ -142,32 +164,19 @@ class DocumentClassifier:
                         "Heron Classifier only supports English at this time"
                     )
 
-            # Classify content if we have text
-            content_class, confidence = "unknown", 0.0
-            if text.strip():
-                try:
-                    result = self.classifier(
-                        text[:1024],
-                        list(self.document_types.keys()),
-                        hypothesis_template="This text is from {}."
-                    )
-                    content_class = result['labels'][0]
-                    confidence = result['scores'][0]
-                except Exception as e:
-                    logger.error(f"Classification failed: {str(e)}")
-                    # Fall back to filename classification
-                    content_class = "unknown"
-                    confidence = 0.0
-
-            # Use content-based classification if confident
-            final_class = content_class if confidence > 0.7 else filename_class
+            # Batched with concurrent requests; cheapest classifier first, and BART
+            # only runs on the documents the faster tiers are unsure about
+            decision = await self.batcher.submit((file.filename.lower(), text))
+            predictions = decision['predictions']
+            content_classes = [label for tier, (label, _) in predictions.items() if tier != 'filename']
 
             return {
-                "classification": final_class,
-                "confidence": confidence,
-                "method": "content" if confidence > 0.7 else "filename",
-                "filename_classification": filename_class,
-                "content_classification": content_class
+                "classification": decision['label'],
+                "confidence": decision['confidence'],
+                "method": decision['tier'] or "none",
+                "confident": decision['confident'],
+                "filename_classification": predictions.get('filename', ("unknown", 0.0))[0],
+                "content_classification": content_classes[-1] if content_classes else "unknown"
             }
 
         except UnsupportedLanguageError as e:
@@ -0,0 +1,248 @@
+"""
+Offline batch classification without the HTTP services.
+
+Loads the classifier and extractors in-process, extracts documents in an
+ExtractionPool and classifies them with one ``predict_batch`` call per
+batch. Results stream to JSON Lines or CSV with per-file timings.
+
+Usage:
+    python -m src.cli files/ --output results.jsonl
+    classify-documents --file-list paths.txt --format csv > results.csv
+"""
+
+import argparse
+import csv
+import itertools
+import json
+import logging
+import os
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+
+from .extractor.base import BaseExtractor
+from .extractor.pool import ExtractionPool
+from .extractor.registry import ExtractorRegistry, default_registry
+from .extractor.sniff import SNIFF_BYTES
+from .model.classifier import DEFAULT_MODELS_DIR, DocumentClassifier, load_classifier
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ('path', 'file_class', 'confidence', 'error', 'extract_ms', 'predict_ms')
+
+def iter_paths(targets: Iterable[str], recursive: bool = True) -> Iterator[str]:
+    """
+    Expand files and directories into file paths.
+
+    Args:
+        targets: File or directory paths
+        recursive: Descend into subdirectories
+
+    Returns:
+        Iterator over file paths; hidden files are skipped
+    """
+    for target in targets:
+        if not os.path.isdir(target):
+            yield target
+            continue
+        for dirpath, dirnames, filenames in os.walk(target):
+            dirnames[:] = sorted(name for name in dirnames if not name.startswith('.')) if recursive else []
+            for filename in sorted(filenames):
+                if not filename.startswith('.'):
+                    yield os.path.join(dirpath, filename)
+
+def read_file_list(path: str) -> Iterator[str]:
+    """Yield the non-empty lines of a file list, or of stdin for '-'."""
+    f = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        for line in f:
+            if line.strip():
+                yield line.strip()
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+def _extract_timed(extractor: BaseExtractor, path: str) -> Tuple[Dict[str, Any], float]:
+    """Extract a file inside a worker and time it there, excluding queueing."""
+    start = time.perf_counter()
+    content = extractor.extract_file(path)
+    return content, time.perf_counter() - start
+
+class OfflineClassifier:
+    """Classifies local files in batches, in-process."""
+
+    def __init__(self,
+                 classifier: DocumentClassifier,
+                 registry: Optional[ExtractorRegistry] = None,
+                 pool: Optional[ExtractionPool] = None,
+                 batch_size: int = 64):
+        """
+        Initialize the batch classifier.
+
+        Args:
+            classifier: Loaded classifier
+            registry: Extractors; the default registry by default
+            pool: Extraction pool; one sized to the CPU count by default
+            batch_size: Documents classified per predict_batch call
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        self.classifier = classifier
+        self.registry = registry or default_registry()
+        self.pool = pool or ExtractionPool()
+        self.batch_size = batch_size
+
+    def _extract(self, paths: List[str]) -> List[Dict[str, Any]]:
+        """Extract a batch of files, returning one partial record per path."""
+        records = []
+        jobs = []
+        pending = []
+        for path in paths:
+            record = {'path': path, 'file_class': None, 'confidence': 0.0, 'error': None,
+                      'extract_ms': 0.0, 'predict_ms': 0.0}
+            records.append(record)
+            try:
+                with open(path, 'rb') as f:
+                    extractor = self.registry.get(path, f.read(SNIFF_BYTES))
+            except OSError as e:
+                record['error'] = str(e)
+                continue
+            if extractor is None:
+                record['error'] = "Unsupported file type"
+                continue
+            jobs.append((extractor, path))
+            pending.append(record)
+
+        outcomes = self.pool.run_many(_extract_timed, jobs)
+
+        for record, outcome in zip(pending, outcomes):
+            if isinstance(outcome, Exception):
+                record['error'] = str(outcome) or type(outcome).__name__
+                continue
+            content, seconds = outcome
+            record['extract_ms'] = round(seconds * 1000, 3)
+            if content['error']:
+                record['error'] = content['error']
+            else:
+                record['text'] = content['text']
+        return records
+
+    def classify_batch(self, paths: List[str]) -> List[Dict[str, Any]]:
+        """
+        Extract and classify a batch of files.
+
+        The prediction time of the batch is shared equally between its
+        documents in ``predict_ms``.
+
+        Args:
+            paths: Files to classify
+
+        Returns:
+            One record per path with the FIELDS keys
+        """
+        records = self._extract(paths)
+        ready = [record for record in records if 'text' in record]
+        if ready:
+            start = time.perf_counter()
+            try:
+                predictions = self.classifier.predict_batch([record.pop('text') for record in ready])
+            except Exception as e:
+                for record in ready:
+                    record['error'] = str(e)
+            else:
+                per_document = (time.perf_counter() - start) * 1000 / len(ready)
+                for record, (predicted_class, confidence) in zip(ready, predictions):
+                    record['file_class'] = predicted_class
+                    record['confidence'] = confidence
+                    record['predict_ms'] = round(per_document, 3)
+        return records
+
+    def run(self, paths: Iterable[str]) -> Iterator[Dict[str, Any]]:
+        """Classify every path, yielding records in input order."""
+        batch = []
+        for path in paths:
+            batch.append(path)
+            if len(batch) >= self.batch_size:
+                yield from self.classify_batch(batch)
+                batch = []
+        if batch:
+            yield from self.classify_batch(batch)
+
+class ResultWriter:
+    """Streams records as JSON Lines or CSV."""
+
+    def __init__(self, stream: TextIO, output_format: str = 'jsonl'):
+        if output_format not in ('jsonl', 'csv'):
+            raise ValueError(f"Unknown output format: {output_format}")
+        self.stream = stream
+        self.output_format = output_format
+        self._csv = None
+        if output_format == 'csv':
+            self._csv = csv.DictWriter(stream, fieldnames=FIELDS)
+            self._csv.writeheader()
+
+    def write(self, record: Dict[str, Any]):
+        if self._csv is not None:
+            self._csv.writerow({field: record.get(field) for field in FIELDS})
+        else:
+            self.stream.write(json.dumps({field: record.get(field) for field in FIELDS}) + '\n')
+
+    def flush(self):
+        self.stream.flush()
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Classify local documents without the HTTP service")
+    parser.add_argument('paths', nargs='*', help="Files or directories to classify")
+    parser.add_argument('--file-list', help="File listing one path per line ('-' for stdin)")
+    parser.add_argument('--output', default='-', help="Output file ('-' for stdout)")
+    parser.add_argument('--format', choices=('jsonl', 'csv'),
+                        help="Output format (default: from the output extension, else jsonl)")
+    parser.add_argument('--models-dir', default=DEFAULT_MODELS_DIR, help="Directory holding the model artifacts")
+    parser.add_argument('--workers', type=int,
+                        help="Extraction worker processes (default: EXTRACTION_WORKERS, else "
+                             "CPU count; 0 extracts inline)")
+    parser.add_argument('--batch-size', type=int, default=64, help="Documents per prediction call")
+    parser.add_argument('--no-recursive', action='store_true', help="Do not descend into subdirectories")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.WARNING)
+
+    if not args.paths and not args.file_list:
+        parser.error("give at least one path or --file-list")
+    targets = itertools.chain(args.paths, read_file_list(args.file_list) if args.file_list else ())
+    paths = iter_paths(targets, recursive=not args.no_recursive)
+
+    output_format = args.format or ('csv' if args.output.endswith('.csv') else 'jsonl')
+    classifier = load_classifier(args.models_dir)
+    extractors = default_registry(
+        max_pages=int(os.getenv("EXTRACTION_MAX_PAGES", "20")) or None,
+        max_chars=int(os.getenv("EXTRACTION_MAX_CHARS", "100000")) or None
+    )
+    # Timeout and memory limits come from the same EXTRACTION_* variables as the services
+    pool = ExtractionPool.from_env()
+    if args.workers is not None:
+        pool.max_workers = args.workers
+    offline = OfflineClassifier(classifier, extractors, pool, batch_size=args.batch_size)
+
+    stream = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    writer = ResultWriter(stream, output_format)
+    count = errors = 0
+    start = time.perf_counter()
+    try:
+        for record in offline.run(paths):
+            writer.write(record)
+            count += 1
+            errors += bool(record['error'])
+            if count % args.batch_size == 0:
+                writer.flush()
+    finally:
+        writer.flush()
+        pool.shutdown()
+        if stream is not sys.stdout:
+            stream.close()
+
+    elapsed = time.perf_counter() - start
+    print(f"Classified {count} documents ({errors} errors) in {elapsed:.1f}s "
+          f"({count / max(elapsed, 1e-9):.1f}/s)", file=sys.stderr)
+
+if __name__ == '__main__':
+    main()
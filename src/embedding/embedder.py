@@ -1,38 +1,186 @@
-from typing import List, Union
+import re
+from typing import Any, Dict, List, Optional, Sequence, Union
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+from ..cache import LRUCache, content_key
+
+# Characters per chunk; long documents are embedded chunk by chunk
+CHUNK_SIZE = 500
+
+# One or more blank lines between paragraphs
+PARAGRAPH_BREAK = re.compile(r'\n(?:[ \t]*\n)+')
+
+def split_chunks(text: str, chunk_size: int = CHUNK_SIZE) -> List[str]:
+    """
+    Split text into chunks of at most chunk_size characters.
+
+    Every paragraph (text between blank lines) starts a new chunk, and a
+    long paragraph is split between lines, so a chunk depends only on its
+    own paragraph: a footer shared by documents of different lengths
+    yields identical chunks. Lines longer than chunk_size are cut into
+    pieces of that size.
+
+    Args:
+        text: Document text
+        chunk_size: Most characters per chunk
+
+    Returns:
+        Chunks in text order, without the blank lines between paragraphs
+    """
+    chunks = []
+    for paragraph in PARAGRAPH_BREAK.split(text):
+        if not paragraph.strip():
+            continue
+        current = ''
+        for line in paragraph.splitlines(keepends=True):
+            if len(current) + len(line) > chunk_size and current:
+                chunks.append(current)
+                current = ''
+            while len(line) > chunk_size:
+                chunks.append(line[:chunk_size])
+                line = line[chunk_size:]
+            current += line
+        if current:
+            chunks.append(current)
+    return chunks
 
 class DocumentEmbedder:
-    """Generates embeddings for document text using sentence-transformers."""
-    
-    def __init__(self, model_name: str = 'all-MiniLM-L6-v2'):
+    """
+    Generates embeddings for document text using sentence-transformers.
+
+    Documents are split into chunks and the chunks of a whole batch of
+    documents are encoded together, in fixed-size batches sorted by length
+    so each batch pads to similar lengths. Chunks follow paragraph and line
+    boundaries (see ``split_chunks``) and their embeddings are cached by
+    text hash, so boilerplate shared by many documents (letterheads, legal
+    footers) is encoded once.
+    """
+
+    def __init__(self,
+                 model_name: str = 'all-MiniLM-L6-v2',
+                 model: Optional[Any] = None,
+                 batch_size: int = 64,
+                 cache_size: int = 10000,
+                 chunk_size: int = CHUNK_SIZE):
         """
         Initialize the embedder with a specific model.
-        
+
         Args:
             model_name: Name of the sentence-transformer model to use
+            model: Already loaded model with a sentence-transformers style
+                ``encode``; loaded from model_name if omitted
+            batch_size: Chunks per encode call
+            cache_size: Chunk embeddings kept in the LRU cache (0 disables it)
+            chunk_size: Characters per chunk
         """
-        self.model = SentenceTransformer(model_name)
-    
+        if batch_size < 1 or chunk_size < 1:
+            raise ValueError("batch_size and chunk_size must be at least 1")
+        if model is None:
+            from sentence_transformers import SentenceTransformer
+            model = SentenceTransformer(model_name)
+        self.model = model
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.chunk_size = chunk_size
+        self.cache = LRUCache(max_size=cache_size) if cache_size else None
+
     def embed(self, text: Union[str, List[str]]) -> np.ndarray:
         """
         Generate embeddings for the input text.
-        
+
         Args:
             text: String or list of strings to embed
-            
+
         Returns:
             numpy.ndarray: Document embeddings
         """
         if isinstance(text, str):
-            # Split long documents into chunks of ~500 characters
-            chunks = [text[i:i+500] for i in range(0, len(text), 500)]
-            embeddings = self.model.encode(chunks)
-            # Average the chunk embeddings
-            return np.mean(embeddings, axis=0)
+            # Split long documents into chunks and average the chunk embeddings
+            return self.embed_documents([text])[0]
         else:
-            return self.model.encode(text)
-    
+            return self.encode_chunks(text)
+
+    def embed_documents(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Embed many documents with as few encode calls as possible.
+
+        Every document is split into chunks, the chunks of all documents
+        are encoded together, and each document's embedding is the mean of
+        its chunk embeddings. Empty documents get a zero vector.
+
+        Args:
+            texts: Document texts
+
+        Returns:
+            (len(texts), embedding_dim) float32 array, in input order
+        """
+        chunks = []
+        counts = np.zeros(len(texts), dtype=np.int64)
+        for index, text in enumerate(texts):
+            parts = split_chunks(text, self.chunk_size)
+            chunks.extend(parts)
+            counts[index] = len(parts)
+
+        if not chunks:
+            return np.zeros((len(texts), self.get_embedding_dim()), dtype=np.float32)
+        vectors = self.encode_chunks(chunks)
+
+        # Chunks of one document are contiguous, so each document is one segment sum
+        embeddings = np.zeros((len(texts), vectors.shape[1]), dtype=np.float32)
+        present = counts > 0
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+        embeddings[present] = np.add.reduceat(vectors, starts, axis=0) / counts[present, None]
+        return embeddings
+
+    def encode_chunks(self, chunks: Sequence[str]) -> np.ndarray:
+        """
+        Encode chunks, each distinct chunk at most once.
+
+        Cached chunks are not encoded again. The rest are deduplicated,
+        sorted longest first and encoded ``batch_size`` at a time.
+
+        Args:
+            chunks: Texts to encode as they are
+
+        Returns:
+            (len(chunks), embedding_dim) float32 array, in input order
+        """
+        keys = [content_key(chunk.encode('utf-8'), self.model_name) for chunk in chunks]
+        found: Dict[str, np.ndarray] = {}
+        missing: Dict[str, str] = {}
+        for key, chunk in zip(keys, chunks):
+            if key in found or key in missing:
+                continue
+            cached = self.cache.get(key) if self.cache is not None else None
+            if cached is not None:
+                found[key] = cached
+            else:
+                missing[key] = chunk
+
+        # Longest first, so every batch holds chunks of similar length and little padding
+        pending = sorted(missing.items(), key=lambda item: len(item[1]), reverse=True)
+        for start in range(0, len(pending), self.batch_size):
+            batch = pending[start:start + self.batch_size]
+            encoded = np.asarray(
+                self.model.encode([chunk for _, chunk in batch],
+                                  batch_size=len(batch), show_progress_bar=False),
+                dtype=np.float32
+            )
+            for (key, _), vector in zip(batch, encoded):
+                vector = vector.copy()
+                vector.setflags(write=False)
+                found[key] = vector
+                if self.cache is not None:
+                    self.cache.set(key, vector)
+
+        if not keys:
+            return np.zeros((0, self.get_embedding_dim()), dtype=np.float32)
+        return np.stack([found[key] for key in keys])
+
     def get_embedding_dim(self) -> int:
         """Get the dimensionality of the embeddings."""
-        return self.model.get_sentence_embedding_dimension() 
\ No newline at end of file
+        return self.model.get_sentence_embedding_dimension()
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Get the chunk cache's hit/miss/eviction counters."""
+        return self.cache.stats() if self.cache is not None else {}
@@ -0,0 +1,350 @@
+import json
+import os
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Bumped whenever the on-disk layout changes incompatibly
+INDEX_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+STORAGE_TYPES = ('float32', 'float16', 'int8')
+
+# Stored vectors scored per matrix multiplication in exact search
+DEFAULT_BLOCK_SIZE = 65536
+
+def normalize(vectors: np.ndarray) -> np.ndarray:
+    """Scale rows to unit length as float32; all-zero rows stay zero."""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+def quantize(vectors: np.ndarray, storage: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert float32 vectors to a storage type.
+
+    ``int8`` uses one symmetric scale per vector, so ``stored * scale``
+    approximates the original row.
+
+    Returns:
+        Tuple of (stored vectors, per-row scales or None)
+    """
+    if storage == 'float32':
+        return vectors.astype(np.float32), None
+    if storage == 'float16':
+        return vectors.astype(np.float16), None
+    scales = np.abs(vectors).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    stored = np.rint(vectors / scales[:, None]).astype(np.int8)
+    return stored, scales.astype(np.float32)
+
+def top_k(scores: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Select the k highest scores of every row, best first.
+
+    Args:
+        scores: (n_queries, n_candidates) array with n_candidates >= k
+
+    Returns:
+        Tuple of (scores, column indices), each (n_queries, k)
+    """
+    if k < scores.shape[1]:
+        columns = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    else:
+        columns = np.broadcast_to(np.arange(scores.shape[1]), scores.shape)
+    selected = np.take_along_axis(scores, columns, axis=1)
+    order = np.argsort(-selected, axis=1, kind='stable')
+    return np.take_along_axis(selected, order, axis=1), np.take_along_axis(columns, order, axis=1)
+
+class VectorIndex:
+    """
+    Labelled embeddings searchable by cosine similarity.
+
+    Vectors are normalized on insertion and stored as float32, float16 or
+    int8 (with one scale per vector), trading accuracy for memory and
+    bandwidth. Exact search scores the stored vectors block by block with
+    one matrix multiplication per block, keeping a running top k.
+
+    ``train`` adds an IVF-style coarse partition: vectors are clustered
+    with k-means and stored grouped by their nearest centroid, and a query
+    only scores the ``n_probe`` lists whose centroids are closest to it.
+    This is what keeps queries over millions of vectors in the millisecond
+    range, at the cost of occasionally missing a true neighbour.
+
+    Saved indexes are a directory of ``.npy`` arrays plus a manifest, and
+    load memory-mapped, so several processes share one copy.
+    """
+
+    def __init__(self, dim: int, storage: str = 'int8', block_size: int = DEFAULT_BLOCK_SIZE):
+        """
+        Initialize an empty index.
+
+        Args:
+            dim: Dimensionality of the vectors
+            storage: 'float32', 'float16' or 'int8'; int8 is the smallest and,
+                as it converts to float32 fastest, also the quickest to search
+            block_size: Stored vectors scored per matrix multiplication
+        """
+        if storage not in STORAGE_TYPES:
+            raise ValueError(f"Unknown storage type: {storage}")
+        if dim < 1 or block_size < 1:
+            raise ValueError("dim and block_size must be at least 1")
+        self.dim = dim
+        self.storage = storage
+        self.block_size = block_size
+        self.vectors = np.zeros((0, dim), dtype=storage)
+        self.scales = np.zeros(0, dtype=np.float32) if storage == 'int8' else None
+        self.labels = np.zeros(0, dtype=str)
+        # Insertion order of each row; rows move when a partitioned index grows
+        self.ids = np.zeros(0, dtype=np.int64)
+        # Coarse partition: list i holds rows list_offsets[i]:list_offsets[i + 1]
+        self.centroids: Optional[np.ndarray] = None
+        self.list_offsets: Optional[np.ndarray] = None
+        self.n_probe = 8
+
+    def __len__(self) -> int:
+        return len(self.vectors)
+
+    @property
+    def n_lists(self) -> int:
+        return 0 if self.centroids is None else len(self.centroids)
+
+    def add(self, vectors: np.ndarray, labels: Sequence[str]):
+        """
+        Add labelled vectors.
+
+        Args:
+            vectors: (n, dim) embeddings
+            labels: Label of each vector
+        """
+        vectors = normalize(np.atleast_2d(vectors))
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"Expected vectors with {self.dim} dimensions")
+        if len(labels) != len(vectors):
+            raise ValueError("Need one label per vector")
+        stored, scales = quantize(vectors, self.storage)
+        ids = np.arange(len(self), len(self) + len(vectors), dtype=np.int64)
+        labels = np.asarray(labels, dtype=str)
+
+        arrays = {
+            'vectors': np.concatenate([self.vectors, stored]),
+            'labels': np.concatenate([self.labels, labels]),
+            'ids': np.concatenate([self.ids, ids]),
+        }
+        if self.scales is not None:
+            arrays['scales'] = np.concatenate([self.scales, scales])
+        if self.centroids is None:
+            for name, array in arrays.items():
+                setattr(self, name, array)
+            return
+        lists = np.concatenate([
+            np.repeat(np.arange(self.n_lists), np.diff(self.list_offsets)),
+            self._nearest_lists(vectors),
+        ])
+        self._group(arrays, lists)
+
+    def _decode(self, rows) -> np.ndarray:
+        """Stored vectors as float32, for a slice or an index array of rows."""
+        block = self.vectors[rows].astype(np.float32)
+        if self.scales is not None:
+            block *= self.scales[rows][:, None]
+        return block
+
+    def _nearest_lists(self, vectors: np.ndarray) -> np.ndarray:
+        """Index of the closest centroid for each normalized vector."""
+        lists = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), self.block_size):
+            lists[start:start + self.block_size] = np.argmax(
+                vectors[start:start + self.block_size] @ self.centroids.T, axis=1)
+        return lists
+
+    def _group(self, arrays: Dict[str, np.ndarray], lists: np.ndarray):
+        """Store arrays with rows grouped by list, and the list boundaries."""
+        order = np.argsort(lists, kind='stable')
+        for name, array in arrays.items():
+            setattr(self, name, array[order])
+        self.list_offsets = np.searchsorted(lists[order], np.arange(self.n_lists + 1)).astype(np.int64)
+
+    def train(self,
+              n_lists: int,
+              n_probe: int = 8,
+              iterations: int = 10,
+              sample_size: Optional[int] = None,
+              seed: int = 0):
+        """
+        Partition the stored vectors into n_lists clusters for fast search.
+
+        Centroids are fitted by spherical k-means on a sample, then every
+        vector is assigned to its nearest centroid. Vectors added later
+        join their nearest existing list.
+
+        Args:
+            n_lists: Number of clusters
+            n_probe: Lists searched per query by default
+            iterations: k-means iterations
+            sample_size: Vectors used to fit the centroids (default 64 per list)
+            seed: Random seed for sampling and initialization
+        """
+        if not 1 <= n_lists <= len(self):
+            raise ValueError(f"n_lists must be between 1 and the number of vectors ({len(self)})")
+        rng = np.random.default_rng(seed)
+        sample_size = min(len(self), sample_size or 64 * n_lists)
+        sample = self._decode(np.sort(rng.choice(len(self), sample_size, replace=False)))
+
+        self.centroids = sample[rng.choice(sample_size, n_lists, replace=False)]
+        for _ in range(iterations):
+            assigned = self._nearest_lists(sample)
+            order = np.argsort(assigned, kind='stable')
+            counts = np.bincount(assigned, minlength=n_lists)
+            centroids = np.zeros_like(self.centroids)
+            present = counts > 0
+            starts = np.concatenate([[0], np.cumsum(counts)[:-1]])[present]
+            centroids[present] = np.add.reduceat(sample[order], starts, axis=0)
+            # Empty clusters restart from random sample vectors
+            centroids[~present] = sample[rng.choice(sample_size, int((~present).sum()))]
+            self.centroids = normalize(centroids)
+
+        lists = np.concatenate([
+            self._nearest_lists(self._decode(slice(start, start + self.block_size)))
+            for start in range(0, len(self), self.block_size)
+        ])
+        arrays = {'vectors': self.vectors, 'labels': self.labels, 'ids': self.ids}
+        if self.scales is not None:
+            arrays['scales'] = self.scales
+        self._group(arrays, lists)
+        self.n_probe = n_probe
+
+    def _score(self, queries: np.ndarray, rows) -> np.ndarray:
+        """Cosine similarity of each query to the stored vectors in rows."""
+        scores = queries @ self.vectors[rows].astype(np.float32).T
+        if self.scales is not None:
+            scores *= self.scales[rows]
+        return scores
+
+    def search(self, queries: np.ndarray, k: int = 10, n_probe: Optional[int] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the k stored vectors most similar to each query.
+
+        Args:
+            queries: (n_queries, dim) or (dim,) embeddings
+            k: Neighbours per query
+            n_probe: Lists searched in a partitioned index; None uses the
+                index default, and values >= n_lists search exactly
+
+        Returns:
+            Tuple of (scores, rows), each (n_queries, k), best first. Look
+            up ``labels[rows]``; missing neighbours have row -1 and score -inf.
+        """
+        queries = normalize(np.atleast_2d(queries))
+        if queries.shape[1] != self.dim:
+            raise ValueError(f"Expected queries with {self.dim} dimensions")
+        best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+        best_rows = np.full((len(queries), k), -1, dtype=np.int64)
+
+        n_probe = self.n_probe if n_probe is None else n_probe
+        if k < 1 or n_probe < 1:
+            raise ValueError("k and n_probe must be at least 1")
+        if self.centroids is None or n_probe >= self.n_lists:
+            for start in range(0, len(self), self.block_size):
+                stop = min(start + self.block_size, len(self))
+                rows = np.broadcast_to(np.arange(start, stop), (len(queries), stop - start))
+                best_scores, best_rows = _merge(best_scores, best_rows,
+                                                self._score(queries, slice(start, stop)), rows, k)
+            return best_scores, best_rows
+
+        probes = np.argpartition(-(queries @ self.centroids.T), n_probe - 1, axis=1)[:, :n_probe]
+        for query, lists in enumerate(probes):
+            # Lists are contiguous, so each is scored in place without gathering rows
+            spans = [(self.list_offsets[i], self.list_offsets[i + 1]) for i in lists]
+            scores = np.concatenate([self._score(queries[query:query + 1], slice(start, stop))
+                                     for start, stop in spans], axis=1)
+            rows = np.concatenate([np.arange(start, stop) for start, stop in spans])
+            if not len(rows):
+                continue
+            scores, selected = _merge(best_scores[query:query + 1], best_rows[query:query + 1],
+                                      scores, rows[None, :], k)
+            best_scores[query], best_rows[query] = scores[0], selected[0]
+        return best_scores, best_rows
+
+    def save(self, path: str) -> Dict[str, Any]:
+        """
+        Write the index as a directory of ``.npy`` arrays and a manifest.
+
+        Args:
+            path: Directory to write, created if needed
+
+        Returns:
+            The manifest that was written
+        """
+        arrays = {'vectors': self.vectors, 'labels': self.labels, 'ids': self.ids}
+        if self.scales is not None:
+            arrays['scales'] = self.scales
+        if self.centroids is not None:
+            arrays['centroids'] = self.centroids
+            arrays['list_offsets'] = self.list_offsets
+
+        os.makedirs(path, exist_ok=True)
+        layout = {}
+        for name, array in arrays.items():
+            filename = f"{name}.npy"
+            np.save(os.path.join(path, filename), np.ascontiguousarray(array), allow_pickle=False)
+            layout[name] = {'file': filename, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+        manifest = {
+            'format_version': INDEX_FORMAT_VERSION,
+            'dim': self.dim,
+            'storage': self.storage,
+            'count': len(self),
+            'n_lists': self.n_lists,
+            'n_probe': self.n_probe,
+            'arrays': layout,
+        }
+        with open(os.path.join(path, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+        return manifest
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True, block_size: int = DEFAULT_BLOCK_SIZE) -> 'VectorIndex':
+        """
+        Load an index written by ``save``.
+
+        Args:
+            path: Index directory
+            mmap: Memory-map the arrays read-only instead of reading them into memory
+            block_size: Stored vectors scored per matrix multiplication
+
+        Returns:
+            The loaded index; adding vectors copies the arrays into memory
+        """
+        with open(os.path.join(path, MANIFEST_NAME)) as f:
+            manifest = json.load(f)
+        if manifest.get('format_version') != INDEX_FORMAT_VERSION:
+            raise ValueError(
+                f"Unsupported vector index format {manifest.get('format_version')} "
+                f"(expected {INDEX_FORMAT_VERSION})"
+            )
+
+        index = cls(manifest['dim'], manifest['storage'], block_size)
+        for name, spec in manifest['arrays'].items():
+            array = np.load(os.path.join(path, spec['file']), mmap_mode='r' if mmap else None,
+                            allow_pickle=False)
+            if array.dtype.str != spec['dtype'] or list(array.shape) != spec['shape']:
+                raise ValueError(f"Vector index array {name} does not match its manifest")
+            setattr(index, name, array)
+        index.n_probe = manifest['n_probe']
+        return index
+
+def _merge(best_scores: np.ndarray,
+           best_rows: np.ndarray,
+           scores: np.ndarray,
+           rows: np.ndarray,
+           k: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Fold a block of candidate scores into the running top k."""
+    if scores.shape[1] > k:
+        scores, columns = top_k(scores, k)
+        rows = np.take_along_axis(rows, columns, axis=1)
+    scores = np.concatenate([best_scores, scores], axis=1)
+    rows = np.concatenate([best_rows, rows], axis=1)
+    scores, columns = top_k(scores, k)
+    return scores, np.take_along_axis(rows, columns, axis=1)
@@ -0,0 +1,109 @@
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .embedder import DocumentEmbedder
+from .index import VectorIndex
+
+class KNNClassifier:
+    """
+    Classifies documents by the labels of their nearest labelled examples.
+
+    Neighbours vote with their cosine similarity, and the confidence is
+    the winning label's share of the votes. Supporting a new document type
+    only takes adding examples of it to the index; nothing is retrained.
+    """
+
+    def __init__(self,
+                 index: VectorIndex,
+                 embedder: Optional[DocumentEmbedder] = None,
+                 k: int = 5,
+                 n_probe: Optional[int] = None):
+        """
+        Initialize the classifier.
+
+        Args:
+            index: Index of labelled example embeddings
+            embedder: Embedder for raw texts; only vector methods work without one
+            k: Neighbours consulted per document
+            n_probe: Lists searched in a partitioned index (default: the index's)
+        """
+        if k < 1:
+            raise ValueError("k must be at least 1")
+        self.index = index
+        self.embedder = embedder
+        self.k = k
+        self.n_probe = n_probe
+
+    def _embed(self, texts: Sequence[str]) -> np.ndarray:
+        if self.embedder is None:
+            raise RuntimeError("No embedder configured")
+        return self.embedder.embed_documents(texts)
+
+    def add_examples(self, texts: Sequence[str], labels: Sequence[str]):
+        """
+        Embed labelled documents and add them to the index.
+
+        Args:
+            texts: Document texts
+            labels: Document class of each text
+        """
+        self.index.add(self._embed(texts), labels)
+
+    def predict_vectors(self, vectors: np.ndarray) -> List[Tuple[str, float]]:
+        """
+        Classify document embeddings.
+
+        Args:
+            vectors: (n_documents, dim) embeddings
+
+        Returns:
+            List of (predicted_class, confidence) tuples, in input order
+        """
+        if not len(self.index):
+            raise RuntimeError("Index is empty")
+        scores, rows = self.index.search(vectors, self.k, self.n_probe)
+
+        predictions = []
+        for query_scores, query_rows in zip(scores, rows):
+            found = query_rows >= 0
+            labels = self.index.labels[query_rows[found]]
+            # Dissimilar neighbours get no say; if none is similar, every neighbour counts once
+            weights = np.clip(query_scores[found], 0.0, None)
+            if not weights.sum():
+                weights = np.ones(len(labels))
+            votes: Dict[str, float] = {}
+            for label, weight in zip(labels, weights):
+                votes[str(label)] = votes.get(str(label), 0.0) + float(weight)
+            if not votes:
+                predictions.append(("unknown", 0.0))
+                continue
+            predicted_class = max(votes, key=votes.get)
+            predictions.append((predicted_class, votes[predicted_class] / sum(votes.values())))
+        return predictions
+
+    def predict_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Classify many documents with one embedding pass and one search.
+
+        Args:
+            texts: Document texts
+
+        Returns:
+            List of (predicted_class, confidence) tuples, in input order
+        """
+        if not texts:
+            return []
+        return self.predict_vectors(self._embed(texts))
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """
+        Classify one document.
+
+        Args:
+            text: Document text
+
+        Returns:
+            Tuple of (predicted_class, confidence)
+        """
+        return self.predict_batch([text])[0]
@@ -1,4 +1,17 @@
 from .base import BaseExtractor
 from .pdf import PDFExtractor
+from .pool import ExtractionPool, ExtractionTimeout
+from .registry import ExtractorRegistry, default_registry, needs_ocr
+from .sniff import detect_format, sniff_format
 
-__all__ = ['BaseExtractor', 'PDFExtractor']
+__all__ = [
+    'BaseExtractor',
+    'PDFExtractor',
+    'ExtractionPool',
+    'ExtractionTimeout',
+    'ExtractorRegistry',
+    'default_registry',
+    'needs_ocr',
+    'detect_format',
+    'sniff_format',
+]
@@ -1,9 +1,80 @@
+import itertools
+import json
+import mmap
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Dict, Any
+from typing import BinaryIO, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+def collect_text(pages: Iterable[str],
+                 max_chars: Optional[int] = None,
+                 max_pages: Optional[int] = None,
+                 total_pages: Optional[int] = None) -> Tuple[str, int, bool]:
+    """
+    Join page texts until a character or page budget is reached.
+    
+    Pages are consumed lazily, so stopping early also stops parsing when
+    ``pages`` is a generator; no page past ``max_pages`` is taken from it.
+    Pieces are collected in a list and joined once rather than
+    concatenated repeatedly.
+    
+    Args:
+        pages: Iterable of page texts
+        max_chars: Stop once this many characters have been collected
+        max_pages: Stop after this many pages
+        total_pages: Page count of the document, so reaching ``max_pages``
+            on its last page is not reported as truncation (defaults to
+            ``len(pages)`` where available; if unknown, it is reported)
+        
+    Returns:
+        Tuple of (text, pages_read, truncated)
+    """
+    if total_pages is None and hasattr(pages, '__len__'):
+        total_pages = len(pages)
+    parts = []
+    total = 0
+    truncated = False
+    for page_text in itertools.islice(pages, max_pages):
+        parts.append(page_text)
+        total += len(page_text) + 1
+        if max_chars is not None and total >= max_chars:
+            truncated = True
+            break
+    else:
+        if max_pages is not None and len(parts) == max_pages:
+            truncated = total_pages is None or total_pages > max_pages
+    
+    text = "\n".join(parts)
+    if max_chars is not None:
+        text = text[:max_chars]
+    return text, len(parts), truncated
 
 class BaseExtractor(ABC):
     """Base class for all content extractors."""
     
+    # Detected file formats (see ``sniff_format``) this extractor handles
+    formats: Tuple[str, ...] = ()
+    
+    # Bump when a change alters the extracted text, so cached extractions
+    # from the old code are no longer used
+    version: str = '1'
+    
+    def fingerprint(self) -> str:
+        """
+        Identify this extractor's output for caching.
+        
+        Combines the class, its ``version`` and its scalar settings (such
+        as page and character budgets), so any change that can alter the
+        extracted text yields a different fingerprint.
+        
+        Returns:
+            String such as ``src.extractor.pdf.PDFExtractor/1/{"max_pages": null}``
+        """
+        settings = {
+            name: value for name, value in sorted(vars(self).items())
+            if not name.startswith('_') and isinstance(value, (str, int, float, bool, type(None)))
+        }
+        cls = type(self)
+        return f"{cls.__module__}.{cls.__qualname__}/{self.version}/{json.dumps(settings)}"
+    
     @abstractmethod
     def extract(self, file: BinaryIO) -> Dict[str, Any]:
         """
@@ -20,6 +91,46 @@ class BaseExtractor(ABC):
         """
         pass
 
+    def extract_file(self, path: str) -> Dict[str, Any]:
+        """
+        Extract content from a file on disk.
+        
+        The default maps the file into memory and passes ``extract`` a
+        read-only view, so parsers read pages on demand instead of the
+        whole document being copied into a buffer first. Extractors whose
+        parser can open files itself override this.
+        
+        Args:
+            path: Path of the document
+            
+        Returns:
+            Same dict as ``extract``
+        """
+        with open(path, 'rb') as f:
+            if f.seek(0, 2) == 0:
+                f.seek(0)
+                return self.extract(f)
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                return self.extract(view)
+
+    def iter_pages(self, file: BinaryIO) -> Iterator[str]:
+        """
+        Lazily yield the text of each page of a document.
+        
+        Extractors for paged formats override this so callers can stop
+        parsing early; the default yields the whole text as one page.
+        
+        Args:
+            file: A file-like object containing the document
+            
+        Returns:
+            Iterator over page texts
+        """
+        content = self.extract(file)
+        if content.get('error'):
+            raise ValueError(content['error'])
+        yield content['text']
+
     @abstractmethod
     def supports_format(self, filename: str) -> bool:
         """
@@ -0,0 +1,148 @@
+import os
+from typing import BinaryIO, Dict, Any, Optional, Tuple
+import pytesseract
+from PIL import Image, ImageOps
+from .base import BaseExtractor
+
+# One Tesseract thread per OCR call; parallelism comes from the worker pool
+os.environ.setdefault("OMP_THREAD_LIMIT", "1")
+
+# Images whose header declares more pixels than this are refused before decoding
+MAX_IMAGE_PIXELS = 100_000_000
+
+class ImageExtractor(BaseExtractor):
+    """
+    Extracts text from JPEG and PNG scans with Tesseract OCR.
+
+    Images are shrunk to at most ``max_pixels`` before OCR (JPEGs are
+    decoded at reduced size directly), converted to grayscale and
+    binarized, which keeps OCR time roughly constant however large the
+    upload. Run it in an ExtractionPool: OCR is CPU-bound and slow.
+    """
+
+    formats = ('jpg', 'png')
+    version = f"1+pytesseract-{getattr(pytesseract, '__version__', '')}"
+
+    def __init__(self,
+                 max_pixels: int = 4_000_000,
+                 binarize: bool = True,
+                 lang: str = 'eng',
+                 ocr_timeout: Optional[float] = 20.0,
+                 config: str = '--psm 3'):
+        """
+        Initialize the extractor.
+
+        Args:
+            max_pixels: Largest image area passed to OCR; larger images are downscaled
+            binarize: Threshold the grayscale image with Otsu's method before OCR
+            lang: Tesseract language code
+            ocr_timeout: Seconds before the Tesseract process is killed, or None
+            config: Extra Tesseract command-line options
+        """
+        if max_pixels < 1:
+            raise ValueError("max_pixels must be at least 1")
+        self.max_pixels = max_pixels
+        self.binarize = binarize
+        self.lang = lang
+        self.ocr_timeout = ocr_timeout
+        self.config = config
+
+    def supports_format(self, filename: str) -> bool:
+        return filename.lower().endswith(('.jpg', '.jpeg', '.png'))
+
+    def _target_size(self, size: Tuple[int, int]) -> Tuple[int, int]:
+        """Scale (width, height) down to fit within max_pixels."""
+        width, height = size
+        if width * height <= self.max_pixels:
+            return width, height
+        scale = (self.max_pixels / (width * height)) ** 0.5
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+    def preprocess(self, image: Image.Image) -> Image.Image:
+        """
+        Prepare an opened image for OCR.
+
+        Args:
+            image: Image opened but not necessarily decoded yet
+
+        Returns:
+            Upright grayscale (or binarized) image of at most max_pixels
+        """
+        width, height = image.size
+        if width * height > MAX_IMAGE_PIXELS:
+            raise ValueError(f"Image too large: {width}x{height}")
+        target = self._target_size(image.size)
+        if image.format == 'JPEG':
+            # Let libjpeg decode straight to grayscale at a reduced scale
+            image.draft('L', target)
+
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('L')
+        if image.width * image.height > self.max_pixels:
+            image = image.resize(self._target_size(image.size), Image.Resampling.LANCZOS,
+                                 reducing_gap=2.0)
+        if self.binarize:
+            threshold = otsu_threshold(image.histogram())
+            image = image.point(lambda value: 255 if value > threshold else 0)
+        return image
+
+    def extract(self, file: BinaryIO) -> Dict[str, Any]:
+        try:
+            with Image.open(file) as image:
+                metadata = {
+                    'format': image.format,
+                    'width': image.width,
+                    'height': image.height,
+                }
+                prepared = self.preprocess(image)
+            metadata['ocr_width'], metadata['ocr_height'] = prepared.size
+
+            text = pytesseract.image_to_string(
+                prepared,
+                lang=self.lang,
+                config=self.config,
+                timeout=self.ocr_timeout or 0
+            )
+
+            return {
+                'text': text.strip(),
+                'metadata': metadata,
+                'error': None
+            }
+
+        except Exception as e:
+            return {
+                'text': '',
+                'metadata': {},
+                'error': f"Failed to extract image content: {str(e) or type(e).__name__}"
+            }
+
+def otsu_threshold(histogram) -> int:
+    """
+    Pick the gray level that best separates dark and light pixels.
+
+    Args:
+        histogram: 256 pixel counts, as from ``Image.histogram()``
+
+    Returns:
+        Threshold; values above it are background
+    """
+    total = sum(histogram)
+    weighted_total = sum(level * count for level, count in enumerate(histogram))
+    background = 0
+    weighted_background = 0.0
+    best_threshold, best_variance = 0, -1.0
+    for level, count in enumerate(histogram):
+        background += count
+        if background == 0:
+            continue
+        foreground = total - background
+        if foreground == 0:
+            break
+        weighted_background += level * count
+        mean_background = weighted_background / background
+        mean_foreground = (weighted_total - weighted_background) / foreground
+        variance = background * foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = level, variance
+    return best_threshold
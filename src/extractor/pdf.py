@@ -1,25 +1,49 @@
-from typing import BinaryIO, Dict, Any
+from typing import BinaryIO, Dict, Any, Iterator, Optional
 import PyPDF2
-from .base import BaseExtractor
+from .base import BaseExtractor, collect_text
 
 class PDFExtractor(BaseExtractor):
     """Extracts content from PDF files."""
     
+    formats = ('pdf',)
+    version = f"1+pypdf2-{PyPDF2.__version__}"
+    
+    def __init__(self, max_pages: Optional[int] = None, max_chars: Optional[int] = None):
+        """
+        Initialize the extractor.
+        
+        Args:
+            max_pages: Stop extracting after this many pages
+            max_chars: Stop extracting once this many characters are collected
+        """
+        self.max_pages = max_pages
+        self.max_chars = max_chars
+    
     def supports_format(self, filename: str) -> bool:
         return filename.lower().endswith('.pdf')
     
+    def iter_pages(self, file: BinaryIO) -> Iterator[str]:
+        reader = PyPDF2.PdfReader(file)
+        for page in reader.pages:
+            yield page.extract_text()
+    
     def extract(self, file: BinaryIO) -> Dict[str, Any]:
         try:
             reader = PyPDF2.PdfReader(file)
             
-            # Extract text from all pages
-            text = ""
-            for page in reader.pages:
-                text += page.extract_text() + "\n"
+            # Extract text page by page until the budget is reached
+            text, pages_read, truncated = collect_text(
+                (page.extract_text() for page in reader.pages),
+                max_chars=self.max_chars,
+                max_pages=self.max_pages,
+                total_pages=len(reader.pages)
+            )
             
             # Get metadata
             metadata = {
                 'page_count': len(reader.pages),
+                'pages_read': pages_read,
+                'truncated': truncated,
                 'is_encrypted': reader.is_encrypted,
             }
             
@@ -33,10 +57,10 @@ class PDFExtractor(BaseExtractor):
                 'metadata': metadata,
                 'error': None
             }
-            
+        
         except Exception as e:
             return {
                 'text': '',
                 'metadata': {},
                 'error': f"Failed to extract PDF content: {str(e)}"
-            } 
\ No newline at end of file
+            }
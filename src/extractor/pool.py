@@ -0,0 +1,345 @@
+import asyncio
+import atexit
+import importlib
+import io
+import itertools
+import logging
+import multiprocessing
+import multiprocessing.pool
+import os
+import threading
+import time
+from concurrent.futures import Executor
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple, Union
+
+from .base import BaseExtractor
+from .uploads import SpooledUpload
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+# Parser modules imported by each worker at start-up so the first task is fast
+DEFAULT_PRELOAD = ('PyPDF2', 'fitz', 'docx')
+
+# How often a waiting caller checks whether its task has started, overrun or lost its worker
+POLL_INTERVAL = 0.05
+
+class ExtractionTimeout(TimeoutError):
+    """Raised when an extraction task exceeds its time budget."""
+    pass
+
+class WorkerDied(RuntimeError):
+    """Raised when the worker process running a task exits before finishing it."""
+    pass
+
+# Queue on which a worker announces each task it starts (set in the worker)
+_started_queue = None
+
+def _init_worker(memory_limit_mb: Optional[int], preload: Sequence[str], started_queue=None):
+    """Apply the memory cap and import parser modules in a new worker."""
+    global _started_queue
+    _started_queue = started_queue
+    if memory_limit_mb and resource is not None:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+    for module in preload:
+        try:
+            importlib.import_module(module)
+        except ImportError:
+            pass
+
+def _run_task(task_id: int, fn: Callable, args: Sequence[Any]) -> Any:
+    """Announce which worker is running a task, and since when, then run it."""
+    if _started_queue is not None:
+        _started_queue.put((task_id, os.getpid(), time.time()))
+    return fn(*args)
+
+def _ping() -> int:
+    """No-op task used to start workers ahead of time."""
+    return os.getpid()
+
+def _extract_bytes(extractor: BaseExtractor, data: Union[bytes, SpooledUpload]) -> Dict[str, Any]:
+    """Run an extractor over raw document bytes or a spooled upload inside a worker."""
+    if isinstance(data, SpooledUpload):
+        # Spooled uploads are opened from disk here rather than pickled over
+        return data.extract(extractor)
+    return extractor.extract(io.BytesIO(data))
+
+class ExtractionPool:
+    """
+    Runs CPU-bound document parsing in worker processes.
+
+    Parsing happens outside the serving process, so one large document no
+    longer holds the GIL while other requests wait. Each task has a time
+    budget that starts when a worker picks it up, so time spent queued
+    behind other documents does not count. A task that overruns it has its
+    own worker terminated; the pool replaces that worker and tasks running
+    on the others are unaffected. With ``max_workers=0`` tasks run inline in
+    the calling thread, which keeps the same interface for tests and
+    single-process tools.
+    """
+
+    def __init__(self,
+                 max_workers: Optional[int] = None,
+                 timeout: Optional[float] = 30.0,
+                 memory_limit_mb: Optional[int] = None,
+                 preload: Sequence[str] = DEFAULT_PRELOAD,
+                 start_method: Optional[str] = None):
+        """
+        Initialize the pool. Worker processes are started on first use or by
+        calling ``warm()``.
+
+        Args:
+            max_workers: Number of worker processes (default: CPU count),
+                or 0 to run tasks inline
+            timeout: Seconds a task may run once a worker has started it,
+                or None for no limit
+            memory_limit_mb: Address-space limit for each worker in MB
+            preload: Modules each worker imports when it starts
+            start_method: multiprocessing start method (default: platform default)
+        """
+        if max_workers is None:
+            max_workers = os.cpu_count() or 1
+        if max_workers < 0:
+            raise ValueError("max_workers must not be negative")
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.memory_limit_mb = memory_limit_mb
+        self.preload = tuple(preload)
+        self.start_method = start_method
+        self._pool: Optional[multiprocessing.pool.Pool] = None
+        self._started_queue = None
+        self._lock = threading.Lock()
+        self._exit_hook = False
+        self._task_ids = itertools.count()
+        self._pending: Set[int] = set()
+        self._running: Dict[int, Tuple[int, float]] = {}
+        # Workers terminated because their task overran
+        self.restarts = 0
+
+    def _get_pool(self) -> multiprocessing.pool.Pool:
+        """Return the live worker pool, creating it if needed."""
+        with self._lock:
+            if self._pool is None:
+                context = multiprocessing.get_context(self.start_method)
+                self._started_queue = context.SimpleQueue()
+                self._pool = context.Pool(
+                    processes=self.max_workers,
+                    initializer=_init_worker,
+                    initargs=(self.memory_limit_mb, self.preload, self._started_queue)
+                )
+                if not self._exit_hook:
+                    # Stop the workers before interpreter teardown, when the pool can no longer clean up
+                    atexit.register(self.shutdown, wait=False)
+                    self._exit_hook = True
+            return self._pool
+
+    def warm(self):
+        """Start every worker process and run its initializer now."""
+        if self.max_workers == 0:
+            _init_worker(None, self.preload)
+            return
+        pool = self._get_pool()
+        results = [pool.apply_async(_ping) for _ in range(self.max_workers)]
+        for result in results:
+            result.get()
+
+    def _submit(self, fn: Callable, args: Sequence[Any]) -> Tuple[multiprocessing.pool.Pool, int, Any]:
+        """Queue a task; its clock starts when a worker announces it."""
+        pool = self._get_pool()
+        task_id = next(self._task_ids)
+        with self._lock:
+            self._pending.add(task_id)
+        return pool, task_id, pool.apply_async(_run_task, (task_id, fn, tuple(args)))
+
+    def _poll_started(self):
+        """Record the tasks workers have announced since the last poll."""
+        with self._lock:
+            queue = self._started_queue
+            while queue is not None and not queue.empty():
+                task_id, pid, started = queue.get()
+                # Tasks already collected are not tracked again
+                if task_id in self._pending:
+                    self._running[task_id] = (pid, started)
+
+    def _forget(self, task_id: int):
+        with self._lock:
+            self._pending.discard(task_id)
+            self._running.pop(task_id, None)
+
+    @staticmethod
+    def _worker(pool: multiprocessing.pool.Pool, pid: int):
+        """Find a live worker process by pid."""
+        for process in list(getattr(pool, '_pool', [])):
+            if process.pid == pid and process.is_alive():
+                return process
+        return None
+
+    def _collect(self, pool: multiprocessing.pool.Pool, task_id: int, result) -> Any:
+        """Wait for a submitted task, enforcing its budget once it is running."""
+        try:
+            while True:
+                result.wait(POLL_INTERVAL)
+                if result.ready():
+                    return result.get()
+                self._poll_started()
+                running = self._running.get(task_id)
+                if running is None:
+                    continue  # Still queued for a worker
+                pid, started = running
+                worker = self._worker(pool, pid)
+                if worker is None:
+                    logger.error("Extraction worker died while running a task")
+                    raise WorkerDied("Extraction worker died")
+                if self.timeout is not None and time.time() - started > self.timeout:
+                    logger.error(f"Extraction task exceeded {self.timeout}s; terminating its worker")
+                    # Only this worker stops; the pool starts a replacement
+                    worker.terminate()
+                    with self._lock:
+                        self.restarts += 1
+                    raise ExtractionTimeout(f"Extraction timed out after {self.timeout}s")
+        finally:
+            self._forget(task_id)
+
+    def run(self, fn: Callable, *args: Any) -> Any:
+        """
+        Run a picklable function in a worker process and wait for it.
+
+        Args:
+            fn: Module-level function to call
+            args: Picklable arguments
+
+        Returns:
+            The function's return value
+
+        Raises:
+            ExtractionTimeout: If the task runs longer than the pool's timeout
+            WorkerDied: If the worker running the task exits before finishing it
+        """
+        if self.max_workers == 0:
+            return fn(*args)
+        return self._collect(*self._submit(fn, args))
+
+    def run_many(self, fn: Callable, arg_list: Sequence[Sequence[Any]]) -> List[Any]:
+        """
+        Run a picklable function over many argument tuples in parallel.
+
+        Args:
+            fn: Module-level function to call
+            arg_list: One tuple of picklable arguments per task
+
+        Returns:
+            One entry per task, in order: the return value, or the exception
+            the task raised (including ``ExtractionTimeout``)
+        """
+        results = []
+        if self.max_workers == 0:
+            for args in arg_list:
+                try:
+                    results.append(fn(*args))
+                except Exception as e:
+                    results.append(e)
+            return results
+
+        submitted = [self._submit(fn, args) for args in arg_list]
+        for pool, task_id, result in submitted:
+            try:
+                results.append(self._collect(pool, task_id, result))
+            except Exception as e:
+                results.append(e)
+        return results
+
+    async def run_async(self, fn: Callable, *args: Any, executor: Optional[Executor] = None) -> Any:
+        """
+        Like ``run``, but waits without blocking the event loop.
+
+        The wait happens on a thread of ``executor`` (default: the loop's
+        executor), so a bounded executor also bounds the tasks in flight.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.run, fn, *args)
+
+    def extract(self, extractor: BaseExtractor, data: Union[bytes, SpooledUpload]) -> Dict[str, Any]:
+        """
+        Extract content from raw bytes in a worker process.
+
+        Args:
+            extractor: A picklable extractor instance
+            data: Raw document bytes, or a SpooledUpload the worker reads itself
+
+        Returns:
+            The extractor's result dict; timeouts and worker failures are
+            reported through its ``error`` field
+        """
+        try:
+            return self.run(_extract_bytes, extractor, data)
+        except Exception as e:
+            return {
+                'text': '',
+                'metadata': {},
+                'error': f"Extraction failed: {str(e) or type(e).__name__}"
+            }
+
+    def extract_many(self,
+                     jobs: Sequence[Tuple[BaseExtractor, Union[bytes, SpooledUpload]]]) -> List[Dict[str, Any]]:
+        """
+        Extract many documents in parallel.
+
+        Args:
+            jobs: (extractor, raw bytes or SpooledUpload) pairs
+
+        Returns:
+            One result dict per job, in order; failures are reported through
+            the ``error`` field
+        """
+        results = []
+        for outcome in self.run_many(_extract_bytes, jobs):
+            if isinstance(outcome, Exception):
+                outcome = {
+                    'text': '',
+                    'metadata': {},
+                    'error': f"Extraction failed: {str(outcome) or type(outcome).__name__}"
+                }
+            results.append(outcome)
+        return results
+
+    async def extract_async(self,
+                            extractor: BaseExtractor,
+                            data: Union[bytes, SpooledUpload],
+                            executor: Optional[Executor] = None) -> Dict[str, Any]:
+        """Like ``extract``, but waits without blocking the event loop (see ``run_async``)."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(executor, self.extract, extractor, data)
+
+    def shutdown(self, wait: bool = True):
+        """Stop all worker processes, by default once submitted tasks are collected."""
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        pool.close()
+        # Tasks lost with a terminated worker never complete, so the pool's
+        # own close-and-join would wait forever; wait for our callers instead
+        while wait and self._pending:
+            time.sleep(POLL_INTERVAL)
+        pool.terminate()
+        pool.join()
+
+    @classmethod
+    def from_env(cls, prefix: str = 'EXTRACTION') -> 'ExtractionPool':
+        """
+        Build a pool from ``<prefix>_WORKERS``, ``<prefix>_TIMEOUT``,
+        ``<prefix>_MEMORY_MB`` and ``<prefix>_START_METHOD`` environment
+        variables. A timeout or memory limit of 0 disables that limit.
+        """
+        workers = os.getenv(f"{prefix}_WORKERS")
+        return cls(
+            max_workers=int(workers) if workers else None,
+            timeout=float(os.getenv(f"{prefix}_TIMEOUT", "30")) or None,
+            memory_limit_mb=int(os.getenv(f"{prefix}_MEMORY_MB", "0")) or None,
+            start_method=os.getenv(f"{prefix}_START_METHOD") or None
+        )
@@ -0,0 +1,116 @@
+import logging
+import os
+from typing import Dict, List, Optional
+
+from .base import BaseExtractor
+from .sniff import detect_format
+
+logger = logging.getLogger(__name__)
+
+# Formats extracted by OCR, which the services run in a separate worker pool
+OCR_FORMATS = frozenset({'jpg', 'png'})
+
+def needs_ocr(extractor: BaseExtractor) -> bool:
+    """Check whether an extractor does OCR rather than parsing a text layer."""
+    return bool(OCR_FORMATS.intersection(extractor.formats))
+
+class ExtractorRegistry:
+    """
+    Chooses an extractor for an upload.
+    
+    Dispatch uses the format detected from the file's leading bytes when
+    they are available, so a mislabelled upload is parsed by the right
+    extractor (or rejected) instead of failing inside the wrong one. Without
+    them it falls back to the filename extension.
+    """
+    
+    def __init__(self):
+        self._by_format: Dict[str, BaseExtractor] = {}
+        self._extractors: List[BaseExtractor] = []
+    
+    def register(self, extractor: BaseExtractor):
+        """
+        Register an extractor for the formats it declares.
+        
+        A later registration for the same format replaces the earlier one.
+        """
+        self._extractors.append(extractor)
+        for file_format in extractor.formats:
+            self._by_format[file_format] = extractor
+    
+    def for_format(self, file_format: str) -> Optional[BaseExtractor]:
+        """Get the extractor registered for a detected format."""
+        return self._by_format.get(file_format)
+    
+    def get(self, filename: str, head: Optional[bytes] = None) -> Optional[BaseExtractor]:
+        """
+        Find the extractor for an upload.
+        
+        Args:
+            filename: Name of the uploaded file
+            head: Optional leading bytes of the file used for format detection
+            
+        Returns:
+            The matching extractor, or None if the file type is not supported
+        """
+        if head is not None:
+            return self.for_format(detect_format(head, filename) or '')
+        for extractor in reversed(self._extractors):
+            if extractor.supports_format(filename):
+                return extractor
+        return None
+    
+    def supports_format(self, filename: str) -> bool:
+        """Check whether any registered extractor handles the filename."""
+        return any(extractor.supports_format(filename) for extractor in self._extractors)
+
+def default_registry(pdf_backend: Optional[str] = None,
+                     max_pages: Optional[int] = None,
+                     max_chars: Optional[int] = None) -> ExtractorRegistry:
+    """
+    Build the registry used by the services.
+    
+    Args:
+        pdf_backend: 'pymupdf' or 'pypdf2' (default: ``PDF_BACKEND`` environment
+            variable, then 'pymupdf'); falls back to PyPDF2 if PyMuPDF is missing
+        max_pages: Page budget passed to the PDF extractor
+        max_chars: Character budget passed to the PDF extractor
+        
+    Returns:
+        ExtractorRegistry with PDF, DOCX and, when pytesseract is installed,
+        JPEG/PNG OCR extractors (see ``OCR_MAX_PIXELS`` and ``OCR_LANG``)
+    """
+    from .pdf import PDFExtractor
+    
+    pdf_backend = (pdf_backend or os.getenv("PDF_BACKEND", "pymupdf")).lower()
+    if pdf_backend not in ('pymupdf', 'pypdf2'):
+        raise ValueError(f"Unknown PDF backend: {pdf_backend}")
+    
+    registry = ExtractorRegistry()
+    pdf_extractor = None
+    if pdf_backend == 'pymupdf':
+        try:
+            from .mupdf import PyMuPDFExtractor
+            pdf_extractor = PyMuPDFExtractor(max_pages=max_pages, max_chars=max_chars)
+        except ImportError:
+            logger.warning("PyMuPDF not installed; falling back to PyPDF2")
+    if pdf_extractor is None:
+        pdf_extractor = PDFExtractor(max_pages=max_pages, max_chars=max_chars)
+    registry.register(pdf_extractor)
+    
+    try:
+        from .word import DocxExtractor
+        registry.register(DocxExtractor())
+    except ImportError:
+        logger.warning("python-docx not installed; DOCX files are not supported")
+    
+    try:
+        from .image import ImageExtractor
+        registry.register(ImageExtractor(
+            max_pixels=int(os.getenv("OCR_MAX_PIXELS", "4000000")),
+            lang=os.getenv("OCR_LANG", "eng")
+        ))
+    except ImportError:
+        logger.warning("pytesseract not installed; JPEG/PNG files are not supported")
+    
+    return registry
@@ -0,0 +1,71 @@
+import os
+from typing import BinaryIO, Optional
+
+# Number of leading bytes needed to recognise every supported format
+SNIFF_BYTES = 8192
+
+# Largest accepted upload, per file
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_MB", "10")) * 1024 * 1024
+
+# Allowance for the multipart framing around a single uploaded file
+MULTIPART_OVERHEAD = 64 * 1024
+
+# (signature, format) pairs checked against the start of the file
+SIGNATURES = (
+    (b'\x89PNG\r\n\x1a\n', 'png'),
+    (b'\xff\xd8\xff', 'jpg'),
+    (b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1', 'doc'),  # OLE2 compound file
+    (b'PK\x03\x04', 'zip'),
+)
+
+def sniff_format(head: bytes) -> Optional[str]:
+    """
+    Detect a file's real format from its leading bytes.
+    
+    Args:
+        head: The first bytes of the file (``SNIFF_BYTES`` is enough)
+        
+    Returns:
+        One of 'pdf', 'docx', 'doc', 'png', 'jpg' or 'zip' (an unrecognised
+        zip container), or None if the format is unknown
+    """
+    # PDF readers accept junk before the header within the first 1KB
+    if b'%PDF-' in head[:1024]:
+        return 'pdf'
+    for signature, file_format in SIGNATURES:
+        if head.startswith(signature):
+            if file_format == 'zip' and b'word/' in head:
+                return 'docx'
+            return file_format
+    return None
+
+def detect_format(head: bytes, filename: Optional[str] = None) -> Optional[str]:
+    """
+    Detect a file's format from its content, using the filename only to
+    disambiguate zip containers whose Word parts lie beyond ``head``.
+    
+    Args:
+        head: The first bytes of the file
+        filename: Optional name of the uploaded file
+        
+    Returns:
+        The detected format (see ``sniff_format``), or None if unknown
+    """
+    file_format = sniff_format(head)
+    if file_format == 'zip' and filename and filename.lower().endswith('.docx'):
+        return 'docx'
+    return file_format
+
+def read_head(stream: BinaryIO, size: int = SNIFF_BYTES) -> bytes:
+    """Read the first bytes of a seekable stream without consuming them."""
+    position = stream.tell()
+    head = stream.read(size)
+    stream.seek(position)
+    return head
+
+def stream_size(stream: BinaryIO) -> int:
+    """Get the size of a seekable stream without reading it."""
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)
+    stream.seek(position)
+    return size
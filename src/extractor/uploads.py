@@ -0,0 +1,207 @@
+import hashlib
+import io
+import mmap
+import os
+import stat
+import sys
+import tempfile
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Optional
+
+from .sniff import SNIFF_BYTES
+
+# Uploads at least this large are spooled to disk instead of held in memory
+UPLOAD_SPOOL_BYTES = int(os.getenv("UPLOAD_SPOOL_KB", "1024")) * 1024
+
+# Directory for spooled uploads (default: the system temp directory)
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+
+# Bytes copied at a time while spooling
+BLOCK_SIZE = 1024 * 1024
+
+class SpooledUpload:
+    """
+    An upload body written to disk at most once.
+
+    Small bodies are kept as one bytes buffer; large ones live in a file,
+    which extraction workers open themselves (memory-mapped, or natively by
+    parsers that read files) so the document is never copied through the
+    parent process or pickled to a worker. That file is either the one the
+    web framework already spooled the body to, or a temporary file written
+    here. The content hash is computed while reading, so cache keys need no
+    second pass.
+
+    Instances are picklable and cheap to send to a worker when spooled.
+    Call ``close()`` (or use ``with``) to delete a spool file written here.
+    """
+
+    def __init__(self,
+                 size: int,
+                 head: bytes,
+                 digest: 'hashlib._Hash',
+                 data: Optional[bytes] = None,
+                 path: Optional[str] = None,
+                 owned: bool = True):
+        self.size = size
+        self.head = head
+        self.data = data
+        self.path = path
+        # Whether ``path`` is our spool file, rather than the request's own
+        self.owned = owned
+        self._digest = digest
+
+    def __getstate__(self) -> Dict[str, Any]:
+        # Hash objects cannot be pickled, and workers do not need them
+        state = dict(self.__dict__)
+        state['_digest'] = None
+        return state
+
+    def key(self, *parts: str) -> str:
+        """
+        Build the same cache key as ``content_key(data, *parts)``.
+
+        Args:
+            parts: Extra key components such as a model version
+        """
+        digest = self._digest.copy()
+        for part in parts:
+            digest.update(b'\0')
+            digest.update(str(part).encode('utf-8'))
+        return digest.hexdigest()
+
+    @contextmanager
+    def open(self) -> Iterator[BinaryIO]:
+        """Yield a read-only file-like view of the body without copying it."""
+        if self.path is None:
+            yield io.BytesIO(self.data)
+            return
+        with open(self.path, 'rb') as f:
+            if self.size == 0:
+                yield f
+                return
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as view:
+                yield view
+
+    def extract(self, extractor) -> Dict[str, Any]:
+        """Run an extractor over the body; spooled bodies are read from disk."""
+        if self.path is not None:
+            return extractor.extract_file(self.path)
+        return extractor.extract(io.BytesIO(self.data))
+
+    def close(self):
+        """Delete the spool file, if any was written here."""
+        if self.path is not None and self.owned:
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
+        self.path = None
+
+    def __enter__(self) -> 'SpooledUpload':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def disk_path(stream: BinaryIO) -> Optional[str]:
+    """
+    Find a path other processes can open for a stream already on disk.
+
+    Covers request files a web framework has rolled over to disk, using
+    only the public file interface: a SpooledTemporaryFile still in memory
+    has no ``name``, so it is never asked for a descriptor (which would
+    roll it over). Named files are found by their name; unnamed temporary
+    files through ``/proc`` on Linux. The path is valid while the stream
+    stays open.
+
+    Args:
+        stream: Upload stream, e.g. a SpooledTemporaryFile
+
+    Returns:
+        The path, or None if the body is in memory or cannot be reached by path
+    """
+    name = getattr(stream, 'name', None)
+    if name is None:
+        return None
+    try:
+        fd = stream.fileno()
+        info = os.fstat(fd)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+    if not stat.S_ISREG(info.st_mode):
+        return None
+    if isinstance(name, str):
+        return name if os.path.isfile(name) and os.path.samestat(os.stat(name), info) else None
+    if sys.platform.startswith('linux'):
+        return f"/proc/{os.getpid()}/fd/{fd}"
+    return None
+
+def spool_upload(stream: BinaryIO,
+                 spool_bytes: int = UPLOAD_SPOOL_BYTES,
+                 spool_dir: Optional[str] = UPLOAD_SPOOL_DIR) -> SpooledUpload:
+    """
+    Copy an upload stream at most once, hashing it on the way.
+
+    The stream is read from the start in fixed-size blocks. A body the
+    framework already spooled to disk is only hashed, and workers read that
+    file (see ``disk_path``); it must stay open until they are done. Other
+    bodies smaller than ``spool_bytes`` are joined into one buffer; larger
+    ones go to a temporary file in ``spool_dir``, so peak memory is one block.
+
+    Args:
+        stream: Seekable upload stream (e.g. a request's spooled file)
+        spool_bytes: Size from which the body is written to disk
+        spool_dir: Directory for the spool file
+
+    Returns:
+        The spooled upload
+    """
+    path = disk_path(stream)
+    if path is not None:
+        return _hash_in_place(stream, path)
+
+    stream.seek(0)
+    digest = hashlib.sha256()
+    blocks = []
+    size = 0
+    spool = None
+    try:
+        for block in iter(lambda: stream.read(BLOCK_SIZE), b''):
+            digest.update(block)
+            size += len(block)
+            if spool is None and size >= spool_bytes:
+                spool = tempfile.NamedTemporaryFile(prefix='upload-', dir=spool_dir, delete=False)
+                spool.writelines(blocks)
+                blocks = [b''.join(blocks)[:SNIFF_BYTES]]
+            if spool is not None:
+                spool.write(block)
+                if len(blocks[0]) < SNIFF_BYTES:
+                    blocks[0] += block[:SNIFF_BYTES - len(blocks[0])]
+            else:
+                blocks.append(block)
+    except BaseException:
+        if spool is not None:
+            spool.close()
+            os.unlink(spool.name)
+        raise
+    stream.seek(0)
+
+    if spool is None:
+        data = b''.join(blocks)
+        return SpooledUpload(size, data[:SNIFF_BYTES], digest, data=data)
+    spool.close()
+    return SpooledUpload(size, blocks[0], digest, path=spool.name)
+
+def _hash_in_place(stream: BinaryIO, path: str) -> SpooledUpload:
+    """Hash a stream that is already on disk and refer workers to its file."""
+    stream.seek(0)
+    digest = hashlib.sha256()
+    head = b''
+    size = 0
+    for block in iter(lambda: stream.read(BLOCK_SIZE), b''):
+        digest.update(block)
+        size += len(block)
+        if len(head) < SNIFF_BYTES:
+            head += block[:SNIFF_BYTES - len(head)]
+    stream.seek(0)
+    return SpooledUpload(size, head, digest, path=path, owned=False)
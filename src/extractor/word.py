@@ -0,0 +1,40 @@
+from typing import BinaryIO, Dict, Any
+import docx
+from .base import BaseExtractor
+
+class DocxExtractor(BaseExtractor):
+    """Extracts content from Word (DOCX) files."""
+    
+    formats = ('docx',)
+    version = f"1+python-docx-{getattr(docx, '__version__', '')}"
+    
+    def supports_format(self, filename: str) -> bool:
+        return filename.lower().endswith('.docx')
+    
+    def extract(self, file: BinaryIO) -> Dict[str, Any]:
+        try:
+            doc = docx.Document(file)
+            
+            text = '\n'.join(paragraph.text for paragraph in doc.paragraphs)
+            
+            # Get metadata
+            properties = doc.core_properties
+            metadata = {
+                'paragraph_count': len(doc.paragraphs),
+                'table_count': len(doc.tables),
+                'title': properties.title or '',
+                'author': properties.author or '',
+            }
+            
+            return {
+                'text': text.strip(),
+                'metadata': metadata,
+                'error': None
+            }
+        
+        except Exception as e:
+            return {
+                'text': '',
+                'metadata': {},
+                'error': f"Failed to extract DOCX content: {str(e)}"
+            }
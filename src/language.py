@@ -0,0 +1,285 @@
+import logging
+import os
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .cache import LRUCache, content_key
+
+logger = logging.getLogger(__name__)
+
+PROFILE_FORMAT_VERSION = 1
+SPACE = 32
+MAX_ORDER = 3
+
+# Hash seeds per n-gram order, the FNV-1a 64-bit prime, and the splitmix64 finalizer constant
+_SEEDS = np.array([0xcbf29ce484222325, 0x84222325cbf29ce4, 0x9ce484222325cbf2], dtype=np.uint64)
+_PRIME = np.uint64(0x100000001b3)
+_MIX = np.uint64(0xff51afd7ed558ccd)
+
+def _bucket(h: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Spread every input bit over the low bits of a hash and keep those."""
+    h = (h ^ (h >> np.uint64(33))) * _MIX
+    h ^= h >> np.uint64(33)
+    return (h & np.uint64(n_buckets - 1)).astype(np.intp)
+
+def hash_ngrams(chars: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Hash n-grams into buckets.
+
+    Args:
+        chars: Code points of shape (count, n), one n-gram per row
+        n_buckets: Number of buckets, a power of two
+
+    Returns:
+        Bucket of each n-gram
+    """
+    chars = np.asarray(chars, dtype=np.uint64)
+    h = np.full(len(chars), _SEEDS[chars.shape[1] - 1], dtype=np.uint64)
+    for column in range(chars.shape[1]):
+        h = (h ^ chars[:, column]) * _PRIME
+    return _bucket(h, n_buckets)
+
+def ngram_buckets(codes: np.ndarray, n_buckets: int) -> np.ndarray:
+    """
+    Bucket the 1- to 3-grams of normalized text, in text order.
+
+    N-grams do not span words: a space may only start or end one, as in
+    the word-padded n-grams of the profiles. Buckets match ``hash_ngrams``.
+
+    Args:
+        codes: Normalized code points with single spaces between words
+        n_buckets: Number of buckets
+
+    Returns:
+        Bucket ids, the unigram, bigram and trigram ending at each position in turn
+    """
+    chars = codes.astype(np.uint64)
+    length = len(chars)
+    hashes = np.zeros((length, MAX_ORDER), dtype=np.uint64)
+    valid = np.zeros((length, MAX_ORDER), dtype=bool)
+    # Rolling hashes: the n-gram ending at i extends the (n-1)-gram ending at i - 1
+    for n in range(1, min(MAX_ORDER, length) + 1):
+        h = (_SEEDS[n - 1] ^ chars[:length - n + 1]) * _PRIME
+        for i in range(1, n):
+            h = (h ^ chars[i:length - n + 1 + i]) * _PRIME
+        hashes[n - 1:, n - 1] = h
+    space = codes == SPACE
+    valid[:, 0] = ~space
+    valid[1:, 1] = True
+    valid[2:, 2] = ~space[1:-1]
+    return _bucket(hashes[valid], n_buckets)
+
+class LanguageDetector:
+    """
+    Identifies the language of a text from character n-gram statistics.
+
+    Only a bounded window of the text is read: ``samples`` evenly spaced
+    slices adding up to ``window`` characters. Its n-grams are hashed into
+    the buckets of a precomputed table of per-language log-probabilities
+    (see scripts/build_language_profiles.py) and summed a ``step`` at a
+    time, stopping as soon as the best language leads the next one by
+    ``evidence`` nats. Results are cached by a hash of the window.
+    """
+
+    def __init__(self,
+                 languages: Sequence[str],
+                 log_probs: np.ndarray,
+                 char_map: np.ndarray,
+                 window: int = 2048,
+                 samples: int = 4,
+                 step: int = 384,
+                 evidence: float = 30.0,
+                 min_ngrams: int = 20,
+                 cache_size: int = 4096):
+        """
+        Initialize the detector.
+
+        Args:
+            languages: Language code of each table column
+            log_probs: Array of shape (n_buckets, len(languages))
+            char_map: Normalized, lower-cased code point for each code point below its length
+            window: Characters read from a text
+            samples: Slices the window is split into, spread across the text
+            step: N-grams scored between evidence checks
+            evidence: Lead in log-likelihood at which scoring stops early
+            min_ngrams: Fewest known n-grams needed for an answer
+            cache_size: Results kept in the LRU cache (0 disables it)
+        """
+        n_buckets = len(log_probs)
+        if n_buckets & (n_buckets - 1):
+            raise ValueError("Number of buckets must be a power of two")
+        if log_probs.shape[1] != len(languages):
+            raise ValueError("Need one column per language")
+
+        self.languages = list(languages)
+        self.log_probs = np.ascontiguousarray(log_probs, dtype=np.float32)
+        # Buckets that score every language alike carry no evidence and are skipped
+        self.known = (self.log_probs != self.log_probs.min(axis=1, keepdims=True)).any(axis=1)
+        self.char_map = np.asarray(char_map, dtype=np.uint32)
+        self.window = window
+        self.samples = max(1, samples)
+        self.step = step
+        self.evidence = evidence
+        self.min_ngrams = min_ngrams
+        self.cache = LRUCache(max_size=cache_size) if cache_size else None
+
+    @classmethod
+    def load(cls, path: str, **kwargs) -> 'LanguageDetector':
+        """
+        Load a profile written by scripts/build_language_profiles.py.
+
+        Args:
+            path: ``.npz`` profile file
+            kwargs: Passed to the constructor
+
+        Returns:
+            The detector
+        """
+        with np.load(path, allow_pickle=False) as data:
+            version = int(data['format_version'])
+            if version != PROFILE_FORMAT_VERSION:
+                raise ValueError(f"Unsupported language profile format: {version}")
+            return cls([str(code) for code in data['languages']], data['log_probs'],
+                       data['char_map'], **kwargs)
+
+    @classmethod
+    def from_env(cls, default: Optional[str] = None) -> Optional['LanguageDetector']:
+        """
+        Load the profile named by ``LANGUAGE_PROFILES``, reading up to
+        ``LANGUAGE_WINDOW_CHARS`` (default 2048) characters per text.
+
+        Args:
+            default: Path used when the variable is unset
+
+        Returns:
+            The detector, or None if no profile file exists
+        """
+        path = os.getenv("LANGUAGE_PROFILES", default)
+        if not path or not os.path.exists(path):
+            return None
+        return cls.load(path, window=int(os.getenv("LANGUAGE_WINDOW_CHARS", "2048")))
+
+    def sample(self, text: str) -> str:
+        """
+        Select the window of text that is scored.
+
+        Args:
+            text: Full text
+
+        Returns:
+            ``samples`` slices joined by spaces; the whole text if it fits
+        """
+        if len(text) <= self.window:
+            return text
+        size = self.window // self.samples
+        stride = (len(text) - size) // max(self.samples - 1, 1)
+        return ' '.join(text[i * stride:i * stride + size] for i in range(self.samples))
+
+    def normalize(self, text: str) -> np.ndarray:
+        """
+        Map text to normalized code points.
+
+        Args:
+            text: Text to normalize
+
+        Returns:
+            Code points with runs of non-letters collapsed to one space,
+            starting and ending with a space
+        """
+        codes = np.frombuffer(text.encode('utf-32-le', errors='replace'), dtype=np.uint32)
+        inside = codes < len(self.char_map)
+        codes = np.where(inside, self.char_map[np.where(inside, codes, 0)], SPACE)
+        codes = np.concatenate(([SPACE], codes, [SPACE])).astype(np.uint32)
+        space = codes == SPACE
+        keep = np.ones(len(codes), dtype=bool)
+        keep[1:] = ~(space[1:] & space[:-1])
+        return codes[keep]
+
+    def scores(self, text: str) -> Tuple[np.ndarray, int]:
+        """
+        Score each language for the window of a text.
+
+        Args:
+            text: Text to score
+
+        Returns:
+            Tuple of (log-likelihood per language, known n-grams scored)
+        """
+        return self._score_window(self.sample(text))
+
+    def _score_window(self, window: str) -> Tuple[np.ndarray, int]:
+        """Sum n-gram log-probabilities until one language is clearly ahead."""
+        buckets = ngram_buckets(self.normalize(window), len(self.log_probs))
+        buckets = buckets[self.known[buckets]]
+        totals = np.zeros(len(self.languages), dtype=np.float32)
+        scored = 0
+        for start in range(0, len(buckets), self.step):
+            chunk = buckets[start:start + self.step]
+            totals += self.log_probs[chunk].sum(axis=0)
+            scored += len(chunk)
+            if len(totals) > 1 and scored >= self.min_ngrams:
+                second, best = np.partition(totals, -2)[-2:]
+                if best - second >= self.evidence:
+                    break
+        return totals, scored
+
+    def detect(self, text: str) -> str:
+        """
+        Detect the language of a text.
+
+        Args:
+            text: Text to identify
+
+        Returns:
+            Language code (e.g. "en"), or "unknown" if there is too little text
+        """
+        window = self.sample(text)
+        if not window.strip():
+            return "unknown"
+        key = content_key(window.encode('utf-8', errors='replace'))
+        if self.cache is not None:
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        totals, scored = self._score_window(window)
+        language = self.languages[int(totals.argmax())] if scored >= self.min_ngrams else "unknown"
+        if self.cache is not None:
+            self.cache.set(key, language)
+        return language
+
+    def cache_stats(self) -> Dict[str, int]:
+        """Get result cache hit/miss/eviction counters and size."""
+        return self.cache.stats() if self.cache is not None else {}
+
+def build_profile(profiles: Dict[str, Dict[str, object]],
+                  char_map: np.ndarray,
+                  n_buckets: int = 1 << 15,
+                  smoothing: float = 5e-5) -> Tuple[List[str], np.ndarray]:
+    """
+    Turn n-gram frequency profiles into a hashed log-probability table.
+
+    Args:
+        profiles: Per language, a dict with ``freq`` (n-gram -> count) and
+            ``n_words`` (total count per n-gram order), as in langdetect's profiles
+        char_map: Normalization applied to the n-grams, as at detection time
+        n_buckets: Number of hash buckets, a power of two
+        smoothing: Probability added to every bucket
+
+    Returns:
+        Tuple of (language codes, array of shape (n_buckets, languages))
+    """
+    languages = sorted(profiles)
+    probs = np.zeros((n_buckets, len(languages)), dtype=np.float64)
+    for column, language in enumerate(languages):
+        profile = profiles[language]
+        for n in range(1, MAX_ORDER + 1):
+            grams = [gram for gram in profile['freq'] if len(gram) == n]
+            if not grams:
+                continue
+            chars = np.array([[ord(char) for char in gram] for gram in grams], dtype=np.uint32)
+            chars = np.where(chars < len(char_map), char_map[np.minimum(chars, len(char_map) - 1)], SPACE)
+            counts = np.array([profile['freq'][gram] for gram in grams], dtype=np.float64)
+            np.add.at(probs[:, column], hash_ngrams(chars, n_buckets), counts / profile['n_words'][n - 1])
+    return languages, np.log(probs + smoothing)
@@ -0,0 +1,183 @@
+import os
+import threading
+from typing import Any, Callable, Dict, Iterator, Mapping, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+# Stages of the classify path, in the order a document passes through them
+STAGES = ('read', 'sniff', 'prescreen', 'extract', 'vectorize', 'predict', 'serialize')
+
+LATENCY_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+DOCUMENTS = Counter(
+    'classifier_documents_total',
+    'Documents handled, by predicted class and outcome '
+    '(success, cached, prescreened, rejected or error)',
+    ['file_class', 'outcome']
+)
+REQUEST_SECONDS = Histogram(
+    'classifier_request_seconds',
+    'End-to-end latency of classification requests',
+    ['endpoint', 'status'],
+    buckets=LATENCY_BUCKETS
+)
+STAGE_SECONDS = Histogram(
+    'classifier_stage_seconds',
+    'Time spent in each stage of the classify path, per call',
+    ['stage'],
+    buckets=LATENCY_BUCKETS
+)
+DOCUMENT_BYTES = Histogram(
+    'classifier_document_bytes',
+    'Size of uploaded documents',
+    buckets=tuple(2 ** n * 1024 for n in range(0, 16, 2))
+)
+DOCUMENT_PAGES = Histogram(
+    'classifier_document_pages',
+    'Page count of uploaded documents',
+    buckets=(1, 2, 3, 5, 10, 20, 50, 100, 500)
+)
+CASCADE_DECISIONS = Counter(
+    'classifier_cascade_decisions_total',
+    'Documents decided by each classification cascade tier; confident is '
+    '"false" when no tier reached its threshold and the best answer was used',
+    ['tier', 'confident']
+)
+CASCADE_TIER_SECONDS = Histogram(
+    'classifier_cascade_tier_seconds',
+    'Time spent in each classification cascade tier, per batch',
+    ['tier'],
+    buckets=LATENCY_BUCKETS
+)
+MODEL_LOAD_SECONDS = Gauge(
+    'classifier_model_load_seconds',
+    'Time taken to load the model artifacts',
+    multiprocess_mode='max'
+)
+
+def stage_timer(stage: str):
+    """
+    Time a block of the classify path.
+
+    Usable as a context manager or decorator, e.g.
+    ``with stage_timer('extract'): ...``.
+
+    Args:
+        stage: One of STAGES
+    """
+    return STAGE_SECONDS.labels(stage=stage).time()
+
+def count_document(file_class: str, outcome: str, count: int = 1):
+    """Count handled documents."""
+    DOCUMENTS.labels(file_class=file_class, outcome=outcome).inc(count)
+
+def tier_timer(tier: str):
+    """Time one batch of a classification cascade tier."""
+    return CASCADE_TIER_SECONDS.labels(tier=tier).time()
+
+def count_cascade_decision(tier: str, confident: bool):
+    """Count a document decided by a cascade tier."""
+    CASCADE_DECISIONS.labels(tier=tier, confident=str(confident).lower()).inc()
+
+def observe_document(size: int, metadata: Mapping[str, Any] = None):
+    """
+    Record an upload's size and, when the extractor reports it, its page count.
+
+    Args:
+        size: Upload size in bytes
+        metadata: Extractor metadata, if the document was extracted
+    """
+    if size is not None:
+        DOCUMENT_BYTES.observe(size)
+    if metadata and metadata.get('page_count') is not None:
+        DOCUMENT_PAGES.observe(metadata['page_count'])
+
+def observe_request(endpoint: str, status: int, seconds: float):
+    """Record the latency and status of one request."""
+    REQUEST_SECONDS.labels(endpoint=endpoint, status=str(status)).observe(seconds)
+
+class StatsCollector:
+    """
+    Exposes ``stats()`` snapshots (cache, batcher) as gauges.
+
+    Numeric values become ``<source>_<key>`` gauges; nested dicts are
+    flattened, and dicts keyed by integers (histograms) become a single
+    gauge labelled by ``bucket``.
+    """
+
+    def __init__(self):
+        self._sources: Dict[str, Callable[[], Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+
+    def add(self, name: str, stats_fn: Callable[[], Dict[str, Any]]):
+        """Register a stats source, replacing any source of the same name."""
+        with self._lock:
+            self._sources[name] = stats_fn
+
+    def collect(self) -> Iterator[GaugeMetricFamily]:
+        with self._lock:
+            sources = list(self._sources.items())
+        for name, stats_fn in sources:
+            for metric_name, value in _flatten(name, stats_fn()):
+                if isinstance(value, dict):
+                    gauge = GaugeMetricFamily(metric_name, f"{metric_name} by bucket", labels=['bucket'])
+                    for bucket, count in sorted(value.items()):
+                        gauge.add_metric([str(bucket)], count)
+                else:
+                    gauge = GaugeMetricFamily(metric_name, metric_name, value=value)
+                yield gauge
+
+def _flatten(prefix: str, stats: Mapping[str, Any]) -> Iterator[Tuple[str, Any]]:
+    for key, value in stats.items():
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            if value and all(isinstance(bucket, int) for bucket in value):
+                yield name, value
+            else:
+                yield from _flatten(name, value)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            yield name, value
+
+stats_collector = StatsCollector()
+REGISTRY.register(stats_collector)
+
+def register_stats(name: str, stats_fn: Callable[[], Dict[str, Any]]):
+    """
+    Publish a component's ``stats()`` on /metrics.
+
+    Args:
+        name: Metric name prefix, e.g. ``result_cache``
+        stats_fn: Callable returning the component's stats dict
+    """
+    stats_collector.add(name, stats_fn)
+
+def render_metrics() -> Tuple[bytes, str]:
+    """
+    Render every metric in the Prometheus text format.
+
+    When ``PROMETHEUS_MULTIPROC_DIR`` is set (e.g. under gunicorn), metrics
+    from all worker processes are aggregated; per-process stats gauges are
+    not included in that mode.
+
+    Returns:
+        Tuple of (payload, content_type)
+    """
+    if os.getenv('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
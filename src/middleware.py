@@ -0,0 +1,80 @@
+from typing import Mapping, Optional
+
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+class BodySizeLimitMiddleware:
+    """
+    ASGI middleware that refuses request bodies over a size limit.
+
+    Requests that declare a larger Content-Length are answered with 413
+    before any of the body is read; bodies without a declared length are
+    counted as they stream in. Once one passes the limit the middleware
+    sends the 413 itself, and the app is told the client disconnected so
+    it stops reading; whatever the app does after that is discarded, so a
+    form parser cannot turn the cut-off body into a 400.
+    """
+
+    def __init__(self, app: ASGIApp, max_body_bytes: int,
+                 path_limits: Optional[Mapping[str, int]] = None):
+        """
+        Initialize the middleware.
+
+        Args:
+            app: The wrapped ASGI app
+            max_body_bytes: Largest body accepted on any path
+            path_limits: Smaller limits for specific paths, e.g. single-file uploads
+        """
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        self.path_limits = dict(path_limits or {})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        limit = min(self.max_body_bytes, self.path_limits.get(scope.get('path'), self.max_body_bytes))
+        headers = dict(scope.get('headers') or [])
+        content_length = headers.get(b'content-length')
+        if content_length is not None and content_length.isdigit() \
+                and int(content_length) > limit:
+            await self._reject(scope, receive, send)
+            return
+
+        received = 0
+        response_started = False
+        rejected = False
+
+        async def limited_receive() -> Message:
+            nonlocal received, rejected
+            if rejected:
+                return {'type': 'http.disconnect'}
+            message = await receive()
+            if message['type'] == 'http.request':
+                received += len(message.get('body', b''))
+                if received > limit:
+                    if not response_started:
+                        await self._reject(scope, receive, send)
+                    rejected = True
+                    return {'type': 'http.disconnect'}
+            return message
+
+        async def tracked_send(message: Message):
+            nonlocal response_started
+            if rejected:
+                return
+            if message['type'] == 'http.response.start':
+                response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, tracked_send)
+        except Exception:
+            # The app failed on the body it was denied; the 413 is already sent
+            if not rejected:
+                raise
+
+    async def _reject(self, scope: Scope, receive: Receive, send: Send):
+        response = JSONResponse({"detail": "Request too large"}, status_code=413)
+        await response(scope, receive, send)
@@ -2,6 +2,6 @@
 Model package for document classification
 """
 
-from .classifier import DocumentClassifier
+from .classifier import DocumentClassifier, load_classifier
 
-__all__ = ['DocumentClassifier']
+__all__ = ['DocumentClassifier', 'load_classifier']
@@ -0,0 +1,116 @@
+import re
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+DEFAULT_TOKEN_PATTERN = r"(?u)\b\w\w+\b"
+
+class WordAnalyzer:
+    """
+    Splits text into word n-grams.
+
+    Matches scikit-learn's ``word`` analyzer with a regex tokenizer:
+    lowercase, tokenize, drop stop words, then append n-grams of the
+    remaining tokens.
+    """
+
+    def __init__(self,
+                 token_pattern: str = DEFAULT_TOKEN_PATTERN,
+                 stop_words: Iterable[str] = (),
+                 ngram_range: Tuple[int, int] = (1, 1),
+                 lowercase: bool = True):
+        """
+        Initialize the analyzer.
+
+        Args:
+            token_pattern: Regular expression matching one token
+            stop_words: Tokens dropped before n-grams are built
+            ngram_range: Smallest and largest n-gram length
+            lowercase: Lowercase text before tokenizing
+        """
+        self.token_pattern = token_pattern
+        self.stop_words = frozenset(stop_words)
+        self.ngram_range = tuple(ngram_range)
+        self.lowercase = lowercase
+        self._token_re = re.compile(token_pattern)
+
+    def __call__(self, text: str) -> List[str]:
+        if self.lowercase:
+            text = text.lower()
+        tokens = [token for token in self._token_re.findall(text) if token not in self.stop_words]
+
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+
+        # Same n-gram order as scikit-learn's _word_ngrams
+        original_tokens = tokens
+        tokens = list(original_tokens) if min_n == 1 else []
+        min_n = max(min_n, 2)
+        for n in range(min_n, min(max_n + 1, len(original_tokens) + 1)):
+            for i in range(len(original_tokens) - n + 1):
+                tokens.append(" ".join(original_tokens[i:i + n]))
+        return tokens
+
+    def config(self) -> Dict[str, object]:
+        """Describe the analyzer, e.g. for a bundle manifest."""
+        return {
+            'token_pattern': self.token_pattern,
+            'stop_words': sorted(self.stop_words),
+            'ngram_range': list(self.ngram_range),
+            'lowercase': self.lowercase,
+        }
+
+def tfidf_matrix(documents: Sequence[np.ndarray],
+                 idf: np.ndarray,
+                 n_features: int,
+                 norm: Optional[str] = 'l2',
+                 sublinear_tf: bool = False,
+                 binary: bool = False) -> sparse.csr_matrix:
+    """
+    Count features per document, weight them by idf and normalize each row.
+
+    Follows scikit-learn's TfidfTransformer; features whose idf is 0 are
+    left out of the result.
+
+    Args:
+        documents: One array per document holding the feature index of
+            every term occurrence
+        idf: Inverse document frequency of each feature
+        n_features: Width of the matrix
+        norm: Row normalization, 'l2', 'l1' or None
+        sublinear_tf: Replace counts with 1 + log(count)
+        binary: Replace counts with 1
+
+    Returns:
+        (len(documents), n_features) sparse matrix
+    """
+    indptr = np.zeros(len(documents) + 1, dtype=np.int64)
+    columns = [np.zeros(0, dtype=np.int64)]
+    counts = [np.zeros(0, dtype=np.int64)]
+    for row, features in enumerate(documents):
+        row_columns, row_counts = np.unique(features, return_counts=True)
+        keep = idf[row_columns] != 0
+        columns.append(row_columns[keep])
+        counts.append(row_counts[keep])
+        indptr[row + 1] = indptr[row] + np.count_nonzero(keep)
+
+    indices = np.concatenate(columns)
+    tf = np.concatenate(counts).astype(np.float64)
+    if binary:
+        tf[:] = 1.0
+    if sublinear_tf:
+        tf = np.log(tf) + 1.0
+    data = tf * idf[indices]
+
+    if norm in ('l1', 'l2'):
+        rows = np.repeat(np.arange(len(documents)), np.diff(indptr))
+        if norm == 'l2':
+            scale = np.sqrt(np.bincount(rows, weights=data * data, minlength=len(documents)))
+        else:
+            scale = np.bincount(rows, weights=np.abs(data), minlength=len(documents))
+        scale[scale == 0] = 1.0
+        data /= scale[rows]
+
+    return sparse.csr_matrix((data, indices.astype(np.int32), indptr), shape=(len(documents), n_features))
@@ -0,0 +1,239 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, Iterable, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from .analysis import DEFAULT_TOKEN_PATTERN, WordAnalyzer, tfidf_matrix
+from .forest import TreeEnsemble
+from .hashing import HashingTfidfVectorizer
+
+# Bumped whenever the on-disk layout changes incompatibly
+BUNDLE_FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+class BundleVectorizer:
+    """
+    TF-IDF featurizer restored from a model bundle.
+
+    Reproduces scikit-learn's ``TfidfVectorizer.transform`` for word
+    analyzers using a regex tokenizer, without importing scikit-learn.
+    """
+
+    def __init__(self,
+                 vocabulary: np.ndarray,
+                 idf: np.ndarray,
+                 token_pattern: str = DEFAULT_TOKEN_PATTERN,
+                 stop_words: Iterable[str] = (),
+                 ngram_range: Tuple[int, int] = (1, 1),
+                 lowercase: bool = True,
+                 norm: str = 'l2',
+                 sublinear_tf: bool = False,
+                 binary: bool = False):
+        """
+        Initialize the featurizer.
+
+        Args:
+            vocabulary: Terms, ordered by feature index
+            idf: Inverse document frequency of each feature
+            token_pattern: Regular expression matching one token
+            stop_words: Tokens dropped before n-grams are built
+            ngram_range: Smallest and largest n-gram length
+            lowercase: Lowercase text before tokenizing
+            norm: Row normalization, 'l2', 'l1' or None
+            sublinear_tf: Replace term counts with 1 + log(count)
+            binary: Replace term counts with 1
+        """
+        self.vocabulary = vocabulary
+        self.vocabulary_ = {str(term): index for index, term in enumerate(vocabulary)}
+        self.idf_ = idf
+        self.analyzer = WordAnalyzer(token_pattern, stop_words, ngram_range, lowercase)
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+
+    def get_feature_names_out(self) -> np.ndarray:
+        return np.asarray(self.vocabulary, dtype=object)
+
+    def transform(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """
+        Convert texts to TF-IDF feature rows.
+
+        Args:
+            texts: Document texts
+
+        Returns:
+            (len(texts), n_features) sparse matrix
+        """
+        vocabulary = self.vocabulary_
+        documents = [
+            np.fromiter((vocabulary[term] for term in self.analyzer(text) if term in vocabulary), dtype=np.int64)
+            for text in texts
+        ]
+        return tfidf_matrix(documents, self.idf_, len(self.vocabulary_),
+                            self.norm, self.sublinear_tf, self.binary)
+
+class BundleLabels:
+    """Maps class indices back to class names, like a fitted LabelEncoder."""
+
+    def __init__(self, classes: Sequence[str]):
+        self.classes_ = np.asarray(classes, dtype=object)
+
+    def inverse_transform(self, indices) -> np.ndarray:
+        return self.classes_[np.asarray(indices)]
+
+def _featurizer(vectorizer) -> Tuple[Dict[str, Any], Dict[str, np.ndarray]]:
+    """
+    Describe a fitted featurizer and collect its arrays.
+
+    Returns:
+        Tuple of (manifest entry, arrays to save)
+    """
+    if isinstance(vectorizer, HashingTfidfVectorizer):
+        return vectorizer.config(), {'idf': np.asarray(vectorizer.idf_, dtype=np.float64)}
+
+    arrays = {
+        'vocabulary': np.asarray(vectorizer.get_feature_names_out(), dtype=str),
+        'idf': np.asarray(vectorizer.idf_, dtype=np.float64),
+    }
+    return _vectorizer_config(vectorizer), arrays
+
+def _vectorizer_config(vectorizer) -> Dict[str, Any]:
+    """Describe a fitted TfidfVectorizer, rejecting settings the bundle cannot reproduce."""
+    params = vectorizer.get_params()
+    unsupported = [
+        name for name, supported in (
+            ('analyzer', params['analyzer'] == 'word'),
+            ('tokenizer', params['tokenizer'] is None),
+            ('preprocessor', params['preprocessor'] is None),
+            ('strip_accents', params['strip_accents'] is None),
+            ('use_idf', params['use_idf']),
+        ) if not supported
+    ]
+    if unsupported:
+        raise ValueError(f"Vectorizer settings not supported by model bundles: {', '.join(unsupported)}")
+
+    return {
+        'type': 'tfidf',
+        'token_pattern': params['token_pattern'],
+        'stop_words': sorted(vectorizer.get_stop_words() or ()),
+        'ngram_range': list(params['ngram_range']),
+        'lowercase': params['lowercase'],
+        'norm': params['norm'],
+        'sublinear_tf': params['sublinear_tf'],
+        'binary': params['binary'],
+    }
+
+def _arrays_digest(arrays: Dict[str, np.ndarray], *parts: str) -> str:
+    digest = hashlib.sha256()
+    for name in sorted(arrays):
+        digest.update(name.encode('utf-8'))
+        digest.update(np.ascontiguousarray(arrays[name]).tobytes())
+    for part in parts:
+        digest.update(part.encode('utf-8'))
+    return digest.hexdigest()[:16]
+
+def save_bundle(classifier, path: str) -> Dict[str, Any]:
+    """
+    Write a trained DocumentClassifier as a model bundle.
+
+    The bundle is a directory holding ``manifest.json`` and one ``.npy``
+    file per array, so loading needs neither pickle nor scikit-learn and
+    the arrays can be memory-mapped and shared between processes.
+
+    Args:
+        classifier: Trained DocumentClassifier
+        path: Directory to write, created if needed
+
+    Returns:
+        The manifest that was written
+    """
+    if isinstance(classifier.model, TreeEnsemble):
+        # Columns already follow the label encoder's classes
+        forest = classifier.model
+        classes = [str(label) for label in classifier.label_encoder.classes_]
+    else:
+        forest = TreeEnsemble.from_sklearn(classifier.model)
+        classes = [str(label) for label in classifier.label_encoder.classes_[classifier.model.classes_]]
+    featurizer, arrays = _featurizer(classifier.vectorizer)
+    arrays.update(forest.arrays())
+
+    os.makedirs(path, exist_ok=True)
+    layout = {}
+    for name, array in arrays.items():
+        filename = f"{name}.npy"
+        np.save(os.path.join(path, filename), array, allow_pickle=False)
+        layout[name] = {'file': filename, 'dtype': array.dtype.str, 'shape': list(array.shape)}
+
+    manifest = {
+        'format_version': BUNDLE_FORMAT_VERSION,
+        'model_version': _arrays_digest(arrays, json.dumps(featurizer, sort_keys=True), *classes),
+        'source_version': getattr(classifier, 'version', None),
+        'classes': classes,
+        'featurizer': featurizer,
+        'forest': {
+            'n_trees': forest.n_trees,
+            'n_nodes': int(forest.offsets[-1]),
+            'n_features': forest.n_features,
+        },
+        'arrays': layout,
+    }
+    with open(os.path.join(path, MANIFEST_NAME), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def read_manifest(path: str) -> Dict[str, Any]:
+    """Read and check a bundle's manifest."""
+    with open(os.path.join(path, MANIFEST_NAME)) as f:
+        manifest = json.load(f)
+    if manifest.get('format_version') != BUNDLE_FORMAT_VERSION:
+        raise ValueError(
+            f"Unsupported model bundle format {manifest.get('format_version')} "
+            f"(expected {BUNDLE_FORMAT_VERSION})"
+        )
+    return manifest
+
+def load_bundle(path: str, mmap: bool = True) -> Tuple[Any, TreeEnsemble, BundleLabels, Dict[str, Any]]:
+    """
+    Load a model bundle.
+
+    Args:
+        path: Bundle directory
+        mmap: Memory-map the arrays read-only instead of reading them into memory
+
+    Returns:
+        Tuple of (vectorizer, forest, labels, manifest); the vectorizer is a
+        BundleVectorizer or HashingTfidfVectorizer depending on the bundle
+    """
+    manifest = read_manifest(path)
+
+    arrays = {}
+    for name, spec in manifest['arrays'].items():
+        array = np.load(os.path.join(path, spec['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+        if array.dtype.str != spec['dtype'] or list(array.shape) != spec['shape']:
+            raise ValueError(f"Model bundle array {name} does not match its manifest")
+        arrays[name] = array
+
+    featurizer = manifest['featurizer']
+    options = {
+        'token_pattern': featurizer['token_pattern'],
+        'stop_words': featurizer['stop_words'],
+        'ngram_range': featurizer['ngram_range'],
+        'lowercase': featurizer['lowercase'],
+        'norm': featurizer['norm'],
+        'sublinear_tf': featurizer['sublinear_tf'],
+        'binary': featurizer['binary'],
+    }
+    if featurizer['type'] == 'tfidf':
+        vectorizer = BundleVectorizer(vocabulary=arrays['vocabulary'], idf=arrays['idf'], **options)
+    elif featurizer['type'] == 'hashing' and featurizer.get('hash') == 'crc32':
+        vectorizer = HashingTfidfVectorizer(n_features=featurizer['n_features'], idf=arrays['idf'], **options)
+    else:
+        raise ValueError(f"Unsupported featurizer: {featurizer['type']}")
+    forest = TreeEnsemble(
+        n_features=manifest['forest']['n_features'],
+        **{name: arrays[name] for name in TreeEnsemble.ARRAYS}
+    )
+    return vectorizer, forest, BundleLabels(manifest['classes']), manifest
@@ -1,27 +1,50 @@
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Tuple
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.preprocessing import LabelEncoder
-from sklearn.model_selection import train_test_split
-from sklearn.utils import class_weight
-import joblib
+import hashlib
 import logging
+import os
+import time
+
+from ..metrics import MODEL_LOAD_SECONDS, stage_timer
+from .bundle import load_bundle, save_bundle
+from .forest import TreeEnsemble
+
+# scikit-learn and joblib are imported where they are needed, so a
+# classifier loaded from a model bundle never imports them
 
 logger = logging.getLogger(__name__)
 
+# Model artifacts shipped with the repository
+DEFAULT_MODELS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "models")
+
+# Variables naming joblib artifacts; setting any of them selects the joblib model
+JOBLIB_PATH_VARIABLES = ("MODEL_PATH", "VECTORIZER_PATH", "LABEL_ENCODER_PATH")
+
 class DocumentClassifier:
     """Document classifier using TF-IDF and RandomForest."""
     
-    def __init__(self):
-        self.vectorizer = TfidfVectorizer(
+    def __init__(self, vectorizer=None, model=None, label_encoder=None):
+        """
+        Initialize the classifier.
+        
+        Args:
+            vectorizer: Fitted featurizer; an untrained TfidfVectorizer by default
+            model: Fitted model; an untrained RandomForestClassifier by default
+            label_encoder: Fitted label mapping; an untrained LabelEncoder by default
+        """
+        if vectorizer is None or model is None or label_encoder is None:
+            from sklearn.feature_extraction.text import TfidfVectorizer
+            from sklearn.ensemble import RandomForestClassifier
+            from sklearn.preprocessing import LabelEncoder
+        
+        self.vectorizer = vectorizer if vectorizer is not None else TfidfVectorizer(
             max_features=1000,
             stop_words='english',
             ngram_range=(1, 2),
             min_df=2,  # Ignore terms that appear in less than 2 documents
             max_df=0.9  # Ignore terms that appear in more than 90% of documents
         )
-        self.model = RandomForestClassifier(
+        self.model = model if model is not None else RandomForestClassifier(
             n_estimators=100,
             max_depth=None,
             min_samples_split=2,
@@ -29,7 +52,9 @@ class DocumentClassifier:
             class_weight='balanced',  # Handle imbalanced classes
             n_jobs=-1
         )
-        self.label_encoder = LabelEncoder()
+        self.label_encoder = label_encoder if label_encoder is not None else LabelEncoder()
+        # Identifies the loaded artifacts, e.g. for keying cached results
+        self.version = None
         
     def train(self, 
              texts: List[str], 
@@ -52,6 +77,9 @@ class DocumentClassifier:
         if len(set(labels)) < 2:
             raise ValueError("Need at least 2 different classes for training")
         
+        from sklearn.model_selection import train_test_split
+        from sklearn.utils import class_weight
+        
         # Convert texts to TF-IDF features
         X = self.vectorizer.fit_transform(texts)
         
@@ -108,32 +136,150 @@ class DocumentClassifier:
         Returns:
             Tuple of (predicted_class, confidence)
         """
+        return self.predict_batch([text])[0]
+    
+    def predict_batch(self, texts: List[str]) -> List[Tuple[str, float]]:
+        """
+        Predict document classes for many texts at once.
+        
+        The vectorizer and the model are each called a single time for
+        the whole batch, which avoids paying the per-call overhead once
+        per document.
+        
+        Args:
+            texts: List of document texts
+            
+        Returns:
+            List of (predicted_class, confidence) tuples, in input order
+        """
         if not hasattr(self, 'model') or self.model is None:
             raise RuntimeError("Model not trained")
+        
+        if not texts:
+            return []
             
-        # Convert text to TF-IDF features
-        X = self.vectorizer.transform([text])
+        # Convert texts to TF-IDF features
+        with stage_timer('vectorize'):
+            X = self.vectorizer.transform(texts)
         
         # Get class probabilities
-        probs = self.model.predict_proba(X)[0]
+        with stage_timer('predict'):
+            probs = self.model.predict_proba(X)
         
-        # Get predicted class and confidence
-        pred_idx = np.argmax(probs)
-        confidence = float(probs[pred_idx])
-        pred_class = self.label_encoder.inverse_transform([pred_idx])[0]
+        # Get predicted classes and confidences
+        pred_idx = np.argmax(probs, axis=1)
+        confidences = probs[np.arange(len(texts)), pred_idx]
+        pred_classes = self.label_encoder.inverse_transform(pred_idx)
         
-        return pred_class, confidence
+        return [
+            (pred_class, float(confidence))
+            for pred_class, confidence in zip(pred_classes, confidences)
+        ]
+    
+    def compile(self) -> 'DocumentClassifier':
+        """
+        Replace the scikit-learn forest with the NumPy TreeEnsemble.
+        
+        Probabilities are identical, but prediction runs in the calling
+        thread without joblib's per-call parallelism overhead.
+        
+        Returns:
+            This classifier
+        """
+        if not isinstance(self.model, TreeEnsemble):
+            self.model = TreeEnsemble.from_sklearn(self.model)
+        return self
     
     def save(self, model_path: str, vectorizer_path: str, label_encoder_path: str):
         """Save the model components."""
         if not hasattr(self, 'model') or self.model is None:
             raise RuntimeError("Model not trained")
+        import joblib
         joblib.dump(self.model, model_path)
         joblib.dump(self.vectorizer, vectorizer_path)
         joblib.dump(self.label_encoder, label_encoder_path)
     
     def load(self, model_path: str, vectorizer_path: str, label_encoder_path: str):
         """Load the model components."""
+        import joblib
+        start = time.perf_counter()
         self.model = joblib.load(model_path)
         self.vectorizer = joblib.load(vectorizer_path)
-        self.label_encoder = joblib.load(label_encoder_path) 
\ No newline at end of file
+        self.label_encoder = joblib.load(label_encoder_path)
+        
+        digest = hashlib.sha256()
+        for path in (model_path, vectorizer_path, label_encoder_path):
+            with open(path, 'rb') as f:
+                digest.update(f.read())
+        self.version = digest.hexdigest()[:16]
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - start) 
+    
+    def save_bundle(self, path: str) -> Dict[str, Any]:
+        """
+        Save the trained components as a model bundle.
+        
+        Args:
+            path: Bundle directory
+            
+        Returns:
+            The bundle manifest
+        """
+        if not hasattr(self, 'model') or self.model is None:
+            raise RuntimeError("Model not trained")
+        return save_bundle(self, path)
+    
+    @classmethod
+    def from_bundle(cls, path: str, mmap: bool = True) -> 'DocumentClassifier':
+        """
+        Load a classifier from a model bundle.
+        
+        Unlike ``load``, this does not unpickle anything or import
+        scikit-learn, and with ``mmap`` the model arrays are shared
+        between processes that load the same bundle.
+        
+        Args:
+            path: Bundle directory
+            mmap: Memory-map the model arrays
+            
+        Returns:
+            Ready-to-use DocumentClassifier
+        """
+        start = time.perf_counter()
+        vectorizer, forest, labels, manifest = load_bundle(path, mmap=mmap)
+        classifier = cls(vectorizer=vectorizer, model=forest, label_encoder=labels)
+        classifier.version = manifest['model_version']
+        MODEL_LOAD_SECONDS.set(time.perf_counter() - start)
+        return classifier
+
+def load_classifier(models_dir: str = DEFAULT_MODELS_DIR) -> DocumentClassifier:
+    """
+    Load the classifier the way the services and the command line do.
+
+    The joblib artifacts (``MODEL_PATH``, ``VECTORIZER_PATH`` and
+    ``LABEL_ENCODER_PATH``, by default in ``models_dir``) are loaded when
+    any of those variables is set, unless ``MODEL_BUNDLE`` is set too.
+    Otherwise the bundle (``MODEL_BUNDLE``, default ``<models_dir>/bundle``)
+    is preferred when it exists. Joblib models are compiled to the NumPy
+    forest unless ``MODEL_BACKEND`` is ``sklearn``.
+
+    Args:
+        models_dir: Directory holding the model artifacts
+
+    Returns:
+        The loaded classifier
+    """
+    joblib_override = any(os.getenv(name) for name in JOBLIB_PATH_VARIABLES)
+    bundle_path = os.getenv("MODEL_BUNDLE")
+    if bundle_path is None and not joblib_override:
+        bundle_path = os.path.join(models_dir, "bundle")
+    if bundle_path and os.path.isdir(bundle_path):
+        return DocumentClassifier.from_bundle(bundle_path)
+    classifier = DocumentClassifier()
+    classifier.load(
+        os.getenv("MODEL_PATH", os.path.join(models_dir, "classifier.joblib")),
+        os.getenv("VECTORIZER_PATH", os.path.join(models_dir, "vectorizer.joblib")),
+        os.getenv("LABEL_ENCODER_PATH", os.path.join(models_dir, "label_encoder.joblib"))
+    )
+    if os.getenv("MODEL_BACKEND", "numpy") == "numpy":
+        classifier.compile()
+    return classifier
@@ -0,0 +1,205 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+
+class TreeEnsemble:
+    """
+    Random forest stored as flat node arrays.
+
+    The nodes of every tree are laid out back to back; ``offsets[i]`` is the
+    index of tree i's root and child indices are absolute, with -1 marking a
+    leaf. ``value`` holds each node's class distribution normalized to sum
+    to 1, so ``predict_proba`` is the mean of the leaf rows reached in each
+    tree, exactly as in scikit-learn.
+
+    Prediction walks every tree for every sample at once, one tree level
+    per step, over a dense matrix holding only the features the trees
+    actually test. It runs in the calling thread with no joblib overhead.
+    """
+
+    ARRAYS = ('children_left', 'children_right', 'feature', 'threshold', 'value', 'offsets')
+
+    def __init__(self,
+                 children_left: np.ndarray,
+                 children_right: np.ndarray,
+                 feature: np.ndarray,
+                 threshold: np.ndarray,
+                 value: np.ndarray,
+                 offsets: np.ndarray,
+                 n_features: int):
+        """
+        Initialize the ensemble from its node arrays.
+
+        Args:
+            children_left: Absolute index of each node's left child, or -1
+            children_right: Absolute index of each node's right child, or -1
+            feature: Feature tested at each node
+            threshold: Samples with ``x[feature] <= threshold`` go left
+            value: (n_nodes, n_classes) class distribution of each node
+            offsets: Root index of each tree, followed by the total node count
+            n_features: Number of input features
+        """
+        self.children_left = children_left
+        self.children_right = children_right
+        self.feature = feature
+        self.threshold = threshold
+        self.value = value
+        self.offsets = offsets
+        self.n_features = n_features
+        self._compile()
+
+    def _compile(self):
+        """Derive the arrays used for traversal from the stored node arrays."""
+        internal = self.children_left != -1
+
+        # Compact column of each tested feature; -1 for features no node tests
+        self.used_features = np.unique(self.feature[internal])
+        self._column = np.full(self.n_features, -1, dtype=np.int64)
+        self._column[self.used_features] = np.arange(len(self.used_features))
+        self._node_column = np.where(internal, self._column[np.where(internal, self.feature, 0)], 0)
+
+        # Leaves point at themselves so finished trees stay put while others descend
+        nodes = np.arange(len(self.children_left))
+        self._left = np.where(internal, self.children_left, nodes)
+        self._right = np.where(internal, self.children_right, nodes)
+        self._is_leaf = ~internal
+        self._roots = np.asarray(self.offsets[:-1], dtype=np.int64)
+
+    @property
+    def n_trees(self) -> int:
+        return len(self.offsets) - 1
+
+    @property
+    def n_classes(self) -> int:
+        return self.value.shape[1]
+
+    @classmethod
+    def from_sklearn(cls, model, n_classes: Optional[int] = None) -> 'TreeEnsemble':
+        """
+        Flatten a fitted scikit-learn RandomForestClassifier.
+
+        Args:
+            model: Fitted single-output RandomForestClassifier
+            n_classes: Total number of classes when the forest was fitted on
+                integer-encoded labels that may not include every class; each
+                class's probabilities go to the column given by its label
+
+        Returns:
+            TreeEnsemble producing the same probabilities
+        """
+        if getattr(model, 'n_outputs_', 1) != 1:
+            raise ValueError("Only single-output forests are supported")
+
+        left, right, feature, threshold, value = [], [], [], [], []
+        offsets = [0]
+        for estimator in model.estimators_:
+            tree = estimator.tree_
+            offset = offsets[-1]
+            left.append(np.where(tree.children_left == -1, -1, tree.children_left + offset))
+            right.append(np.where(tree.children_right == -1, -1, tree.children_right + offset))
+            feature.append(tree.feature)
+            threshold.append(tree.threshold)
+
+            # Older scikit-learn versions store weighted counts; normalize per node
+            node_value = tree.value[:, 0, :].astype(np.float64)
+            totals = node_value.sum(axis=1, keepdims=True)
+            totals[totals == 0] = 1.0
+            node_value = node_value / totals
+            if n_classes is not None:
+                expanded = np.zeros((len(node_value), n_classes))
+                expanded[:, model.classes_.astype(np.int64)] = node_value
+                node_value = expanded
+            value.append(node_value)
+            offsets.append(offset + tree.node_count)
+
+        return cls(
+            children_left=np.concatenate(left).astype(np.int32),
+            children_right=np.concatenate(right).astype(np.int32),
+            feature=np.concatenate(feature).astype(np.int32),
+            threshold=np.concatenate(threshold).astype(np.float64),
+            value=np.concatenate(value),
+            offsets=np.asarray(offsets, dtype=np.int64),
+            n_features=model.n_features_in_
+        )
+
+    @classmethod
+    def concatenate(cls, ensembles: Sequence['TreeEnsemble']) -> 'TreeEnsemble':
+        """
+        Combine ensembles over the same features and classes into one forest.
+
+        The result averages over every tree, as if they had been fitted as
+        a single forest.
+        """
+        if not ensembles:
+            raise ValueError("Need at least one ensemble")
+        if len({(e.n_features, e.n_classes) for e in ensembles}) != 1:
+            raise ValueError("Ensembles must share their features and classes")
+
+        left, right, offsets = [], [], [np.zeros(1, dtype=np.int64)]
+        start = 0
+        for ensemble in ensembles:
+            left.append(np.where(ensemble.children_left == -1, -1, ensemble.children_left + start))
+            right.append(np.where(ensemble.children_right == -1, -1, ensemble.children_right + start))
+            offsets.append(np.asarray(ensemble.offsets[1:]) + start)
+            start += int(ensemble.offsets[-1])
+
+        return cls(
+            children_left=np.concatenate(left).astype(np.int32),
+            children_right=np.concatenate(right).astype(np.int32),
+            feature=np.concatenate([e.feature for e in ensembles]),
+            threshold=np.concatenate([e.threshold for e in ensembles]),
+            value=np.concatenate([e.value for e in ensembles]),
+            offsets=np.concatenate(offsets).astype(np.int64),
+            n_features=ensembles[0].n_features
+        )
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Get the node arrays keyed by name, e.g. for saving."""
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    def predict_proba(self, X) -> np.ndarray:
+        """
+        Predict class probabilities.
+
+        Args:
+            X: (n_samples, n_features) dense array or scipy sparse matrix
+
+        Returns:
+            (n_samples, n_classes) array of probabilities
+        """
+        if not hasattr(X, 'tocsr'):
+            X = np.asarray(X)
+        if X.ndim != 2 or X.shape[1] != self.n_features:
+            raise ValueError(f"Expected input with {self.n_features} features")
+        values = self._compact(X)
+
+        n_samples = values.shape[0]
+        samples = np.arange(n_samples)[:, None]
+        node = np.broadcast_to(self._roots, (n_samples, self.n_trees)).copy()
+        while not self._is_leaf[node].all():
+            go_left = values[samples, self._node_column[node]] <= self.threshold[node]
+            node = np.where(go_left, self._left[node], self._right[node])
+
+        # Accumulate tree by tree, in the same order as scikit-learn
+        leaf_values = self.value[node]
+        proba = np.zeros((n_samples, self.n_classes))
+        for tree in range(self.n_trees):
+            proba += leaf_values[:, tree]
+        return proba / self.n_trees
+
+    def _compact(self, X) -> np.ndarray:
+        """Gather the tested features of X into a dense float32 matrix."""
+        # Trees compare float32 inputs against their thresholds, as in scikit-learn
+        compact = np.zeros((X.shape[0], len(self.used_features)), dtype=np.float32)
+        if hasattr(X, 'tocsr'):
+            X = X.tocsr()
+            if not X.has_canonical_format:
+                X = X.copy()
+                X.sum_duplicates()
+            columns = self._column[X.indices]
+            keep = columns >= 0
+            rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+            compact[rows[keep], columns[keep]] = X.data[keep]
+        else:
+            compact[:] = np.asarray(X)[:, self.used_features]
+        return compact
@@ -0,0 +1,143 @@
+import zlib
+from collections import Counter
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from scipy import sparse
+
+from .analysis import DEFAULT_TOKEN_PATTERN, WordAnalyzer, tfidf_matrix
+
+class HashingTfidfVectorizer:
+    """
+    TF-IDF featurizer that maps terms to columns by hashing.
+
+    Terms are hashed with CRC-32 into ``n_features`` buckets, so there is no
+    vocabulary to build, store or look up and memory stays flat however
+    many distinct terms the corpus holds. Document frequencies are counted
+    per bucket, which lets ``partial_fit`` learn idf weights a chunk at a
+    time. Buckets outside the ``min_df``/``max_df`` limits, including
+    buckets never seen in training, get an idf of 0 and are left out of
+    the features.
+    """
+
+    def __init__(self,
+                 n_features: int = 2 ** 18,
+                 token_pattern: str = DEFAULT_TOKEN_PATTERN,
+                 stop_words: Union[str, Iterable[str], None] = 'english',
+                 ngram_range: Tuple[int, int] = (1, 2),
+                 lowercase: bool = True,
+                 norm: Optional[str] = 'l2',
+                 sublinear_tf: bool = False,
+                 binary: bool = False,
+                 min_df: int = 1,
+                 max_df: float = 1.0,
+                 idf: Optional[np.ndarray] = None):
+        """
+        Initialize the featurizer.
+
+        Args:
+            n_features: Number of hash buckets
+            token_pattern: Regular expression matching one token
+            stop_words: 'english' for scikit-learn's list, or the tokens to drop
+            ngram_range: Smallest and largest n-gram length
+            lowercase: Lowercase text before tokenizing
+            norm: Row normalization, 'l2', 'l1' or None
+            sublinear_tf: Replace term counts with 1 + log(count)
+            binary: Replace term counts with 1
+            min_df: Ignore buckets found in fewer documents than this
+            max_df: Ignore buckets found in more than this fraction of documents
+            idf: Precomputed idf weights, e.g. from a model bundle
+        """
+        if n_features < 1:
+            raise ValueError("n_features must be at least 1")
+        if stop_words == 'english':
+            from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
+            stop_words = ENGLISH_STOP_WORDS
+
+        self.n_features = n_features
+        self.analyzer = WordAnalyzer(token_pattern, stop_words or (), ngram_range, lowercase)
+        self.norm = norm
+        self.sublinear_tf = sublinear_tf
+        self.binary = binary
+        self.min_df = min_df
+        self.max_df = max_df
+        self.document_frequency = np.zeros(n_features, dtype=np.int64)
+        self.n_documents = 0
+        self.idf_ = idf
+
+    def bucket(self, term: str) -> int:
+        """Get the column a term hashes to."""
+        return zlib.crc32(term.encode('utf-8')) % self.n_features
+
+    def _buckets(self, text: str) -> np.ndarray:
+        """Get the bucket of every term occurrence in text."""
+        # Hash each distinct term once, then repeat it by its count
+        terms = Counter(self.analyzer(text))
+        hashes = np.fromiter(
+            (zlib.crc32(term.encode('utf-8')) for term in terms), dtype=np.int64, count=len(terms)
+        )
+        return np.repeat(hashes % self.n_features, np.fromiter(terms.values(), dtype=np.int64, count=len(terms)))
+
+    def partial_fit(self, texts: Sequence[str]) -> 'HashingTfidfVectorizer':
+        """
+        Add a chunk of documents to the document frequencies and refresh idf.
+
+        Args:
+            texts: Document texts
+
+        Returns:
+            This vectorizer
+        """
+        seen = [np.unique(self._buckets(text)) for text in texts]
+        if seen:
+            self.document_frequency += np.bincount(np.concatenate(seen), minlength=self.n_features)
+        self.n_documents += len(texts)
+        self.idf_ = self._idf()
+        return self
+
+    def fit(self, texts: Sequence[str]) -> 'HashingTfidfVectorizer':
+        """Learn idf weights from texts, discarding earlier fits."""
+        self.document_frequency = np.zeros(self.n_features, dtype=np.int64)
+        self.n_documents = 0
+        return self.partial_fit(texts)
+
+    def _idf(self) -> np.ndarray:
+        # Smoothed idf, as in scikit-learn's TfidfTransformer
+        df = self.document_frequency
+        idf = np.log((1 + self.n_documents) / (1 + df)) + 1.0
+        keep = (df >= max(self.min_df, 1)) & (df <= self.max_df * self.n_documents)
+        return np.where(keep, idf, 0.0)
+
+    def transform(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        """
+        Convert texts to TF-IDF feature rows.
+
+        Args:
+            texts: Document texts
+
+        Returns:
+            (len(texts), n_features) sparse matrix
+        """
+        if self.idf_ is None:
+            raise RuntimeError("Vectorizer not fitted")
+        documents = [self._buckets(text) for text in texts]
+        return tfidf_matrix(documents, self.idf_, self.n_features,
+                            self.norm, self.sublinear_tf, self.binary)
+
+    def fit_transform(self, texts: Sequence[str]) -> sparse.csr_matrix:
+        return self.fit(texts).transform(texts)
+
+    def get_feature_names_out(self) -> np.ndarray:
+        return np.asarray([f"hash_{index}" for index in range(self.n_features)], dtype=object)
+
+    def config(self) -> Dict[str, Any]:
+        """Describe the featurizer, e.g. for a bundle manifest."""
+        return {
+            'type': 'hashing',
+            'hash': 'crc32',
+            'n_features': self.n_features,
+            **self.analyzer.config(),
+            'norm': self.norm,
+            'sublinear_tf': self.sublinear_tf,
+            'binary': self.binary,
+        }
@@ -0,0 +1,283 @@
+import hashlib
+import os
+from typing import BinaryIO, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from .forest import TreeEnsemble
+
+# Longest side of the thumbnail the features are computed on
+THUMBNAIL_SIZE = 64
+
+# Bins per colour channel in the colour histograms
+HISTOGRAM_BINS = 8
+
+# Cells per side of the coarse grayscale layout grid
+GRID_SIZE = 4
+
+# Gray-level step between neighbouring pixels that counts as an edge
+EDGE_THRESHOLD = 32
+
+# Images whose header declares more pixels than this are refused before decoding
+MAX_IMAGE_PIXELS = 100_000_000
+
+# Lower limit for formats other than JPEG, which are decoded at full size
+MAX_FULL_DECODE_PIXELS = 16_000_000
+
+FEATURE_NAMES = (
+    ('mean_r', 'mean_g', 'mean_b', 'std_r', 'std_g', 'std_b')
+    + tuple(f"hist_{channel}_{bin}" for channel in 'rgb' for bin in range(HISTOGRAM_BINS))
+    + ('saturation', 'log_aspect_ratio', 'edge_density')
+    + tuple(f"grid_{row}_{col}" for row in range(GRID_SIZE) for col in range(GRID_SIZE))
+)
+
+def thumbnail_features(image: Image.Image, size: int = THUMBNAIL_SIZE) -> np.ndarray:
+    """
+    Compute cheap visual features of an opened image.
+
+    The image is reduced to a thumbnail first. JPEGs are decoded at reduced
+    scale directly, so their cost barely depends on the upload's resolution;
+    other formats are decoded in full and so have a lower pixel limit.
+
+    Args:
+        image: Image opened but not necessarily decoded yet
+        size: Longest side of the thumbnail
+
+    Returns:
+        float32 vector laid out as FEATURE_NAMES, every value in [0, 1]
+        except the log aspect ratio
+    """
+    width, height = image.size
+    limit = MAX_IMAGE_PIXELS if image.format == 'JPEG' else MAX_FULL_DECODE_PIXELS
+    if width * height > limit:
+        raise ValueError(f"Image too large: {width}x{height}")
+    if image.format == 'JPEG':
+        image.draft('RGB', (size, size))
+
+    image = ImageOps.exif_transpose(image).convert('RGB')
+    width, height = image.size
+    image.thumbnail((size, size), Image.Resampling.BILINEAR)
+
+    pixels = np.asarray(image, dtype=np.float32).reshape(-1, 3) / 255.0
+    bins = np.minimum((pixels * HISTOGRAM_BINS).astype(np.int64), HISTOGRAM_BINS - 1)
+    histograms = [np.bincount(bins[:, channel], minlength=HISTOGRAM_BINS) / len(pixels)
+                  for channel in range(3)]
+    saturation = (pixels.max(axis=1) - pixels.min(axis=1)).mean()
+
+    gray = np.asarray(image.convert('L'), dtype=np.float32)
+    horizontal = np.abs(np.diff(gray, axis=1)) > EDGE_THRESHOLD
+    vertical = np.abs(np.diff(gray, axis=0)) > EDGE_THRESHOLD
+    edge_density = (horizontal.sum() + vertical.sum()) / max(horizontal.size + vertical.size, 1)
+    grid = np.asarray(image.convert('L').resize((GRID_SIZE, GRID_SIZE), Image.Resampling.BOX),
+                      dtype=np.float32) / 255.0
+
+    return np.concatenate([
+        pixels.mean(axis=0),
+        pixels.std(axis=0),
+        *histograms,
+        [saturation, np.log(width / height), edge_density],
+        grid.ravel(),
+    ]).astype(np.float32)
+
+def image_features(source: Union[str, BinaryIO], size: int = THUMBNAIL_SIZE) -> np.ndarray:
+    """
+    Open an image and compute its thumbnail features.
+
+    Args:
+        source: Path or binary file-like object
+        size: Longest side of the thumbnail
+
+    Returns:
+        Feature vector, as from ``thumbnail_features``
+    """
+    with Image.open(source) as image:
+        return thumbnail_features(image, size)
+
+def upload_features(upload, size: int = THUMBNAIL_SIZE) -> np.ndarray:
+    """
+    Compute the thumbnail features of a spooled upload.
+
+    Module-level so it can run in an extraction worker, where decoding an
+    untrusted image is subject to the worker's memory and time limits.
+
+    Args:
+        upload: SpooledUpload holding the image
+        size: Longest side of the thumbnail
+
+    Returns:
+        Feature vector, as from ``thumbnail_features``
+    """
+    with upload.open() as f:
+        return image_features(f, size)
+
+class ThumbnailClassifier:
+    """
+    Fast first-stage image classifier over thumbnail features.
+
+    A small random forest over colour, shape, edge and layout features
+    classifies an image in a few milliseconds without OCR. Its answer is
+    used only when it is at least ``min_confidence``; otherwise the image
+    goes through OCR and the text classifier as usual.
+
+    Saved models are plain ``.npz`` archives, loaded without unpickling
+    or importing scikit-learn.
+    """
+
+    def __init__(self,
+                 model: Optional[TreeEnsemble] = None,
+                 classes: Sequence[str] = (),
+                 size: int = THUMBNAIL_SIZE,
+                 min_confidence: float = 0.9):
+        """
+        Initialize the classifier.
+
+        Args:
+            model: Fitted forest over FEATURE_NAMES, or None before ``fit``
+            classes: Class name of each forest output
+            size: Longest side of the thumbnails
+            min_confidence: Smallest confidence ``predict_confident`` accepts
+        """
+        self.model = model
+        self.classes = np.asarray(classes, dtype=str)
+        self.size = size
+        self.min_confidence = min_confidence
+        # Identifies the loaded model, e.g. for logging
+        self.version = None
+
+    def fit(self, features: np.ndarray, labels: Sequence[str], n_estimators: int = 50) -> 'ThumbnailClassifier':
+        """
+        Train the forest on precomputed feature vectors.
+
+        Args:
+            features: (n_images, len(FEATURE_NAMES)) array from ``image_features``
+            labels: Class of each image
+            n_estimators: Number of trees
+
+        Returns:
+            This classifier
+        """
+        if len(set(labels)) < 2:
+            raise ValueError("Need at least 2 different classes for training")
+        from sklearn.ensemble import RandomForestClassifier
+
+        self.classes, y = np.unique(np.asarray(labels, dtype=str), return_inverse=True)
+        forest = RandomForestClassifier(
+            n_estimators=n_estimators,
+            class_weight='balanced',
+            random_state=0
+        )
+        forest.fit(np.asarray(features, dtype=np.float32), y)
+        self.model = TreeEnsemble.from_sklearn(forest, n_classes=len(self.classes))
+        return self
+
+    def predict_features(self, features: np.ndarray) -> List[Tuple[str, float]]:
+        """
+        Classify precomputed feature vectors.
+
+        Args:
+            features: (n_images, len(FEATURE_NAMES)) array
+
+        Returns:
+            List of (predicted_class, confidence) tuples, in input order
+        """
+        if self.model is None:
+            raise RuntimeError("Model not trained")
+        probs = self.model.predict_proba(np.atleast_2d(features))
+        pred_idx = np.argmax(probs, axis=1)
+        confidences = probs[np.arange(len(probs)), pred_idx]
+        return [(str(self.classes[index]), float(confidence))
+                for index, confidence in zip(pred_idx, confidences)]
+
+    def predict(self, source: Union[str, BinaryIO]) -> Tuple[str, float]:
+        """
+        Classify one image.
+
+        Args:
+            source: Path or binary file-like object
+
+        Returns:
+            Tuple of (predicted_class, confidence)
+        """
+        return self.predict_features(image_features(source, self.size))[0]
+
+    def predict_confident(self, source: Union[str, BinaryIO]) -> Optional[Tuple[str, float]]:
+        """
+        Classify one image if the thumbnail alone is conclusive.
+
+        Args:
+            source: Path or binary file-like object
+
+        Returns:
+            (predicted_class, confidence), or None when the confidence is
+            below ``min_confidence`` and the image needs OCR
+        """
+        return self.predict_confident_features(image_features(source, self.size))
+
+    def predict_confident_features(self, features: np.ndarray) -> Optional[Tuple[str, float]]:
+        """
+        Like ``predict_confident``, for one precomputed feature vector.
+
+        Args:
+            features: Vector from ``image_features`` or ``upload_features``
+
+        Returns:
+            (predicted_class, confidence), or None when the image needs OCR
+        """
+        predicted_class, confidence = self.predict_features(features)[0]
+        if confidence < self.min_confidence:
+            return None
+        return predicted_class, confidence
+
+    def save(self, path: str):
+        """Save the model as an ``.npz`` archive."""
+        if self.model is None:
+            raise RuntimeError("Model not trained")
+        with open(path, 'wb') as f:
+            np.savez(
+                f,
+                classes=self.classes,
+                size=np.int64(self.size),
+                n_features=np.int64(self.model.n_features),
+                **self.model.arrays()
+            )
+
+    @classmethod
+    def load(cls, path: str, min_confidence: float = 0.9) -> 'ThumbnailClassifier':
+        """
+        Load a model saved with ``save``.
+
+        Args:
+            path: ``.npz`` archive
+            min_confidence: Smallest confidence ``predict_confident`` accepts
+
+        Returns:
+            Ready-to-use ThumbnailClassifier
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        with np.load(path, allow_pickle=False) as arrays:
+            model = TreeEnsemble(
+                n_features=int(arrays['n_features']),
+                **{name: arrays[name] for name in TreeEnsemble.ARRAYS}
+            )
+            classifier = cls(model, arrays['classes'], int(arrays['size']), min_confidence)
+        classifier.version = hashlib.sha256(data).hexdigest()[:16]
+        return classifier
+
+    @classmethod
+    def from_env(cls, default: Optional[str] = None) -> Optional['ThumbnailClassifier']:
+        """
+        Load the model named by ``THUMBNAIL_MODEL``, accepting predictions
+        of at least ``THUMBNAIL_MIN_CONFIDENCE`` (default 0.9).
+
+        Args:
+            default: Path used when the variable is unset
+
+        Returns:
+            The classifier, or None if no model file exists
+        """
+        path = os.getenv("THUMBNAIL_MODEL", default)
+        if not path or not os.path.exists(path):
+            return None
+        return cls.load(path, float(os.getenv("THUMBNAIL_MIN_CONFIDENCE", "0.9")))
@@ -0,0 +1,314 @@
+import csv
+import json
+import logging
+import os
+import random
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy import sparse
+
+from ..cache import ExtractionCache, file_content_key
+from ..extractor.base import BaseExtractor
+from ..extractor.pool import ExtractionPool
+from ..extractor.registry import ExtractorRegistry, default_registry
+from ..extractor.sniff import SNIFF_BYTES
+from .classifier import DocumentClassifier
+from .forest import TreeEnsemble
+from .hashing import HashingTfidfVectorizer
+
+logger = logging.getLogger(__name__)
+
+def iter_directory(root: str,
+                   label_for: Optional[Callable[[str], Optional[str]]] = None) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (path, label) pairs for the files under a directory.
+
+    Files inside a subdirectory are labelled with the subdirectory's name
+    (``root/invoice/a.pdf`` is an invoice); files directly under ``root``
+    are labelled by ``label_for(filename)``. Hidden files and files with no
+    label are skipped.
+
+    Args:
+        root: Corpus directory
+        label_for: Maps a filename to its label, or None to skip the file
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(name for name in dirnames if not name.startswith('.'))
+        relative = os.path.relpath(dirpath, root)
+        for filename in sorted(filenames):
+            if filename.startswith('.'):
+                continue
+            if relative != '.':
+                label = relative.split(os.sep)[0]
+            else:
+                label = label_for(filename) if label_for else None
+            if label:
+                yield os.path.join(dirpath, filename), label
+
+def iter_manifest(path: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yield (path, label) pairs listed in a manifest file.
+
+    The manifest is either JSON Lines with ``path`` and ``label`` keys or a
+    CSV file with ``path`` and ``label`` columns. Relative paths are resolved
+    against the manifest's directory.
+
+    Args:
+        path: Manifest file (.jsonl or .csv)
+    """
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, newline='') as f:
+        if path.endswith('.csv'):
+            records = csv.DictReader(f)
+        else:
+            records = (json.loads(line) for line in f if line.strip())
+        for record in records:
+            yield os.path.join(base, record['path']), record['label']
+
+def chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Group an iterable into lists of at most ``size`` items."""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _extract_file(extractor: BaseExtractor, path: str) -> Dict[str, Any]:
+    """Run an extractor over a file inside a worker, so raw bytes never reach the parent."""
+    return extractor.extract_file(path)
+
+class StreamingTrainer:
+    """
+    Trains a DocumentClassifier over a corpus too large to hold in memory.
+
+    Documents stream through in chunks and are extracted in parallel by an
+    ExtractionPool, or read from an ExtractionCache when seen before. The
+    first pass learns hashing-featurizer idf weights with ``partial_fit``
+    and spools the extracted text to a temporary file; the second pass
+    reads the spool back in shuffled chunks and grows a random forest by a
+    few trees per chunk. Shuffling keeps each chunk a mix of classes even
+    when the corpus is sorted by label. Memory use is bounded by the chunk
+    size, the validation sample and one offset per document, not by the
+    corpus.
+
+    The forest is capped at ``max_trees`` trees, so model size and
+    prediction latency do not grow with the corpus either. When the corpus
+    has more chunks than the cap allows at ``trees_per_chunk`` trees each,
+    chunks get fewer trees, down to one; past ``max_trees`` chunks, the
+    remaining shuffled chunks train no trees, so each tree still sees a
+    uniform random sample of the corpus.
+    """
+
+    def __init__(self,
+                 n_features: int = 2 ** 18,
+                 chunk_size: int = 1000,
+                 trees_per_chunk: int = 10,
+                 max_trees: int = 200,
+                 min_df: int = 2,
+                 max_df: float = 0.9,
+                 validation_fraction: float = 0.1,
+                 max_validation: int = 5000,
+                 pool: Optional[ExtractionPool] = None,
+                 registry: Optional[ExtractorRegistry] = None,
+                 cache: Optional[ExtractionCache] = None,
+                 spool_dir: Optional[str] = None,
+                 random_state: int = 42):
+        """
+        Initialize the trainer.
+
+        Args:
+            n_features: Hash buckets used by the featurizer
+            chunk_size: Documents extracted, vectorized and trained on at a time
+            trees_per_chunk: Most trees added to the forest for each chunk
+            max_trees: Most trees in the final forest
+            min_df: Ignore features found in fewer documents than this
+            max_df: Ignore features found in more than this fraction of documents
+            validation_fraction: Share of documents held out for validation
+            max_validation: Most held-out documents kept for scoring
+            pool: Extraction pool; one sized to the CPU count by default
+            registry: Extractors; the default registry by default
+            cache: Optional extraction cache, so re-runs skip parsing
+            spool_dir: Directory for the extracted-text spool file
+            random_state: Seed for the validation split and the trees
+        """
+        if chunk_size < 1 or trees_per_chunk < 1 or max_trees < 1:
+            raise ValueError("chunk_size, trees_per_chunk and max_trees must be at least 1")
+        self.n_features = n_features
+        self.chunk_size = chunk_size
+        self.trees_per_chunk = trees_per_chunk
+        self.max_trees = max_trees
+        self.min_df = min_df
+        self.max_df = max_df
+        self.validation_fraction = validation_fraction
+        self.max_validation = max_validation
+        self.pool = pool or ExtractionPool()
+        self.registry = registry or default_registry()
+        self.cache = cache
+        self.spool_dir = spool_dir
+        self.random_state = random_state
+
+    def extract(self, documents: Sequence[Tuple[str, str]]) -> Tuple[List[str], List[str], int]:
+        """
+        Extract one chunk of documents in parallel.
+
+        Args:
+            documents: (path, label) pairs
+
+        Returns:
+            Tuple of (texts, labels, skipped) for the documents that produced text
+        """
+        # Slots hold a cached result, or None until the pool fills them in
+        results = []
+        jobs = []
+        pending = []
+        skipped = 0
+        for path, label in documents:
+            try:
+                with open(path, 'rb') as f:
+                    extractor = self.registry.get(path, f.read(SNIFF_BYTES))
+                key = None
+                if extractor is not None and self.cache is not None:
+                    key = file_content_key(path, extractor.fingerprint())
+            except OSError as e:
+                logger.warning(f"Cannot read {path}: {e}")
+                extractor = None
+            if extractor is None:
+                skipped += 1
+                continue
+            cached = self.cache.get(key) if key else None
+            if cached is None:
+                jobs.append((extractor, path))
+                pending.append((len(results), key))
+            results.append([path, label, cached])
+
+        outcomes = self.pool.run_many(_extract_file, jobs)
+        for (slot, key), outcome in zip(pending, outcomes):
+            results[slot][2] = outcome
+            if key and not isinstance(outcome, Exception):
+                self.cache.set(key, outcome)
+
+        texts, labels = [], []
+        for path, label, outcome in results:
+            if isinstance(outcome, Exception) or outcome['error'] or not outcome['text']:
+                error = outcome if isinstance(outcome, Exception) else outcome['error'] or "no text"
+                logger.warning(f"Skipping {path}: {error}")
+                skipped += 1
+                continue
+            texts.append(outcome['text'])
+            labels.append(label)
+        return texts, labels, skipped
+
+    def fit(self, documents: Iterable[Tuple[str, str]]) -> Tuple[DocumentClassifier, Dict[str, Any]]:
+        """
+        Train a classifier over a stream of labelled documents.
+
+        Args:
+            documents: (path, label) pairs, e.g. from iter_directory or iter_manifest
+
+        Returns:
+            Tuple of (trained classifier, training metrics)
+        """
+        from sklearn.ensemble import RandomForestClassifier
+        from sklearn.preprocessing import LabelEncoder
+
+        vectorizer = HashingTfidfVectorizer(
+            n_features=self.n_features, min_df=self.min_df, max_df=self.max_df
+        )
+        rng = random.Random(self.random_state)
+        classes = set()
+        n_documents = 0
+        n_skipped = 0
+
+        offsets = []
+        spool = tempfile.NamedTemporaryFile(
+            'w+b', suffix='.jsonl', dir=self.spool_dir, delete=False
+        )
+        try:
+            # Pass 1: extract, learn idf weights and spool the text
+            for chunk in chunked(documents, self.chunk_size):
+                texts, labels, skipped = self.extract(chunk)
+                n_skipped += skipped
+                if not texts:
+                    continue
+                vectorizer.partial_fit(texts)
+                classes.update(labels)
+                n_documents += len(texts)
+                for text, label in zip(texts, labels):
+                    offsets.append(spool.tell())
+                    spool.write(json.dumps({'label': label, 'text': text}).encode('utf-8') + b'\n')
+                logger.info(f"Extracted {n_documents} documents ({n_skipped} skipped)")
+
+            if len(classes) < 2:
+                raise ValueError("Need at least 2 different classes for training")
+
+            label_encoder = LabelEncoder().fit(sorted(classes))
+
+            # Pass 2: grow the forest a shuffled chunk at a time, holding out a validation sample
+            rng.shuffle(offsets)
+            n_chunks = -(-len(offsets) // self.chunk_size)
+            trees_per_chunk = min(self.trees_per_chunk, max(1, self.max_trees // n_chunks))
+            n_trees = 0
+            forests = []
+            validation_X, validation_y = [], []
+            n_validation = 0
+            for number, chunk_offsets in enumerate(chunked(offsets, self.chunk_size)):
+                if n_trees >= self.max_trees:
+                    break
+                chunk = []
+                for offset in chunk_offsets:
+                    spool.seek(offset)
+                    chunk.append(json.loads(spool.readline()))
+                X = vectorizer.transform([record['text'] for record in chunk])
+                y = label_encoder.transform([record['label'] for record in chunk])
+
+                held_out = np.array([rng.random() < self.validation_fraction for _ in chunk])
+                # Rows past the validation cap go back to training
+                held_out[np.flatnonzero(held_out)[self.max_validation - n_validation:]] = False
+                if held_out.any():
+                    validation_X.append(X[held_out])
+                    validation_y.append(y[held_out])
+                    n_validation += int(held_out.sum())
+                train_X, train_y = X[~held_out], y[~held_out]
+
+                if len(np.unique(train_y)) < 2:
+                    logger.warning(f"Chunk {number} has fewer than 2 classes; skipping it")
+                    continue
+                model = RandomForestClassifier(
+                    n_estimators=min(trees_per_chunk, self.max_trees - n_trees),
+                    class_weight='balanced',
+                    n_jobs=-1,
+                    random_state=self.random_state + number
+                ).fit(train_X, train_y)
+                forests.append(TreeEnsemble.from_sklearn(model, n_classes=len(label_encoder.classes_)))
+                n_trees += forests[-1].n_trees
+                logger.info(f"Trained chunk {number}: {n_trees} trees")
+        finally:
+            spool.close()
+            os.unlink(spool.name)
+
+        if not forests:
+            raise ValueError("No chunk contained at least 2 classes")
+
+        classifier = DocumentClassifier(
+            vectorizer=vectorizer,
+            model=TreeEnsemble.concatenate(forests),
+            label_encoder=label_encoder
+        )
+
+        metrics = {
+            'n_documents': n_documents,
+            'n_skipped': n_skipped,
+            'n_trees': classifier.model.n_trees,
+            'n_features': self.n_features,
+            'n_classes': len(label_encoder.classes_),
+            'n_validation': n_validation,
+        }
+        if validation_X:
+            predicted = classifier.model.predict_proba(sparse.vstack(validation_X)).argmax(axis=1)
+            metrics['val_accuracy'] = float(np.mean(predicted == np.concatenate(validation_y)))
+        return classifier, metrics
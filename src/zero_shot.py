@@ -0,0 +1,202 @@
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MODEL = "facebook/bart-large-mnli"
+HYPOTHESIS_TEMPLATE = "This text is from {}."
+# Only the start of a document is used as the premise
+MAX_PREMISE_CHARS = 1024
+
+class ZeroShotEngine:
+    """
+    Zero-shot classification by natural language inference, in batches.
+
+    Every (document, label hypothesis) pair of a batch goes through the
+    model in one padded forward pass, instead of one pass per label per
+    document. Scores are the entailment logits softmaxed over the labels of
+    each document, as in the transformers zero-shot pipeline.
+    """
+
+    def __init__(self,
+                 model_name_or_path: str = DEFAULT_MODEL,
+                 labels: Sequence[str] = (),
+                 hypothesis_template: str = HYPOTHESIS_TEMPLATE,
+                 batch_size: int = 8,
+                 max_length: int = 512,
+                 quantize: bool = False,
+                 num_threads: Optional[int] = None,
+                 local_files_only: bool = False):
+        """
+        Load the NLI model.
+
+        Args:
+            model_name_or_path: Hugging Face model name or local directory
+            labels: Candidate labels
+            hypothesis_template: Hypothesis built from each label
+            batch_size: Documents per forward pass (each contributes one row per label)
+            max_length: Tokens per (premise, hypothesis) pair; premises are truncated
+            quantize: Convert linear layers to dynamic int8
+            num_threads: Intra-op threads for torch (None keeps torch's default)
+            local_files_only: Never download the model
+        """
+        import torch
+        from transformers import AutoModelForSequenceClassification, AutoTokenizer
+
+        if not labels:
+            raise ValueError("Need at least one label")
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1")
+        if num_threads:
+            torch.set_num_threads(num_threads)
+
+        self.torch = torch
+        self.labels = list(labels)
+        self.hypothesis_template = hypothesis_template
+        self.batch_size = batch_size
+        self.max_length = max_length
+        self.quantized = quantize
+
+        self.tokenizer = AutoTokenizer.from_pretrained(model_name_or_path, local_files_only=local_files_only)
+        model = AutoModelForSequenceClassification.from_pretrained(
+            model_name_or_path, local_files_only=local_files_only)
+        model.eval()
+        if quantize:
+            model = torch.ao.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        self.model = model
+        self.entailment_id = entailment_index(model.config.label2id)
+
+    @classmethod
+    def from_env(cls, labels: Sequence[str]) -> 'ZeroShotEngine':
+        """
+        Load the model named by ``ZERO_SHOT_MODEL``, configured by
+        ``ZERO_SHOT_QUANTIZE``, ``ZERO_SHOT_THREADS`` and ``ZERO_SHOT_BATCH_SIZE``.
+
+        Args:
+            labels: Candidate labels
+
+        Returns:
+            The engine
+        """
+        return cls(
+            os.getenv("ZERO_SHOT_MODEL", DEFAULT_MODEL),
+            labels,
+            batch_size=int(os.getenv("ZERO_SHOT_BATCH_SIZE", "8")),
+            quantize=os.getenv("ZERO_SHOT_QUANTIZE", "0") == "1",
+            num_threads=int(os.getenv("ZERO_SHOT_THREADS", "0")) or None,
+        )
+
+    def scores(self, texts: Sequence[str]) -> np.ndarray:
+        """
+        Score every label for every text.
+
+        Args:
+            texts: Documents to classify
+
+        Returns:
+            Array of shape (len(texts), len(labels)); rows of empty texts are zero
+        """
+        scores = np.zeros((len(texts), len(self.labels)), dtype=np.float32)
+        present = [i for i, text in enumerate(texts) if text.strip()]
+        # Similar lengths share a batch, so little of it is padding
+        present.sort(key=lambda i: len(texts[i]), reverse=True)
+        hypotheses = [self.hypothesis_template.format(label) for label in self.labels]
+
+        with self.torch.inference_mode():
+            for start in range(0, len(present), self.batch_size):
+                rows = present[start:start + self.batch_size]
+                premises = [texts[i][:MAX_PREMISE_CHARS] for i in rows for _ in hypotheses]
+                inputs = self.tokenizer(premises, hypotheses * len(rows), padding=True,
+                                        truncation='only_first', max_length=self.max_length,
+                                        return_tensors='pt')
+                logits = self.model(**inputs).logits[:, self.entailment_id]
+                scores[rows] = logits.reshape(len(rows), len(hypotheses)).softmax(dim=-1).numpy()
+        return scores
+
+    def classify_batch(self, texts: Sequence[str]) -> List[Tuple[str, float]]:
+        """
+        Classify texts.
+
+        Args:
+            texts: Documents to classify
+
+        Returns:
+            (label, score) per text; ("unknown", 0.0) for empty texts
+        """
+        results = []
+        for text, row in zip(texts, self.scores(texts)):
+            if not text.strip():
+                results.append(("unknown", 0.0))
+                continue
+            best = int(row.argmax())
+            results.append((self.labels[best], float(row[best])))
+        return results
+
+    def classify(self, text: str) -> Tuple[str, float]:
+        """Classify one text; see ``classify_batch``."""
+        return self.classify_batch([text])[0]
+
+def entailment_index(label2id: Dict[str, int]) -> int:
+    """
+    Find the entailment output of an NLI model.
+
+    Args:
+        label2id: The model config's label mapping
+
+    Returns:
+        Index of the entailment logit (the last one if no label says so)
+    """
+    for label, index in label2id.items():
+        if label.lower().startswith("entail"):
+            return index
+    logger.warning("Model has no entailment label; using its last output")
+    return -1
+
+def compare_quantization(full: ZeroShotEngine,
+                         quantized: ZeroShotEngine,
+                         texts: Sequence[str],
+                         expected: Optional[Sequence[Optional[str]]] = None) -> Dict[str, Any]:
+    """
+    Measure what int8 quantization changes.
+
+    Args:
+        full: Engine with the float model
+        quantized: Engine with the same model quantized
+        texts: Documents to classify
+        expected: True label per document (None where unknown)
+
+    Returns:
+        Dict with the share of documents whose label is unchanged, the
+        largest score difference, seconds per document for each engine and,
+        when labels are given, each engine's accuracy and the delta
+    """
+    timings = {}
+    predictions = {}
+    scores = {}
+    for name, engine in (('full', full), ('quantized', quantized)):
+        start = time.perf_counter()
+        scores[name] = engine.scores(texts)
+        timings[name] = (time.perf_counter() - start) / max(len(texts), 1)
+        predictions[name] = [engine.labels[int(row.argmax())] if text.strip() else "unknown"
+                             for text, row in zip(texts, scores[name])]
+
+    report = {
+        'documents': len(texts),
+        'agreement': float(np.mean([a == b for a, b in zip(predictions['full'], predictions['quantized'])]))
+                     if texts else 1.0,
+        'max_score_diff': float(np.abs(scores['full'] - scores['quantized']).max()) if texts else 0.0,
+        'full_s_per_doc': timings['full'],
+        'quantized_s_per_doc': timings['quantized'],
+    }
+    if expected is not None:
+        labelled = [i for i, label in enumerate(expected) if label is not None]
+        if labelled:
+            for name in ('full', 'quantized'):
+                report[f'{name}_accuracy'] = float(np.mean(
+                    [predictions[name][i] == expected[i] for i in labelled]))
+            report['accuracy_delta'] = report['quantized_accuracy'] - report['full_accuracy']
+    return report
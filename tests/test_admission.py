@@ -0,0 +1,126 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+import src.api
+from src.admission import AdmissionController, Overloaded
+
+project_root = Path(__file__).parent.parent
+
+
+def test_admits_up_to_capacity():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1)
+        async with controller.admit(2):
+            with pytest.raises(Overloaded):
+                async with controller.admit():
+                    pass
+        async with controller.admit(2):
+            pass
+        return controller.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats['admitted'] == 2
+    assert stats['rejected'] == 1
+    assert stats['queued'] == 0
+
+
+def test_idle_controller_admits_oversized_batch():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=0)
+        async with controller.admit(10):
+            return controller.outstanding
+
+    assert asyncio.run(scenario()) == 10
+
+
+def test_slots_bound_concurrency():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=2, max_queue=8)
+        peak = 0
+
+        async def work():
+            nonlocal peak
+            async with controller.slot():
+                peak = max(peak, controller.active)
+                await asyncio.sleep(0.01)
+
+        await asyncio.gather(*(work() for _ in range(6)))
+        return peak, controller.active
+
+    assert asyncio.run(scenario()) == (2, 0)
+
+
+def test_abandoned_blocking_call_keeps_its_slot():
+    async def scenario():
+        controller = AdmissionController(max_concurrent=1, max_queue=1)
+        finish = threading.Event()
+
+        async def work():
+            async with controller.slot():
+                await controller.run_in_executor(executor, finish.wait)
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            with pytest.raises(asyncio.TimeoutError):
+                await asyncio.wait_for(work(), 0.05)
+            # The call is still running on the executor, so its slot is taken
+            held = controller.active, controller.stats()['abandoned']
+            finish.set()
+            async with controller.slot():
+                pass
+        return held, controller.active, controller.abandoned
+
+    assert asyncio.run(scenario()) == ((1, 1), 0, 0)
+
+
+def test_rejects_invalid_limits():
+    with pytest.raises(ValueError):
+        AdmissionController(max_concurrent=0)
+    with pytest.raises(ValueError):
+        AdmissionController(max_queue=-1)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setenv("API_KEY", "secret")
+    return TestClient(src.api.app, headers={"Authorization": "Bearer secret"})
+
+
+def upload(name="invoice_1.pdf"):
+    return {'file': (name, (project_root / "files" / name).read_bytes(), 'application/pdf')}
+
+
+def test_full_queue_returns_429(client, monkeypatch):
+    controller = AdmissionController(max_concurrent=1, max_queue=0)
+    controller.outstanding = 1
+    monkeypatch.setattr(src.api, "admission", controller)
+
+    response = client.post('/classify_file', files=upload())
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) >= 1
+
+    response = client.post('/classify_files', files=[('files', upload()['file'])] * 2)
+    assert response.status_code == 429
+    assert controller.rejected == 2
+
+
+def test_slow_request_returns_504(client, monkeypatch):
+    async def stalled(file):
+        await asyncio.sleep(5)
+
+    monkeypatch.setattr(src.api, "classify_upload", stalled)
+    monkeypatch.setattr(src.api, "API_REQUEST_TIMEOUT", 0.05)
+    response = client.post('/classify_file', files=upload())
+    assert response.status_code == 504
+    assert src.api.admission.outstanding == 0
+
+
+def test_admitted_request_is_classified(client):
+    response = client.post('/classify_file', files=upload())
+    assert response.status_code == 200
+    assert response.json()['predicted_class'] == "invoice"
+    assert client.get('/stats').json()['admission']['active'] == 0
@@ -8,6 +8,7 @@ import io
 project_root = str(Path(__file__).parent.parent)
 sys.path.append(project_root)
 
+import src.app
 from src.app import app
 
 class TestDocumentAPI(unittest.TestCase):
@@ -78,5 +79,76 @@ class TestDocumentAPI(unittest.TestCase):
         self.assertEqual(response.status_code, 400)
         self.assertIn('error', response.json)
 
+    def test_classify_files(self):
+        """Test batch classification endpoint."""
+        data = {'files': []}
+        for name in ('invoice', 'bank_statement'):
+            with open(self.test_files[name], 'rb') as f:
+                data['files'].append((io.BytesIO(f.read()), f'{name}.pdf'))
+        data['files'].append((io.BytesIO(b'invalid file content'), 'test.txt'))
+        response = self.app.post('/classify_files',
+                               content_type='multipart/form-data',
+                               data=data)
+        self.assertEqual(response.status_code, 200)
+        results = response.json['results']
+        self.assertEqual([r['filename'] for r in results],
+                         ['invoice.pdf', 'bank_statement.pdf', 'test.txt'])
+        self.assertEqual(results[0]['file_class'], 'invoice')
+        self.assertEqual(results[1]['file_class'], 'bank_statement')
+        self.assertIn('error', results[2])
+
+    def test_classify_files_missing(self):
+        """Test error handling when no files are provided to the batch endpoint."""
+        response = self.app.post('/classify_files')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json)
+
+    def test_repeated_upload_uses_cache(self):
+        """Test that re-submitting the same document is served from the cache."""
+        with open(self.test_files['invoice'], 'rb') as f:
+            content = f.read()
+        hits = self.app.get('/stats').json['cache']['memory']['hits']
+        responses = []
+        for _ in range(2):
+            data = {'file': (io.BytesIO(content), 'invoice.pdf')}
+            responses.append(self.app.post('/classify_file',
+                                           content_type='multipart/form-data',
+                                           data=data))
+        self.assertEqual(responses[0].json, responses[1].json)
+        self.assertGreater(self.app.get('/stats').json['cache']['memory']['hits'], hits)
+
+    def test_mislabelled_upload_uses_content_type(self):
+        """Test that a PDF with the wrong extension is classified from its content."""
+        with open(self.test_files['invoice'], 'rb') as f:
+            data = {'file': (io.BytesIO(f.read()), 'invoice.docx')}
+        response = self.app.post('/classify_file',
+                               content_type='multipart/form-data',
+                               data=data)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json['file_class'], 'invoice')
+
+    def test_content_not_matching_extension(self):
+        """Test that a non-document upload named like a PDF is rejected."""
+        data = {'file': (io.BytesIO(b'invalid file content'), 'test.pdf')}
+        response = self.app.post('/classify_file',
+                               content_type='multipart/form-data',
+                               data=data)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('error', response.json)
+
+    def test_oversize_upload(self):
+        """Test that uploads over the size limit are rejected."""
+        original = src.app.MAX_UPLOAD_BYTES
+        src.app.MAX_UPLOAD_BYTES = 1024
+        try:
+            data = {'file': (io.BytesIO(b'%PDF-1.4' + b'0' * 200 * 1024), 'big.pdf')}
+            response = self.app.post('/classify_file',
+                                   content_type='multipart/form-data',
+                                   data=data)
+            self.assertEqual(response.status_code, 413)
+            self.assertIn('error', response.json)
+        finally:
+            src.app.MAX_UPLOAD_BYTES = original
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
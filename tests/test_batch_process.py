@@ -0,0 +1,80 @@
+import json
+import shutil
+from pathlib import Path
+
+import httpx
+import pytest
+from batch_process import BulkClassifier, iter_files, load_checkpoint
+from src.app import app
+
+project_root = Path(__file__).parent.parent
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "archive"
+    (root / "2023" / "march").mkdir(parents=True)
+    shutil.copy(project_root / "files" / "invoice_1.pdf", root / "invoice_1.pdf")
+    shutil.copy(project_root / "files" / "bank_statement_1.pdf", root / "2023" / "march" / "statement.PDF")
+    (root / "notes.txt").write_text("not a document")
+    (root / ".hidden.pdf").write_bytes(b"")
+    return root
+
+
+@pytest.fixture
+def flask_client():
+    return httpx.Client(transport=httpx.WSGITransport(app=app), base_url="http://service")
+
+
+def test_iter_files_is_recursive_and_filtered(corpus):
+    found = [Path(path).relative_to(corpus).as_posix() for path in iter_files(str(corpus))]
+    assert found == ["invoice_1.pdf", "2023/march/statement.PDF"]
+    assert [Path(path).name for path in iter_files(str(corpus), recursive=False)] == ["invoice_1.pdf"]
+
+
+@pytest.mark.parametrize("batch_size", [1, 2])
+def test_classifies_against_flask_service(corpus, flask_client, batch_size):
+    bulk = BulkClassifier(concurrency=2, batch_size=batch_size, client=flask_client)
+    records = {Path(record['path']).name: record for record in bulk.run(iter_files(str(corpus)))}
+    assert set(records) == {"invoice_1.pdf", "statement.PDF"}
+    for record in records.values():
+        assert record['error'] is None
+        assert record['file_class'] in ("invoice", "bank_statement", "drivers_license")
+        assert 0.0 <= record['confidence'] <= 1.0
+
+
+def test_retries_retryable_statuses(corpus):
+    calls = []
+
+    def handler(request):
+        calls.append(request)
+        if len(calls) < 3:
+            return httpx.Response(503, headers={'Retry-After': '0'}, json={"error": "busy"})
+        return httpx.Response(200, json={"predicted_class": "invoice", "confidence": 0.9})
+
+    client = httpx.Client(transport=httpx.MockTransport(handler), base_url="http://service")
+    bulk = BulkClassifier(retries=3, client=client)
+    [record] = bulk.classify([str(corpus / "invoice_1.pdf")])
+    assert len(calls) == 3
+    assert record['file_class'] == "invoice" and record['error'] is None
+
+
+def test_gives_up_after_retries(corpus):
+    client = httpx.Client(
+        transport=httpx.MockTransport(lambda request: httpx.Response(429, json={"error": "slow down"})),
+        base_url="http://service"
+    )
+    bulk = BulkClassifier(retries=1, backoff=0.0, client=client)
+    [record] = bulk.classify([str(corpus / "invoice_1.pdf")])
+    assert record['error'] == "slow down"
+
+
+def test_checkpoint_skips_only_successes(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text(
+        json.dumps({"path": "a.pdf", "file_class": "invoice", "confidence": 0.9, "error": None}) + "\n"
+        + json.dumps({"path": "b.pdf", "file_class": None, "confidence": 0.0, "error": "timeout"}) + "\n"
+        + '{"path": "c.pd'
+    )
+    assert load_checkpoint(str(output)) == {"a.pdf"}
+    assert load_checkpoint(str(tmp_path / "missing.jsonl")) == set()
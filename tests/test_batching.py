@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+import pytest
+from src.batching import MicroBatcher
+
+
+def test_concurrent_submits_share_a_batch():
+    calls = []
+
+    def double(items):
+        calls.append(list(items))
+        return [item * 2 for item in items]
+
+    batcher = MicroBatcher(double, max_batch_size=8, max_wait_ms=50)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(5)))
+
+    assert asyncio.run(run()) == [0, 2, 4, 6, 8]
+    assert calls == [[0, 1, 2, 3, 4]]
+    stats = batcher.stats()
+    assert stats['batches'] == 1
+    assert stats['items'] == 5
+    assert stats['batch_size_histogram'][8] == 1
+    assert stats['queue_depth'] == 0
+
+
+def test_batches_are_capped_at_max_size():
+    sizes = []
+
+    def identity(items):
+        sizes.append(len(items))
+        return items
+
+    batcher = MicroBatcher(identity, max_batch_size=3, max_wait_ms=50)
+
+    async def run():
+        return await asyncio.gather(*(batcher.submit(i) for i in range(7)))
+
+    assert asyncio.run(run()) == list(range(7))
+    assert sizes == [3, 3, 1]
+    assert batcher.stats()['batch_size_histogram'] == {1: 1, 2: 0, 3: 2}
+
+
+def test_batch_runs_off_the_event_loop():
+    threads = []
+
+    def record(items):
+        threads.append(threading.get_ident())
+        return items
+
+    batcher = MicroBatcher(record, max_wait_ms=0)
+    asyncio.run(batcher.submit('x'))
+    assert threads and threads[0] != threading.get_ident()
+
+
+def test_errors_propagate_to_every_caller():
+    def fail(items):
+        raise ValueError("boom")
+
+    batcher = MicroBatcher(fail, max_wait_ms=10)
+
+    async def run():
+        return await asyncio.gather(batcher.submit(1), batcher.submit(2),
+                                    return_exceptions=True)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_invalid_settings():
+    with pytest.raises(ValueError):
+        MicroBatcher(list, max_batch_size=0)
+    with pytest.raises(ValueError):
+        MicroBatcher(list, max_wait_ms=-1)
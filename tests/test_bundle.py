@@ -0,0 +1,103 @@
+import io
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import numpy as np
+import pytest
+from src.extractor.registry import default_registry
+from src.model.bundle import MANIFEST_NAME
+from src.model.classifier import DocumentClassifier, load_classifier
+from src.model.forest import TreeEnsemble
+
+project_root = Path(__file__).parent.parent
+models_dir = project_root / "models"
+
+
+@pytest.fixture(scope="module")
+def sklearn_classifier():
+    classifier = DocumentClassifier()
+    classifier.load(
+        str(models_dir / "classifier.joblib"),
+        str(models_dir / "vectorizer.joblib"),
+        str(models_dir / "label_encoder.joblib")
+    )
+    return classifier
+
+
+@pytest.fixture(scope="module")
+def corpus_texts():
+    registry = default_registry()
+    texts = ["", "INVOICE total amount due", "bank statement balance " * 50]
+    for path in sorted((project_root / "files").iterdir()):
+        data = path.read_bytes()
+        extractor = registry.get(path.name, data)
+        if extractor is not None:
+            texts.append(extractor.extract(io.BytesIO(data))['text'])
+    return texts
+
+
+def test_bundle_matches_sklearn(tmp_path, sklearn_classifier, corpus_texts):
+    sklearn_classifier.save_bundle(str(tmp_path))
+    bundled = DocumentClassifier.from_bundle(str(tmp_path))
+
+    X_sklearn = sklearn_classifier.vectorizer.transform(corpus_texts)
+    X_bundle = bundled.vectorizer.transform(corpus_texts)
+    np.testing.assert_allclose(X_bundle.toarray(), X_sklearn.toarray(), atol=1e-12)
+    np.testing.assert_allclose(
+        bundled.model.predict_proba(X_bundle),
+        sklearn_classifier.model.predict_proba(X_sklearn),
+        atol=1e-12
+    )
+    assert bundled.predict_batch(corpus_texts) == sklearn_classifier.predict_batch(corpus_texts)
+
+
+def test_shipped_bundle_is_current(sklearn_classifier, tmp_path):
+    manifest = sklearn_classifier.save_bundle(str(tmp_path))
+    shipped = json.loads((models_dir / "bundle" / MANIFEST_NAME).read_text())
+    assert shipped['model_version'] == manifest['model_version']
+
+
+def test_bundle_is_memory_mapped():
+    classifier = DocumentClassifier.from_bundle(str(models_dir / "bundle"))
+    assert isinstance(classifier.model.value, np.memmap)
+    assert classifier.version is not None
+
+
+def test_bundle_load_does_not_import_sklearn():
+    code = (
+        "import sys\n"
+        "from src.model.classifier import DocumentClassifier\n"
+        "classifier = DocumentClassifier.from_bundle('models/bundle')\n"
+        "classifier.predict('INVOICE')\n"
+        "print('sklearn' in sys.modules)\n"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=project_root,
+                            capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "False"
+
+
+def test_unknown_format_version_is_rejected(tmp_path, sklearn_classifier):
+    sklearn_classifier.save_bundle(str(tmp_path))
+    manifest_path = tmp_path / MANIFEST_NAME
+    manifest = json.loads(manifest_path.read_text())
+    manifest['format_version'] = 999
+    manifest_path.write_text(json.dumps(manifest))
+    with pytest.raises(ValueError):
+        DocumentClassifier.from_bundle(str(tmp_path))
+
+
+def test_joblib_override_wins_over_committed_bundle(tmp_path, monkeypatch):
+    assert (models_dir / "bundle").is_dir()
+    model_path = tmp_path / "classifier.joblib"
+    model_path.write_bytes((models_dir / "classifier.joblib").read_bytes())
+    monkeypatch.delenv("MODEL_BUNDLE", raising=False)
+    monkeypatch.setenv("MODEL_PATH", str(model_path))
+    monkeypatch.setenv("MODEL_BACKEND", "sklearn")
+    classifier = load_classifier(str(models_dir))
+    assert not isinstance(classifier.model, TreeEnsemble)
+
+    # An explicit bundle still takes precedence
+    monkeypatch.setenv("MODEL_BUNDLE", str(models_dir / "bundle"))
+    assert isinstance(load_classifier(str(models_dir)).model, TreeEnsemble)
@@ -0,0 +1,122 @@
+import time
+
+import pytest
+from src.cache import ExtractionCache, LRUCache, ResultCache, SQLiteStore, content_key, file_content_key
+
+
+def test_content_key_depends_on_every_part():
+    assert content_key(b"abc", "v1") == content_key(b"abc", "v1")
+    assert content_key(b"abc", "v1") != content_key(b"abc", "v2")
+    assert content_key(b"abc", "v1") != content_key(b"abd", "v1")
+    assert content_key(b"ab", "cv1") != content_key(b"abc", "v1")
+
+
+def test_lru_evicts_least_recently_used():
+    cache = LRUCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats() == {'size': 2, 'hits': 3, 'misses': 1, 'evictions': 1}
+
+
+def test_lru_ttl_expiry():
+    cache = LRUCache(max_size=4, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_lru_rejects_invalid_size():
+    with pytest.raises(ValueError):
+        LRUCache(max_size=0)
+
+
+def test_sqlite_store_persists(tmp_path):
+    path = str(tmp_path / "cache.db")
+    SQLiteStore(path).set("k", {"file_class": "invoice", "confidence": 0.9})
+    store = SQLiteStore(path)
+    assert store.get("k") == {"file_class": "invoice", "confidence": 0.9}
+    assert store.get("missing") is None
+    assert store.stats() == {'size': 1, 'hits': 1, 'misses': 1}
+
+
+def test_result_cache_promotes_disk_hits(tmp_path):
+    path = str(tmp_path / "cache.db")
+    ResultCache(db_path=path).set("k", {"confidence": 0.5})
+
+    cache = ResultCache(db_path=path)
+    assert cache.get("k") == {"confidence": 0.5}
+    assert cache.get("k") == {"confidence": 0.5}
+    stats = cache.stats()
+    assert stats['memory']['hits'] == 1
+    assert stats['disk']['hits'] == 1
+
+
+def test_result_cache_from_env(monkeypatch, tmp_path):
+    monkeypatch.setenv("RESULT_CACHE_SIZE", "3")
+    monkeypatch.setenv("RESULT_CACHE_TTL", "0")
+    monkeypatch.setenv("RESULT_CACHE_DB", str(tmp_path / "cache.db"))
+    cache = ResultCache.from_env()
+    assert cache.memory.max_size == 3
+    assert cache.memory.ttl is None
+    assert cache.disk is not None
+
+
+def test_result_cache_disabled(tmp_path):
+    cache = ResultCache(max_size=0, db_path=str(tmp_path / "cache.db"))
+    cache.set("k", {"confidence": 0.5})
+    assert cache.get("k") is None
+    assert cache.disk is None
+
+
+class CountingExtractor:
+    def __init__(self, version="1", error=None):
+        self.version = version
+        self.error = error
+        self.calls = 0
+
+    def fingerprint(self):
+        return f"counting/{self.version}"
+
+    def extract(self, file):
+        self.calls += 1
+        return {'text': file.read().decode(), 'metadata': {'pages': 1}, 'error': self.error}
+
+
+def test_file_content_key_matches_content_key(tmp_path):
+    path = tmp_path / "doc.bin"
+    path.write_bytes(b"abc" * 1000)
+    assert file_content_key(str(path), "v1", block_size=7) == content_key(b"abc" * 1000, "v1")
+
+
+def test_extraction_cache_reuses_results(tmp_path):
+    path = str(tmp_path / "extractions.db")
+    extractor = CountingExtractor()
+    assert ExtractionCache(path).extract(extractor, b"hello")['text'] == "hello"
+
+    cache = ExtractionCache(path)
+    assert cache.extract(extractor, b"hello") == {'text': "hello", 'metadata': {'pages': 1}, 'error': None}
+    assert extractor.calls == 1
+    assert cache.stats() == {'size': 1, 'hits': 1, 'misses': 0}
+
+
+def test_extraction_cache_invalidated_by_extractor_version(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "extractions.db"))
+    cache.extract(CountingExtractor(version="1"), b"hello")
+    upgraded = CountingExtractor(version="2")
+    cache.extract(upgraded, b"hello")
+    assert upgraded.calls == 1
+
+
+def test_extraction_cache_skips_failures(tmp_path):
+    cache = ExtractionCache(str(tmp_path / "extractions.db"))
+    failing = CountingExtractor(error="broken")
+    cache.extract(failing, b"hello")
+    cache.extract(failing, b"hello")
+    assert failing.calls == 2
+    assert cache.stats()['size'] == 0
@@ -0,0 +1,114 @@
+import pytest
+
+from src.cascade import (CascadeTier, ClassificationCascade, filename_tier, model_tier,
+                         parse_tiers)
+
+
+class RecordingTier:
+    """Tier returning fixed answers per text and recording what it was asked."""
+
+    def __init__(self, answers):
+        self.answers = answers
+        self.calls = []
+
+    def __call__(self, filenames, texts):
+        self.calls.append(list(texts))
+        return [self.answers.get(text, ("unknown", 0.0)) for text in texts]
+
+
+class FixedModel:
+    def __init__(self, label, confidence):
+        self.label = label
+        self.confidence = confidence
+        self.batches = []
+
+    def predict_batch(self, texts):
+        self.batches.append(list(texts))
+        return [(self.label, self.confidence)] * len(texts)
+
+
+def test_parse_tiers():
+    assert parse_tiers("filename:1.0, tfidf:0.8,zero_shot:0.7,") == [
+        ("filename", 1.0), ("tfidf", 0.8), ("zero_shot", 0.7)]
+    with pytest.raises(ValueError):
+        parse_tiers("tfidf")
+
+
+def test_only_uncertain_documents_escalate():
+    fast = RecordingTier({"a": ("invoice", 0.95), "b": ("invoice", 0.5), "c": ("unknown", 0.0)})
+    slow = RecordingTier({"b": ("bank_statement", 0.9), "c": ("invoice", 0.8)})
+    cascade = ClassificationCascade([CascadeTier("fast", fast, 0.8), CascadeTier("slow", slow, 0.7)])
+
+    results = cascade.classify_batch(["a.pdf", "b.pdf", "c.pdf"], ["a", "b", "c"])
+    assert fast.calls == [["a", "b", "c"]]
+    assert slow.calls == [["b", "c"]]
+    assert [(r['label'], r['tier'], r['confident']) for r in results] == [
+        ("invoice", "fast", True), ("bank_statement", "slow", True), ("invoice", "slow", True)]
+    assert results[1]['predictions'] == {"fast": ("invoice", 0.5), "slow": ("bank_statement", 0.9)}
+    assert cascade.stats() == {"fast": 1, "slow": 2, "unconfident": 0}
+
+
+def test_confident_batch_never_reaches_expensive_tier():
+    slow = RecordingTier({})
+    cascade = ClassificationCascade([
+        CascadeTier("fast", RecordingTier({"a": ("invoice", 0.99)}), 0.8),
+        CascadeTier("slow", slow, 0.7),
+    ])
+    assert cascade.classify("a.pdf", "a")['tier'] == "fast"
+    assert slow.calls == []
+
+
+def test_falls_back_to_most_confident_answer():
+    cascade = ClassificationCascade([
+        CascadeTier("filename", RecordingTier({"x": ("invoice", 0.6)}), 1.0),
+        CascadeTier("model", RecordingTier({"x": ("bank_statement", 0.4)}), 0.8),
+    ])
+    result = cascade.classify("invoice.pdf", "x")
+    assert (result['label'], result['confidence'], result['tier'], result['confident']) == (
+        "invoice", 0.6, "filename", False)
+
+    result = cascade.classify("scan.pdf", "y")
+    assert (result['label'], result['tier']) == ("unknown", None)
+    assert cascade.stats()['unconfident'] == 2
+
+
+def test_failing_tier_escalates():
+    def broken(filenames, texts):
+        raise RuntimeError("model crashed")
+
+    cascade = ClassificationCascade([
+        CascadeTier("broken", broken, 0.5),
+        CascadeTier("backup", RecordingTier({"a": ("invoice", 0.9)}), 0.5),
+    ])
+    result = cascade.classify("a.pdf", "a")
+    assert result['tier'] == "backup"
+    assert result['predictions']['broken'] == ("unknown", 0.0)
+
+
+def test_from_spec_orders_and_skips_unavailable_tiers():
+    available = {"fast": RecordingTier({}), "slow": RecordingTier({})}
+    cascade = ClassificationCascade.from_spec("slow:0.5,missing:0.9,fast:0.7", available)
+    assert [(tier.name, tier.threshold) for tier in cascade.tiers] == [("slow", 0.5), ("fast", 0.7)]
+
+
+def test_invalid_cascades():
+    with pytest.raises(ValueError):
+        ClassificationCascade([])
+    tier = CascadeTier("same", RecordingTier({}), 0.5)
+    with pytest.raises(ValueError):
+        ClassificationCascade([tier, tier])
+
+
+def test_filename_tier():
+    classify = filename_tier(lambda name: "invoice" if "invoice" in name else "unknown", confidence=0.6)
+    assert classify(["invoice_1.pdf", "scan.pdf"], ["", ""]) == [("invoice", 0.6), ("unknown", 0.0)]
+
+
+def test_model_tier_skips_empty_texts_and_renames_labels():
+    model = FixedModel("drivers_license", 0.9)
+    classify = model_tier(model, labels={"drivers_license": "drivers_licence"})
+    assert classify(["a", "b", "c"], ["text", "  ", "more"]) == [
+        ("drivers_licence", 0.9), ("unknown", 0.0), ("drivers_licence", 0.9)]
+    assert model.batches == [["text", "more"]]
+    assert classify(["a"], [""]) == [("unknown", 0.0)]
+    assert len(model.batches) == 1
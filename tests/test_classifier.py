@@ -81,5 +81,19 @@ class TestDocumentClassifier(unittest.TestCase):
         predicted_class, confidence = self.classifier.predict(random_text)
         self.assertLess(confidence, 0.7)  # Should have lower confidence for random text
 
+    def test_predict_batch_matches_predict(self):
+        """Test batched prediction agrees with single-document prediction."""
+        texts = list(self.test_texts.values())
+        results = self.classifier.predict_batch(texts)
+        self.assertEqual(len(results), len(texts))
+        for text, (predicted_class, confidence) in zip(texts, results):
+            single_class, single_confidence = self.classifier.predict(text)
+            self.assertEqual(predicted_class, single_class)
+            self.assertAlmostEqual(confidence, single_confidence)
+
+    def test_predict_batch_empty(self):
+        """Test batched prediction with no documents."""
+        self.assertEqual(self.classifier.predict_batch([]), [])
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,67 @@
+import csv
+import io
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+from src.cli import OfflineClassifier, ResultWriter, iter_paths, load_classifier, main
+from src.extractor.pool import ExtractionPool
+
+project_root = Path(__file__).parent.parent
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    return load_classifier()
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    (tmp_path / "nested").mkdir()
+    shutil.copy(project_root / "files" / "invoice_1.pdf", tmp_path / "invoice_1.pdf")
+    shutil.copy(project_root / "files" / "bank_statement_1.docx", tmp_path / "nested" / "statement.docx")
+    (tmp_path / "notes.txt").write_text("plain text")
+    (tmp_path / ".hidden.pdf").write_bytes(b"")
+    return tmp_path
+
+
+def test_iter_paths_expands_directories(corpus):
+    found = [Path(path).relative_to(corpus).as_posix() for path in iter_paths([str(corpus)])]
+    assert found == ["invoice_1.pdf", "notes.txt", "nested/statement.docx"]
+    assert list(iter_paths(["a.pdf"])) == ["a.pdf"]
+
+
+def test_classifies_in_input_order(classifier, corpus):
+    offline = OfflineClassifier(classifier, pool=ExtractionPool(max_workers=0), batch_size=2)
+    paths = [str(corpus / "invoice_1.pdf"), str(corpus / "notes.txt"),
+             str(corpus / "nested" / "statement.docx"), str(corpus / "missing.pdf")]
+    records = list(offline.run(paths))
+
+    assert [record['path'] for record in records] == paths
+    assert records[0]['file_class'] == "invoice" and records[0]['error'] is None
+    assert records[0]['extract_ms'] > 0 and records[0]['predict_ms'] > 0
+    assert records[1]['error'] == "Unsupported file type"
+    assert records[2]['file_class'] == "bank_statement"
+    assert records[3]['file_class'] is None and records[3]['error']
+
+
+def test_csv_writer_has_header():
+    stream = io.StringIO()
+    writer = ResultWriter(stream, 'csv')
+    writer.write({'path': "a.pdf", 'file_class': "invoice", 'confidence': 0.9, 'error': None,
+                  'extract_ms': 1.0, 'predict_ms': 0.1, 'text': "ignored"})
+    rows = list(csv.DictReader(io.StringIO(stream.getvalue())))
+    assert rows == [{'path': "a.pdf", 'file_class': "invoice", 'confidence': "0.9", 'error': "",
+                     'extract_ms': "1.0", 'predict_ms': "0.1"}]
+
+
+def test_main_writes_jsonl(corpus, tmp_path, monkeypatch):
+    monkeypatch.setenv("EXTRACTION_WORKERS", "0")
+    file_list = tmp_path / "list.txt"
+    file_list.write_text(f"{corpus / 'invoice_1.pdf'}\n\n")
+    output = tmp_path / "out.jsonl"
+    main([str(corpus / "nested"), "--file-list", str(file_list), "--output", str(output)])
+
+    records = [json.loads(line) for line in output.read_text().splitlines()]
+    assert [record['file_class'] for record in records] == ["bank_statement", "invoice"]
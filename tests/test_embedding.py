@@ -0,0 +1,118 @@
+import numpy as np
+import pytest
+
+from src.embedding.embedder import DocumentEmbedder, split_chunks
+
+
+class CharacterEncoder:
+    """Deterministic stand-in model: character-class histogram of each text."""
+
+    dim = 8
+
+    def __init__(self):
+        self.calls = []
+
+    def encode(self, texts, batch_size=32, show_progress_bar=False):
+        self.calls.append(list(texts))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for char in text:
+                vectors[row, ord(char) % self.dim] += 1
+        return vectors
+
+    def get_sentence_embedding_dimension(self):
+        return self.dim
+
+
+@pytest.fixture
+def model():
+    return CharacterEncoder()
+
+
+def test_split_chunks():
+    assert split_chunks("abcdefg", 3) == ["abc", "def", "g"]
+    assert split_chunks("") == []
+
+
+def test_split_chunks_follows_paragraphs_and_lines():
+    text = "Invoice 42\nTotal due\n\n  \nline one\nline two\nline three\n\nFooter"
+    assert split_chunks(text, 20) == ["Invoice 42\nTotal due", "line one\nline two\n", "line three", "Footer"]
+
+
+def test_embed_averages_chunks(model):
+    embedder = DocumentEmbedder(model=model, chunk_size=4)
+    text = "abcdefghij"
+    expected = model.encode(split_chunks(text, 4)).mean(axis=0)
+    assert np.allclose(embedder.embed(text), expected)
+
+
+def test_embed_documents_matches_single_documents(model):
+    texts = ["invoice total due " * 5, "", "driver licence", "bank statement balance " * 3]
+    batched = DocumentEmbedder(model=model, chunk_size=16, batch_size=3).embed_documents(texts)
+    single = DocumentEmbedder(model=CharacterEncoder(), chunk_size=16, cache_size=0)
+    assert batched.shape == (4, CharacterEncoder.dim)
+    for text, row in zip(texts, batched):
+        assert np.allclose(row, single.embed(text))
+    assert not batched[1].any()
+
+
+def test_batches_are_fixed_size_and_sorted(model):
+    texts = ["x" * n for n in (3, 9, 1, 7, 5)]
+    DocumentEmbedder(model=model, chunk_size=100, batch_size=2).embed_documents(texts)
+    assert [len(call) for call in model.calls] == [2, 2, 1]
+    lengths = [len(chunk) for call in model.calls for chunk in call]
+    assert lengths == sorted(lengths, reverse=True)
+
+
+def test_shared_chunks_are_encoded_once(model):
+    footer = "Terms and conditions apply."
+    embedder = DocumentEmbedder(model=model, chunk_size=len(footer))
+    embedder.embed_documents([footer + "A" * len(footer), footer + "B" * len(footer), footer])
+    encoded = [chunk for call in model.calls for chunk in call]
+    assert encoded.count(footer) == 1
+    assert len(encoded) == 3
+
+
+def test_footer_is_encoded_once_across_document_lengths(model):
+    footer = "Payment is due within 30 days.\nLate payments incur a 2% monthly fee."
+    bodies = ["INVOICE 1\nTotal: $10", "INVOICE 2\n" + "Consulting services rendered\n" * 7, "Short"]
+    embedder = DocumentEmbedder(model=model, chunk_size=100)
+    embedder.embed_documents([body + "\n\n" + footer for body in bodies])
+    encoded = [chunk for call in model.calls for chunk in call]
+    assert encoded.count(footer) == 1
+
+
+def test_cache_hits_skip_encoding(model):
+    embedder = DocumentEmbedder(model=model, chunk_size=5)
+    first = embedder.embed_documents(["hello world", "boilerplate"])
+    calls = len(model.calls)
+    second = embedder.embed_documents(["boilerplate", "hello world"])
+    assert len(model.calls) == calls
+    assert np.allclose(first[::-1], second)
+    assert embedder.cache_stats()['hits'] > 0
+
+
+def test_cache_evicts_least_recently_used(model):
+    embedder = DocumentEmbedder(model=model, chunk_size=10, cache_size=2)
+    embedder.encode_chunks(["a", "b", "c"])
+    assert len(embedder.cache) == 2
+    assert embedder.cache_stats()['evictions'] == 1
+
+
+def test_cached_vectors_are_read_only(model):
+    embedder = DocumentEmbedder(model=model)
+    vector = embedder.encode_chunks(["abc"])[0]
+    vector[0] = 100.0
+    assert embedder.encode_chunks(["abc"])[0][0] != 100.0
+
+
+def test_embed_list_encodes_each_string(model):
+    embedder = DocumentEmbedder(model=model)
+    texts = ["first text", "second"]
+    assert np.allclose(embedder.embed(texts), CharacterEncoder().encode(texts))
+
+
+def test_empty_inputs(model):
+    embedder = DocumentEmbedder(model=model)
+    assert embedder.embed_documents([]).shape == (0, CharacterEncoder.dim)
+    assert embedder.encode_chunks([]).shape == (0, CharacterEncoder.dim)
@@ -0,0 +1,167 @@
+import io
+from pathlib import Path
+
+import PyPDF2
+import pytest
+from src.extractor.base import collect_text
+from src.extractor.mupdf import PyMuPDFExtractor
+from src.extractor.pdf import PDFExtractor
+from src.extractor.registry import default_registry, needs_ocr
+from src.extractor.sniff import SNIFF_BYTES, detect_format, read_head, sniff_format, stream_size
+from src.extractor.word import DocxExtractor
+
+project_root = Path(__file__).parent.parent
+
+
+def make_pdf(page_count):
+    """Build a PDF by repeating the first page of a sample invoice."""
+    reader = PyPDF2.PdfReader(str(project_root / "files" / "invoice_1.pdf"))
+    writer = PyPDF2.PdfWriter()
+    for _ in range(page_count):
+        writer.add_page(reader.pages[0])
+    buffer = io.BytesIO()
+    writer.write(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def test_collect_text_without_budget():
+    assert collect_text(["a", "b", "c"]) == ("a\nb\nc", 3, False)
+
+
+def test_collect_text_stops_consuming_pages():
+    consumed = []
+
+    def pages():
+        for i in range(100):
+            consumed.append(i)
+            yield "x" * 10
+
+    text, pages_read, truncated = collect_text(pages(), max_chars=25)
+    assert text == ("x" * 10 + "\n") * 2 + "xxx"
+    assert pages_read == 3
+    assert truncated
+    assert len(consumed) == 3
+
+
+def test_collect_text_page_budget():
+    assert collect_text(["a", "b", "c"], max_pages=2) == ("a\nb", 2, True)
+    assert collect_text(["a", "b"], max_pages=2) == ("a\nb", 2, False)
+
+
+def test_collect_text_page_budget_parses_no_extra_page():
+    consumed = []
+
+    def pages():
+        for i in range(5):
+            consumed.append(i)
+            yield str(i)
+
+    assert collect_text(pages(), max_pages=2, total_pages=5) == ("0\n1", 2, True)
+    assert consumed == [0, 1]
+    consumed.clear()
+    assert collect_text(pages(), max_pages=5, total_pages=5) == ("0\n1\n2\n3\n4", 5, False)
+
+
+def test_pdf_extract_unbounded():
+    content = PDFExtractor().extract(make_pdf(5))
+    assert content['error'] is None
+    assert content['metadata']['page_count'] == 5
+    assert content['metadata']['pages_read'] == 5
+    assert not content['metadata']['truncated']
+    assert content['text'].count('INVOICE') == 5
+
+
+@pytest.mark.parametrize("extractor, pages_read", [
+    (PDFExtractor(max_pages=2), 2),
+    (PDFExtractor(max_chars=10), 1),
+])
+def test_pdf_extract_budget(extractor, pages_read):
+    content = extractor.extract(make_pdf(5))
+    assert content['metadata']['page_count'] == 5
+    assert content['metadata']['pages_read'] == pages_read
+    assert content['metadata']['truncated']
+    assert content['text'].count('INVOICE') == pages_read
+
+
+def test_pdf_iter_pages_is_lazy():
+    pages = PDFExtractor().iter_pages(make_pdf(3))
+    assert 'INVOICE' in next(pages)
+    assert len(list(pages)) == 2
+
+
+@pytest.mark.parametrize("filename, expected", [
+    ("invoice_1.pdf", "pdf"),
+    ("invoice_1.docx", "docx"),
+    ("drivers_license_1.jpg", "jpg"),
+])
+def test_sniff_format(filename, expected):
+    head = (project_root / "files" / filename).read_bytes()[:SNIFF_BYTES]
+    assert sniff_format(head) == expected
+
+
+def test_sniff_format_unknown():
+    assert sniff_format(b"plain text") is None
+
+
+def test_pymupdf_extract_budget():
+    content = PyMuPDFExtractor(max_pages=2).extract(make_pdf(5))
+    assert content['error'] is None
+    assert content['metadata']['page_count'] == 5
+    assert content['metadata']['pages_read'] == 2
+    assert content['text'].count('INVOICE') == 2
+
+
+def test_docx_extract():
+    with open(project_root / "files" / "invoice_1.docx", 'rb') as f:
+        content = DocxExtractor().extract(f)
+    assert content['error'] is None
+    assert content['text'].startswith('INVOICE')
+
+
+def test_registry_prefers_detected_format():
+    registry = default_registry(pdf_backend='pypdf2')
+    head = (project_root / "files" / "invoice_1.pdf").read_bytes()[:SNIFF_BYTES]
+    assert isinstance(registry.get("upload.docx", head), PDFExtractor)
+    assert isinstance(registry.get("upload.docx"), DocxExtractor)
+    assert registry.get("notes.txt", b"plain text") is None
+    assert registry.supports_format("scan.pdf")
+    assert not registry.supports_format("notes.txt")
+
+
+def test_default_registry_backends():
+    assert isinstance(default_registry(pdf_backend='pymupdf').for_format('pdf'),
+                      PyMuPDFExtractor)
+    assert isinstance(default_registry(pdf_backend='pypdf2').for_format('pdf'),
+                      PDFExtractor)
+    with pytest.raises(ValueError):
+        default_registry(pdf_backend='unknown')
+
+
+def test_detect_format_disambiguates_zip_by_name():
+    head = b'PK\x03\x04' + b'\0' * 64
+    assert detect_format(head) == 'zip'
+    assert detect_format(head, 'report.docx') == 'docx'
+
+
+def test_read_head_and_size_do_not_consume():
+    stream = io.BytesIO(b'%PDF-1.4 rest of file')
+    assert read_head(stream, 8) == b'%PDF-1.4'
+    assert stream_size(stream) == 21
+    assert stream.tell() == 0
+
+
+def test_fingerprint_tracks_settings():
+    assert PyMuPDFExtractor().fingerprint() == PyMuPDFExtractor().fingerprint()
+    assert PyMuPDFExtractor(max_pages=2).fingerprint() != PyMuPDFExtractor().fingerprint()
+    assert PDFExtractor().fingerprint() != PyMuPDFExtractor().fingerprint()
+
+
+def test_needs_ocr():
+    assert not needs_ocr(PyMuPDFExtractor())
+    assert not needs_ocr(DocxExtractor())
+
+    class ScanExtractor(DocxExtractor):
+        formats = ('png',)
+
+    assert needs_ocr(ScanExtractor())
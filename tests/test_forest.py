@@ -0,0 +1,78 @@
+import io
+from pathlib import Path
+
+import numpy as np
+import pytest
+from src.extractor.registry import default_registry
+from src.model.classifier import DocumentClassifier
+from src.model.forest import TreeEnsemble
+
+project_root = Path(__file__).parent.parent
+models_dir = project_root / "models"
+
+
+@pytest.fixture(scope="module")
+def classifier():
+    classifier = DocumentClassifier()
+    classifier.load(
+        str(models_dir / "classifier.joblib"),
+        str(models_dir / "vectorizer.joblib"),
+        str(models_dir / "label_encoder.joblib")
+    )
+    return classifier
+
+
+@pytest.fixture(scope="module")
+def features(classifier):
+    registry = default_registry()
+    texts = ["", "INVOICE total amount due", "account balance deposit withdrawal"]
+    for path in sorted((project_root / "files").iterdir()):
+        data = path.read_bytes()
+        extractor = registry.get(path.name, data)
+        if extractor is not None:
+            texts.append(extractor.extract(io.BytesIO(data))['text'])
+    return classifier.vectorizer.transform(texts)
+
+
+def test_matches_sklearn_on_corpus(classifier, features):
+    forest = TreeEnsemble.from_sklearn(classifier.model)
+    assert forest.n_trees == len(classifier.model.estimators_)
+    np.testing.assert_array_equal(
+        forest.predict_proba(features),
+        classifier.model.predict_proba(features)
+    )
+
+
+def test_dense_and_sparse_inputs_agree(classifier, features):
+    forest = TreeEnsemble.from_sklearn(classifier.model)
+    np.testing.assert_array_equal(
+        forest.predict_proba(features.toarray()),
+        forest.predict_proba(features)
+    )
+
+
+def test_rejects_wrong_feature_count(classifier):
+    forest = TreeEnsemble.from_sklearn(classifier.model)
+    with pytest.raises(ValueError):
+        forest.predict_proba(np.zeros((1, forest.n_features + 1)))
+
+
+def test_compiled_classifier_predicts_the_same(classifier):
+    texts = ["INVOICE total amount due", "BANK STATEMENT balance", "DRIVER LICENSE class C"]
+    expected = classifier.predict_batch(texts)
+
+    compiled = DocumentClassifier(
+        vectorizer=classifier.vectorizer,
+        model=classifier.model,
+        label_encoder=classifier.label_encoder
+    ).compile()
+    assert isinstance(compiled.model, TreeEnsemble)
+    assert compiled.predict_batch(texts) == expected
+    assert compiled.predict(texts[0]) == expected[0]
+
+
+def test_concatenate_averages_over_all_trees(classifier, features):
+    forest = TreeEnsemble.from_sklearn(classifier.model)
+    merged = TreeEnsemble.concatenate([forest, forest])
+    assert merged.n_trees == 2 * forest.n_trees
+    np.testing.assert_allclose(merged.predict_proba(features), forest.predict_proba(features))
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+from src.model.classifier import DocumentClassifier
+from src.model.hashing import HashingTfidfVectorizer
+
+TEXTS = [
+    "INVOICE Invoice Number INV-001 Client Tech Corp Total Amount $500 Payment Terms Net 30",
+    "INVOICE Invoice Number INV-002 Client Globex Total Amount $900 Payment Terms Net 30",
+    "BANK STATEMENT Account ****1234 Current Balance $1000 Recent Transactions Salary Credit",
+    "BANK STATEMENT Account ****5678 Current Balance $2500 Recent Transactions Rent Payment",
+    "DRIVER LICENSE State of Texas DL Number TX123 Class C Restrictions None",
+    "DRIVER LICENSE State of Oregon DL Number OR456 Class C Restrictions None",
+]
+LABELS = ["invoice", "invoice", "bank_statement", "bank_statement",
+          "drivers_license", "drivers_license"]
+
+
+def test_buckets_are_stable():
+    vectorizer = HashingTfidfVectorizer(n_features=1024)
+    assert vectorizer.bucket("invoice") == HashingTfidfVectorizer(n_features=1024).bucket("invoice")
+    assert 0 <= vectorizer.bucket("invoice") < 1024
+
+
+def test_partial_fit_matches_fit():
+    whole = HashingTfidfVectorizer(n_features=4096, min_df=2).fit(TEXTS)
+    chunked = HashingTfidfVectorizer(n_features=4096, min_df=2)
+    for start in range(0, len(TEXTS), 4):
+        chunked.partial_fit(TEXTS[start:start + 4])
+    np.testing.assert_array_equal(chunked.idf_, whole.idf_)
+    assert (whole.transform(TEXTS) != chunked.transform(TEXTS)).nnz == 0
+
+
+def test_transform_is_normalized_and_ignores_unseen_terms():
+    vectorizer = HashingTfidfVectorizer(n_features=4096).fit(TEXTS)
+    X = vectorizer.transform(TEXTS + ["zzzqqq xxyyzz"])
+    assert X.shape == (len(TEXTS) + 1, 4096)
+    norms = np.sqrt(X.multiply(X).sum(axis=1)).A1
+    np.testing.assert_allclose(norms[:-1], 1.0)
+    assert X[-1].nnz == 0
+
+
+def test_min_df_drops_rare_buckets():
+    vectorizer = HashingTfidfVectorizer(n_features=4096, min_df=2, stop_words=None).fit(TEXTS)
+    assert vectorizer.idf_[vectorizer.bucket("invoice")] > 0
+    assert vectorizer.idf_[vectorizer.bucket("globex")] == 0
+
+
+def test_unfitted_transform_raises():
+    with pytest.raises(RuntimeError):
+        HashingTfidfVectorizer().transform(["text"])
+
+
+def test_hashing_bundle_round_trip(tmp_path):
+    classifier = DocumentClassifier(vectorizer=HashingTfidfVectorizer(n_features=4096))
+    classifier.train(TEXTS * 3, LABELS * 3, validation_split=0.5)
+    manifest = classifier.save_bundle(str(tmp_path))
+    assert manifest['featurizer']['type'] == 'hashing'
+    assert 'vocabulary' not in manifest['arrays']
+
+    loaded = DocumentClassifier.from_bundle(str(tmp_path))
+    assert isinstance(loaded.vectorizer, HashingTfidfVectorizer)
+    assert loaded.predict_batch(TEXTS) == classifier.predict_batch(TEXTS)
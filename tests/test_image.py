@@ -0,0 +1,65 @@
+import io
+
+import pytest
+from PIL import Image
+
+pytest.importorskip("pytesseract")
+
+from src.extractor.image import MAX_IMAGE_PIXELS, ImageExtractor, otsu_threshold
+
+
+def encode(image, image_format):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format)
+    buffer.seek(0)
+    return buffer
+
+
+def test_otsu_threshold_separates_modes():
+    histogram = [0] * 256
+    histogram[20] = 500
+    histogram[230] = 1500
+    assert 20 <= otsu_threshold(histogram) < 230
+
+
+def test_otsu_threshold_single_level():
+    histogram = [0] * 256
+    histogram[128] = 10
+    assert otsu_threshold(histogram) == 0
+
+
+@pytest.mark.parametrize("image_format", ["JPEG", "PNG"])
+def test_preprocess_caps_pixels_and_binarizes(image_format):
+    extractor = ImageExtractor(max_pixels=100_000)
+    with Image.open(encode(Image.new('RGB', (2000, 1500), 'white'), image_format)) as image:
+        prepared = extractor.preprocess(image)
+    assert prepared.mode == 'L'
+    assert prepared.width * prepared.height <= 100_000
+    assert set(prepared.getdata()) <= {0, 255}
+
+
+def test_preprocess_keeps_small_images():
+    extractor = ImageExtractor(binarize=False)
+    with Image.open(encode(Image.new('RGB', (300, 200), 'gray'), 'PNG')) as image:
+        prepared = extractor.preprocess(image)
+    assert prepared.size == (300, 200)
+
+
+def test_decompression_bomb_is_refused():
+    side = int(MAX_IMAGE_PIXELS ** 0.5) + 1
+    image = Image.new('1', (side, side))
+    result = ImageExtractor().extract(encode(image, 'PNG'))
+    assert result['text'] == ''
+    assert 'too large' in result['error']
+
+
+def test_invalid_image():
+    result = ImageExtractor().extract(io.BytesIO(b'not an image'))
+    assert result['error'].startswith("Failed to extract image content")
+
+
+def test_supports_format():
+    extractor = ImageExtractor()
+    assert extractor.supports_format("licence.JPEG")
+    assert extractor.supports_format("scan.png")
+    assert not extractor.supports_format("invoice.pdf")
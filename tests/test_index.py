@@ -0,0 +1,173 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from src.embedding.embedder import DocumentEmbedder
+from src.embedding.index import VectorIndex, normalize, quantize, top_k
+from src.embedding.knn import KNNClassifier
+from tests.test_embedding import CharacterEncoder
+
+
+def clustered(n, dim=16, n_clusters=8, seed=0):
+    """Vectors scattered around random centres, labelled by centre."""
+    rng = np.random.default_rng(seed)
+    centres = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    assignment = rng.integers(0, n_clusters, n)
+    vectors = centres[assignment] + 0.2 * rng.standard_normal((n, dim)).astype(np.float32)
+    return vectors, [f"class_{c}" for c in assignment], centres
+
+
+def brute_force(vectors, queries, k):
+    scores = normalize(queries) @ normalize(vectors).T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+
+def test_top_k_sorted():
+    scores = np.array([[0.1, 0.9, 0.5, 0.7]])
+    values, columns = top_k(scores, 2)
+    assert columns.tolist() == [[1, 3]]
+    assert values.tolist() == [[0.9, 0.7]]
+
+
+def test_quantize_int8_round_trip():
+    vectors = normalize(np.random.default_rng(0).standard_normal((10, 32)))
+    stored, scales = quantize(vectors, 'int8')
+    assert stored.dtype == np.int8
+    assert np.allclose(stored * scales[:, None], vectors, atol=0.01)
+
+
+@pytest.mark.parametrize("block_size", [7, 1000])
+def test_exact_search_matches_brute_force(block_size):
+    vectors, labels, _ = clustered(200)
+    queries = np.random.default_rng(1).standard_normal((5, 16))
+    index = VectorIndex(16, storage='float32', block_size=block_size)
+    index.add(vectors[:120], labels[:120])
+    index.add(vectors[120:], labels[120:])
+    scores, rows = index.search(queries, k=10)
+    assert rows.tolist() == brute_force(vectors, queries, 10).tolist()
+    assert np.all(np.diff(scores, axis=1) <= 0)
+
+
+@pytest.mark.parametrize("storage", ["float16", "int8"])
+def test_compact_storage_scores_close(storage):
+    vectors, labels, _ = clustered(300)
+    queries = vectors[:20] + 0.01
+    exact = VectorIndex(16, storage='float32')
+    exact.add(vectors, labels)
+    compact = VectorIndex(16, storage=storage)
+    compact.add(vectors, labels)
+    exact_scores, exact_rows = exact.search(queries, k=1)
+    scores, rows = compact.search(queries, k=1)
+    assert np.allclose(scores, exact_scores, atol=0.02)
+    assert (rows == exact_rows).mean() >= 0.95
+
+
+def test_missing_neighbours_are_padded():
+    index = VectorIndex(4)
+    index.add(np.eye(4)[:2], ['a', 'b'])
+    scores, rows = index.search(np.ones(4), k=3)
+    assert rows[0, 2] == -1
+    assert scores[0, 2] == -np.inf
+
+
+def test_partitioned_search():
+    vectors, labels, centres = clustered(2000)
+    index = VectorIndex(16, storage='float32')
+    index.add(vectors, labels)
+    queries = centres + 0.05
+    exact_rows = index.search(queries, k=10)[1]
+    exact_ids = index.ids[exact_rows]
+
+    index.train(n_lists=16, n_probe=4)
+    assert index.list_offsets[-1] == len(index)
+    assert np.array_equal(np.sort(index.ids), np.arange(2000))
+    # Probing every list is exact
+    assert np.array_equal(index.ids[index.search(queries, k=10, n_probe=16)[1]], exact_ids)
+    rows = index.search(queries, k=10)[1]
+    recall = np.mean([len(set(a) & set(b)) / 10 for a, b in zip(index.ids[rows], exact_ids)])
+    assert recall >= 0.9
+
+
+def test_add_after_train_joins_nearest_list():
+    vectors, labels, centres = clustered(500)
+    index = VectorIndex(16)
+    index.add(vectors, labels)
+    index.train(n_lists=8, n_probe=2)
+    index.add(centres[:1] * 10, ['new_type'])
+    assert len(index) == 501
+    assert index.list_offsets[-1] == 501
+    _, rows = index.search(centres[0], k=1)
+    assert index.labels[rows[0, 0]] == 'new_type'
+    assert index.ids[rows[0, 0]] == 500
+
+
+def test_train_validates_n_lists():
+    index = VectorIndex(4)
+    index.add(np.eye(4), list('abcd'))
+    with pytest.raises(ValueError):
+        index.train(n_lists=5)
+
+
+def test_dimension_checks():
+    index = VectorIndex(4)
+    with pytest.raises(ValueError):
+        index.add(np.ones((2, 3)), ['a', 'b'])
+    with pytest.raises(ValueError):
+        index.add(np.ones((2, 4)), ['a'])
+    with pytest.raises(ValueError):
+        index.search(np.ones(3))
+
+
+@pytest.mark.parametrize("mmap", [True, False])
+def test_save_load_round_trip(tmp_path, mmap):
+    vectors, labels, centres = clustered(400)
+    index = VectorIndex(16)
+    index.add(vectors, labels)
+    index.train(n_lists=8, n_probe=3)
+    manifest = index.save(str(tmp_path))
+    assert manifest['count'] == 400
+
+    loaded = VectorIndex.load(str(tmp_path), mmap=mmap)
+    assert isinstance(loaded.vectors, np.memmap) == mmap
+    assert loaded.n_probe == 3
+    for a, b in zip(index.search(centres, k=5), loaded.search(centres, k=5)):
+        assert np.array_equal(a, b)
+    loaded.add(centres[:1], ['extra'])
+    assert len(loaded) == 401
+
+
+def test_load_rejects_other_format(tmp_path):
+    VectorIndex(4).save(str(tmp_path))
+    path = os.path.join(str(tmp_path), 'manifest.json')
+    with open(path) as f:
+        manifest = json.load(f)
+    manifest['format_version'] = 99
+    with open(path, 'w') as f:
+        json.dump(manifest, f)
+    with pytest.raises(ValueError):
+        VectorIndex.load(str(tmp_path))
+
+
+def test_knn_predict_vectors():
+    vectors, labels, centres = clustered(600)
+    index = VectorIndex(16)
+    index.add(vectors, labels)
+    predictions = KNNClassifier(index, k=5).predict_vectors(centres)
+    assert [label for label, _ in predictions] == [f"class_{i}" for i in range(len(centres))]
+    assert all(0.5 < confidence <= 1.0 for _, confidence in predictions)
+
+
+def test_knn_learns_new_type_from_examples():
+    embedder = DocumentEmbedder(model=CharacterEncoder())
+    knn = KNNClassifier(VectorIndex(CharacterEncoder.dim, storage='float32'), embedder, k=1)
+    knn.add_examples(["aaaa aaaa", "bbbb bbbb"], ["invoice", "bank_statement"])
+    assert knn.predict("aaaa")[0] == "invoice"
+    knn.add_examples(["cccc cccc"], ["drivers_license"])
+    assert knn.predict_batch(["cccc", "bbbb"]) == [("drivers_license", 1.0), ("bank_statement", 1.0)]
+
+
+def test_knn_empty_index():
+    with pytest.raises(RuntimeError):
+        KNNClassifier(VectorIndex(4)).predict_vectors(np.ones((1, 4)))
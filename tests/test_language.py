@@ -0,0 +1,122 @@
+import os
+
+import numpy as np
+import pytest
+
+from src.language import (PROFILE_FORMAT_VERSION, SPACE, LanguageDetector, build_profile,
+                          hash_ngrams, ngram_buckets)
+
+PROFILES = os.path.join(os.path.dirname(os.path.dirname(__file__)), "models", "language_profiles.npz")
+
+SAMPLES = {
+    "en": "The committee reviews the annual budget and prepares a report for the shareholders.",
+    "fr": "Le comité examine le budget annuel et prépare un rapport pour les actionnaires.",
+    "de": "Der Ausschuss prüft den Jahreshaushalt und bereitet einen Bericht für die Aktionäre vor.",
+    "es": "El comité revisa el presupuesto anual y prepara un informe para los accionistas.",
+    "ru": "Комитет рассматривает годовой бюджет и готовит отчет для акционеров.",
+    "zh-cn": "委员会正在审查年度预算，并在月底前为股东准备一份报告。",
+}
+
+INVOICE = """INVOICE
+
+Invoice Number: INV-2024-042
+Client: Tech Corp
+
+Items:
+- Web Development
+- Cloud Migration
+
+Total Amount: $4200
+
+Payment Terms: Net 30
+Thank you for your business!"""
+
+
+@pytest.fixture(scope="module")
+def detector():
+    return LanguageDetector.load(PROFILES)
+
+
+def codes(text):
+    return np.array([ord(char) for char in text], dtype=np.uint32)
+
+
+def test_ngram_buckets_are_word_bounded():
+    expected = ["a", " a", "b", "ab", " ab", "b ", "ab ", "c", " c", "c ", " c "]
+    hashed = [hash_ngrams(codes(gram)[None, :], 1024)[0] for gram in expected]
+    assert ngram_buckets(codes(" ab c "), 1024).tolist() == hashed
+
+
+def test_normalize_lowercases_and_collapses_non_letters(detector):
+    assert ''.join(map(chr, detector.normalize("INVOICE #42,  Net-30!"))) == " invoice net "
+
+
+@pytest.mark.parametrize("language", sorted(SAMPLES))
+def test_detects_language(detector, language):
+    assert detector.detect(SAMPLES[language]) == language
+
+
+def test_upper_case_business_documents_are_english(detector):
+    assert detector.detect(INVOICE) == "en"
+    assert detector.detect(INVOICE.upper()) == "en"
+
+
+def test_too_little_text_is_unknown(detector):
+    assert detector.detect("") == "unknown"
+    assert detector.detect("  \n") == "unknown"
+    assert detector.detect("$4,200.00 - 2024-03-01") == "unknown"
+
+
+def test_sample_is_bounded_and_spread(detector):
+    text = "start " + "x" * 100000 + " end"
+    window = detector.sample(text)
+    assert len(window) <= detector.window + detector.samples
+    assert window.startswith("start") and window.endswith("end")
+    assert detector.sample("short text") == "short text"
+
+
+def test_stops_once_evidence_is_enough():
+    detector = LanguageDetector.load(PROFILES, step=64, cache_size=0)
+    text = SAMPLES["en"] * 20
+    _, scored = detector.scores(text)
+    _, total = LanguageDetector.load(PROFILES, evidence=float("inf"), cache_size=0).scores(text)
+    assert scored < total
+    assert detector.detect(text) == "en"
+
+
+def test_results_are_cached_by_window(detector):
+    detector.cache.clear()
+    detector.detect(SAMPLES["fr"])
+    detector.detect(SAMPLES["fr"])
+    assert detector.cache_stats()["hits"] >= 1
+    assert LanguageDetector.load(PROFILES, cache_size=0).cache_stats() == {}
+
+
+def test_build_profile():
+    char_map = np.arange(0x250, dtype=np.uint32)
+    profiles = {
+        "aa": {"freq": {"a": 90, "b": 10, "ab": 5, " a": 40, "a ": 40}, "n_words": [100, 85, 0]},
+        "bb": {"freq": {"b": 90, "a": 10, "ba": 5, " b": 40, "b ": 40}, "n_words": [100, 85, 0]},
+    }
+    languages, log_probs = build_profile(profiles, char_map, n_buckets=256)
+    assert languages == ["aa", "bb"]
+    assert log_probs.shape == (256, 2)
+    detector = LanguageDetector(languages, log_probs, char_map, min_ngrams=1)
+    assert detector.detect("aaa aa a") == "aa"
+    assert detector.detect("bb bbb") == "bb"
+
+
+def test_load_rejects_other_format(tmp_path):
+    path = str(tmp_path / "profiles.npz")
+    np.savez(path, format_version=np.array(PROFILE_FORMAT_VERSION + 1), languages=np.array(["en"]),
+             log_probs=np.zeros((8, 1)), char_map=np.full(128, SPACE))
+    with pytest.raises(ValueError):
+        LanguageDetector.load(path)
+
+
+def test_from_env(monkeypatch):
+    monkeypatch.setenv("LANGUAGE_PROFILES", PROFILES)
+    monkeypatch.setenv("LANGUAGE_WINDOW_CHARS", "512")
+    assert LanguageDetector.from_env().window == 512
+    monkeypatch.setenv("LANGUAGE_PROFILES", "missing.npz")
+    assert LanguageDetector.from_env() is None
@@ -0,0 +1,75 @@
+import io
+import time
+from pathlib import Path
+
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+
+import src.api
+from src.app import app
+from src.metrics import register_stats
+
+project_root = Path(__file__).parent.parent
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_stats_are_exposed_as_gauges():
+    register_stats('test_source', lambda: {
+        'memory': {'hits': 3},
+        'histogram': {1: 2, 4: 5},
+        'enabled': True,
+    })
+    assert sample('test_source_memory_hits') == 3
+    assert sample('test_source_histogram', bucket='4') == 5
+    assert REGISTRY.get_sample_value('test_source_enabled') is None
+
+
+def test_classify_records_stages_and_outcome():
+    client = app.test_client()
+    before = {
+        stage: sample('classifier_stage_seconds_count', stage=stage)
+        for stage in ('read', 'sniff', 'extract', 'vectorize', 'predict', 'serialize')
+    }
+    pages_before = sample('classifier_document_pages_count')
+
+    # Unique content so the result cache cannot answer the request
+    data = (project_root / "files" / "invoice_1.pdf").read_bytes() + b"\n% metrics test"
+    response = client.post('/classify_file', content_type='multipart/form-data',
+                           data={'file': (io.BytesIO(data), 'invoice.pdf')})
+    assert response.status_code == 200
+
+    for stage, count in before.items():
+        assert sample('classifier_stage_seconds_count', stage=stage) == count + 1, stage
+    assert sample('classifier_document_pages_count') == pages_before + 1
+    assert sample('classifier_documents_total', file_class='invoice', outcome='success') >= 1
+    assert sample('classifier_request_seconds_count', endpoint='/classify_file', status='200') >= 1
+
+
+def test_fastapi_times_response_encoding(monkeypatch):
+    encode = src.api.JSONResponse.render
+
+    def slow_encode(self, content):
+        time.sleep(0.05)
+        return encode(self, content)
+
+    monkeypatch.setattr(src.api.JSONResponse, 'render', slow_encode)
+    monkeypatch.setenv("API_KEY", "secret")
+    client = TestClient(src.api.app, headers={"Authorization": "Bearer secret"})
+    before = sample('classifier_stage_seconds_sum', stage='serialize')
+    data = (project_root / "files" / "invoice_1.pdf").read_bytes()
+    response = client.post('/classify_file', files={'file': ('invoice.pdf', data, 'application/pdf')})
+    assert response.status_code == 200
+    assert response.json()['filename'] == 'invoice.pdf'
+    assert sample('classifier_stage_seconds_sum', stage='serialize') - before >= 0.05
+
+
+def test_metrics_endpoint():
+    response = app.test_client().get('/metrics')
+    assert response.status_code == 200
+    assert response.mimetype == 'text/plain'
+    body = response.get_data(as_text=True)
+    assert 'classifier_stage_seconds_bucket' in body
+    assert 'classifier_model_load_seconds' in body
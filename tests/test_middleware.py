@@ -0,0 +1,72 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from src.middleware import BodySizeLimitMiddleware
+
+
+def make_client(limit):
+    app = FastAPI()
+    app.add_middleware(BodySizeLimitMiddleware, max_body_bytes=limit)
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"size": len(await request.body())}
+
+    return TestClient(app)
+
+
+def test_small_body_passes():
+    response = make_client(100).post("/echo", content=b"x" * 100)
+    assert response.status_code == 200
+    assert response.json() == {"size": 100}
+
+
+def test_declared_oversize_body_is_rejected():
+    response = make_client(100).post("/echo", content=b"x" * 101)
+    assert response.status_code == 413
+
+
+def test_streamed_oversize_body_is_rejected():
+    def chunks():
+        for _ in range(10):
+            yield b"x" * 50
+
+    response = make_client(100).post("/echo", content=chunks())
+    assert response.status_code == 413
+
+
+def multipart(name, data, boundary="limit-test"):
+    """A single-file multipart body and its content type."""
+    body = (f"--{boundary}\r\nContent-Disposition: form-data; name=\"file\"; filename=\"{name}\"\r\n"
+            f"Content-Type: application/pdf\r\n\r\n").encode() + data + f"\r\n--{boundary}--\r\n".encode()
+    return body, f"multipart/form-data; boundary={boundary}"
+
+
+def api_client(monkeypatch, **limits):
+    import src.api
+
+    monkeypatch.setenv("API_KEY", "secret")
+    app = BodySizeLimitMiddleware(src.api.app, **limits)
+    return TestClient(app, headers={"Authorization": "Bearer secret"})
+
+
+def test_streamed_oversize_upload_to_api_gets_413(monkeypatch):
+    body, content_type = multipart("big.pdf", b"%PDF-1.4" + b"0" * 4096)
+
+    def chunks():
+        for start in range(0, len(body), 512):
+            yield body[start:start + 512]
+
+    client = api_client(monkeypatch, max_body_bytes=1024)
+    response = client.post("/classify_file", content=chunks(), headers={"Content-Type": content_type})
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request too large"}
+
+
+def test_single_file_endpoint_checks_declared_length(monkeypatch):
+    body, content_type = multipart("big.pdf", b"%PDF-1.4" + b"0" * 4096)
+    client = api_client(monkeypatch, max_body_bytes=1 << 20, path_limits={"/classify_file": 1024})
+    response = client.post("/classify_file", content=body, headers={"Content-Type": content_type})
+    assert response.status_code == 413
+    # Other paths keep the request-wide limit
+    response = client.post("/classify_files", content=body, headers={"Content-Type": content_type})
+    assert response.status_code != 413
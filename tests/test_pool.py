@@ -0,0 +1,103 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+from src.extractor.pdf import PDFExtractor
+from src.extractor.pool import ExtractionPool, ExtractionTimeout
+
+project_root = Path(__file__).parent.parent
+
+
+def _sleep(seconds):
+    time.sleep(seconds)
+    return seconds
+
+
+def _fail(message):
+    raise ValueError(message)
+
+
+@pytest.fixture
+def pool():
+    pool = ExtractionPool(max_workers=2, timeout=10, preload=())
+    yield pool
+    pool.shutdown()
+
+
+def test_runs_in_worker_process(pool):
+    pool.warm()
+    assert pool.run(os.getpid) != os.getpid()
+
+
+def test_inline_mode_runs_in_caller():
+    pool = ExtractionPool(max_workers=0)
+    assert pool.run(os.getpid) == os.getpid()
+
+
+def test_extract_pdf(pool):
+    data = (project_root / "files" / "invoice_1.pdf").read_bytes()
+    content = pool.extract(PDFExtractor(), data)
+    assert content['error'] is None
+    assert 'INVOICE' in content['text']
+    assert content['metadata']['page_count'] == 1
+
+
+def test_timeout_restarts_workers():
+    pool = ExtractionPool(max_workers=1, timeout=0.5, preload=())
+    try:
+        with pytest.raises(ExtractionTimeout):
+            pool.run(_sleep, 10)
+        assert pool.restarts == 1
+        # The replacement worker keeps serving
+        assert pool.run(_sleep, 0) == 0
+    finally:
+        pool.shutdown()
+
+
+def test_timeout_only_stops_its_own_worker():
+    pool = ExtractionPool(max_workers=2, timeout=1, preload=())
+    try:
+        pool.warm()
+        with ThreadPoolExecutor(max_workers=2) as callers:
+            stuck = callers.submit(pool.run, _sleep, 10)
+            time.sleep(0.5)
+            # Still running when its neighbour's worker is terminated
+            neighbour = callers.submit(pool.run, _sleep, 0.9)
+            with pytest.raises(ExtractionTimeout):
+                stuck.result()
+            assert neighbour.result() == 0.9
+        assert pool.restarts == 1
+    finally:
+        pool.shutdown()
+
+
+def test_time_queued_does_not_count():
+    pool = ExtractionPool(max_workers=1, timeout=0.6, preload=())
+    try:
+        pool.warm()
+        # Each task runs within its budget, the second only after waiting for the first
+        assert pool.run_many(_sleep, [(0.4,), (0.4,), (0.4,)]) == [0.4, 0.4, 0.4]
+        assert pool.restarts == 0
+    finally:
+        pool.shutdown()
+
+
+def test_extract_reports_failure_as_error():
+    pool = ExtractionPool(max_workers=0)
+    content = pool.extract(PDFExtractor(), b"not a pdf")
+    assert content['text'] == ''
+    assert content['error']
+
+
+def test_run_many_keeps_order_and_errors(pool):
+    results = pool.run_many(_sleep, [(0.2,), (0,)])
+    assert results == [0.2, 0]
+    results = pool.run_many(_fail, [("boom",)])
+    assert isinstance(results[0], ValueError)
+
+
+def test_invalid_worker_count():
+    with pytest.raises(ValueError):
+        ExtractionPool(max_workers=-1)
@@ -0,0 +1,146 @@
+import io
+
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+import src.app
+from src.extractor.uploads import spool_upload
+from src.model.thumbnail import (FEATURE_NAMES, MAX_FULL_DECODE_PIXELS, MAX_IMAGE_PIXELS,
+                                 ThumbnailClassifier, image_features, upload_features)
+
+
+def card(seed):
+    """A landscape, coloured ID-card-like image with a photo block."""
+    rng = np.random.default_rng(seed)
+    image = Image.new('RGB', (640, 400), tuple(int(v) for v in rng.integers(60, 120, 3)))
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([30, 60, 200, 300], fill=(200, 170, 150))
+    return image
+
+
+def page(seed):
+    """A portrait, white text-page-like image."""
+    rng = np.random.default_rng(seed)
+    image = Image.new('RGB', (500, 700), 'white')
+    draw = ImageDraw.Draw(image)
+    for y in range(50, 650, 20):
+        draw.line([40, y, 40 + int(rng.integers(200, 420)), y], fill='black', width=3)
+    return image
+
+
+def encode(image, image_format='PNG'):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format)
+    buffer.seek(0)
+    return buffer
+
+
+@pytest.fixture(scope='module')
+def trained():
+    images = [card(seed) for seed in range(6)] + [page(seed) for seed in range(6)]
+    labels = ['drivers_license'] * 6 + ['bank_statement'] * 6
+    features = np.stack([image_features(encode(image)) for image in images])
+    return ThumbnailClassifier().fit(features, labels)
+
+
+def test_features_layout():
+    features = image_features(encode(card(0), 'JPEG'))
+    assert features.shape == (len(FEATURE_NAMES),)
+    assert features.dtype == np.float32
+    assert np.isfinite(features).all()
+    assert features[FEATURE_NAMES.index('log_aspect_ratio')] > 0
+    assert image_features(encode(page(0)))[FEATURE_NAMES.index('log_aspect_ratio')] < 0
+
+
+def test_edge_density_and_saturation():
+    blank = image_features(encode(Image.new('RGB', (300, 300), 'white')))
+    lined = image_features(encode(page(0)))
+    edges = FEATURE_NAMES.index('edge_density')
+    assert blank[edges] == 0
+    assert lined[edges] > 0
+    assert blank[FEATURE_NAMES.index('saturation')] == 0
+    assert image_features(encode(card(0)))[FEATURE_NAMES.index('saturation')] > 0
+
+
+def test_mean_colour_matches_full_image():
+    image = card(1)
+    features = image_features(encode(image))
+    full = np.asarray(image, dtype=np.float64).reshape(-1, 3).mean(axis=0) / 255
+    assert np.allclose(features[:3], full, atol=0.02)
+
+
+def test_tiny_image():
+    assert np.isfinite(image_features(encode(Image.new('RGB', (1, 1))))).all()
+
+
+def test_decompression_bomb_is_refused():
+    side = int(MAX_IMAGE_PIXELS ** 0.5) + 1
+    with pytest.raises(ValueError):
+        image_features(encode(Image.new('1', (side, side))))
+
+
+def test_large_non_jpeg_is_refused_before_decoding():
+    side = int(MAX_FULL_DECODE_PIXELS ** 0.5) + 1
+    with pytest.raises(ValueError):
+        image_features(encode(Image.new('1', (side, side))))
+    # JPEGs are decoded at thumbnail scale, so the same size is accepted
+    assert np.isfinite(image_features(encode(Image.new('L', (side, side)), 'JPEG'))).all()
+
+
+def test_upload_features_match_image_features():
+    upload = spool_upload(encode(card(3)), spool_bytes=1)
+    with upload:
+        assert np.array_equal(upload_features(upload), image_features(encode(card(3))))
+
+
+def test_fit_needs_two_classes():
+    with pytest.raises(ValueError):
+        ThumbnailClassifier().fit(np.zeros((3, len(FEATURE_NAMES))), ['a'] * 3)
+
+
+def test_predict(trained):
+    assert trained.predict(encode(card(100), 'JPEG'))[0] == 'drivers_license'
+    assert trained.predict(encode(page(100)))[0] == 'bank_statement'
+
+
+def test_predict_confident_threshold(trained):
+    classifier = ThumbnailClassifier(trained.model, trained.classes, min_confidence=1.01)
+    assert classifier.predict_confident(encode(card(100))) is None
+    classifier.min_confidence = 0.0
+    assert classifier.predict_confident(encode(card(100)))[0] == 'drivers_license'
+
+
+def test_save_load_round_trip(trained, tmp_path):
+    path = str(tmp_path / "thumbnail.npz")
+    trained.save(path)
+    loaded = ThumbnailClassifier.load(path)
+    features = np.stack([image_features(encode(card(7))), image_features(encode(page(7)))])
+    assert loaded.predict_features(features) == trained.predict_features(features)
+    assert loaded.version
+
+
+def test_from_env(trained, tmp_path, monkeypatch):
+    path = str(tmp_path / "thumbnail.npz")
+    monkeypatch.delenv("THUMBNAIL_MODEL", raising=False)
+    assert ThumbnailClassifier.from_env(path) is None
+    trained.save(path)
+    monkeypatch.setenv("THUMBNAIL_MIN_CONFIDENCE", "0.5")
+    assert ThumbnailClassifier.from_env(path).min_confidence == 0.5
+
+
+def test_app_skips_ocr_for_confident_images(trained, monkeypatch):
+    confident = ThumbnailClassifier(trained.model, trained.classes, min_confidence=0.0)
+    monkeypatch.setattr(src.app, 'thumbnail_classifier', confident)
+    monkeypatch.setattr(src.app, 'result_cache', src.app.ResultCache(max_size=0))
+
+    def no_extraction(uploads):
+        raise AssertionError("OCR should be skipped")
+
+    monkeypatch.setattr(src.app, 'extract_texts', no_extraction)
+    src.app.app.config['TESTING'] = True
+    with src.app.app.test_client() as client:
+        data = {'file': (encode(card(100), 'JPEG'), 'scan.jpg')}
+        response = client.post('/classify_file', data=data, content_type='multipart/form-data')
+    assert response.status_code == 200
+    assert response.get_json()['file_class'] == 'drivers_license'
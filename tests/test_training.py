@@ -0,0 +1,134 @@
+import json
+
+import fitz
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from src.cache import ExtractionCache
+from src.extractor.pool import ExtractionPool
+from src.model.classifier import DocumentClassifier
+from src.model.training import StreamingTrainer, chunked, iter_directory, iter_manifest
+
+TEMPLATES = {
+    "invoice": "INVOICE\nInvoice Number: INV-{n}\nClient: Tech Corp\nTotal Amount: ${n}00\nPayment Terms: Net 30",
+    "bank_statement": "BANK STATEMENT\nAccount: ****{n}\nCurrent Balance: ${n}0\nRecent Transactions\nSalary Credit",
+    "drivers_license": "DRIVER LICENSE\nState of Texas\nDL Number: TX{n}\nClass: C\nRestrictions: None",
+}
+
+
+def write_pdf(path, text):
+    doc = fitz.open()
+    doc.new_page().insert_text((72, 72), text)
+    doc.save(str(path))
+
+
+@pytest.fixture
+def corpus(tmp_path):
+    root = tmp_path / "corpus"
+    for label, template in TEMPLATES.items():
+        (root / label).mkdir(parents=True)
+        for n in range(12):
+            write_pdf(root / label / f"{n}.pdf", template.format(n=n + 10))
+    (root / "invoice" / "notes.txt").write_text("not a supported document")
+    return root
+
+
+def test_iter_directory_labels(tmp_path):
+    (tmp_path / "invoice").mkdir()
+    (tmp_path / "invoice" / "a.pdf").write_bytes(b"")
+    (tmp_path / "bank_statement_1.pdf").write_bytes(b"")
+    (tmp_path / "other.pdf").write_bytes(b"")
+    (tmp_path / ".hidden").write_bytes(b"")
+
+    label_for = lambda name: "bank_statement" if name.startswith("bank_statement") else None
+    found = [(path.rsplit('/', 1)[-1], label) for path, label in iter_directory(str(tmp_path), label_for)]
+    assert found == [("bank_statement_1.pdf", "bank_statement"), ("a.pdf", "invoice")]
+
+
+def test_iter_manifest_formats(tmp_path):
+    (tmp_path / "m.jsonl").write_text(json.dumps({"path": "docs/a.pdf", "label": "invoice"}) + "\n\n")
+    (tmp_path / "m.csv").write_text("path,label\ndocs/b.pdf,bank_statement\n")
+    assert list(iter_manifest(str(tmp_path / "m.jsonl"))) == [(str(tmp_path / "docs" / "a.pdf"), "invoice")]
+    assert list(iter_manifest(str(tmp_path / "m.csv"))) == [(str(tmp_path / "docs" / "b.pdf"), "bank_statement")]
+
+
+def test_chunked():
+    assert list(chunked(range(5), 2)) == [[0, 1], [2, 3], [4]]
+
+
+def test_streaming_training(corpus, tmp_path):
+    trainer = StreamingTrainer(
+        n_features=2 ** 12,
+        chunk_size=12,
+        trees_per_chunk=5,
+        min_df=1,
+        validation_fraction=0.2,
+        pool=ExtractionPool(max_workers=0)
+    )
+    classifier, metrics = trainer.fit(iter_directory(str(corpus)))
+
+    assert metrics['n_documents'] == 36
+    assert metrics['n_skipped'] == 1
+    assert metrics['n_classes'] == 3
+    assert metrics['n_trees'] % 5 == 0 and metrics['n_trees'] > 0
+    assert list(classifier.label_encoder.classes_) == sorted(TEMPLATES)
+
+    texts = [template.format(n=99) for template in TEMPLATES.values()]
+    assert [label for label, _ in classifier.predict_batch(texts)] == list(TEMPLATES)
+
+    classifier.save_bundle(str(tmp_path / "bundle"))
+    loaded = DocumentClassifier.from_bundle(str(tmp_path / "bundle"))
+    assert loaded.predict_batch(texts) == classifier.predict_batch(texts)
+
+
+def test_streaming_training_caps_trees(corpus):
+    trainer = StreamingTrainer(
+        n_features=2 ** 10,
+        chunk_size=6,
+        trees_per_chunk=5,
+        max_trees=4,
+        min_df=1,
+        validation_fraction=0.0,
+        pool=ExtractionPool(max_workers=0)
+    )
+    # Six chunks would add 30 trees without the cap; each gets one until four are grown
+    _, metrics = trainer.fit(iter_directory(str(corpus)))
+    assert metrics['n_trees'] == 4
+
+
+def test_rows_past_validation_cap_are_trained_on(corpus, monkeypatch):
+    fitted = []
+    fit = RandomForestClassifier.fit
+
+    def recording_fit(self, X, y, *args, **kwargs):
+        fitted.append(X.shape[0])
+        return fit(self, X, y, *args, **kwargs)
+
+    monkeypatch.setattr(RandomForestClassifier, 'fit', recording_fit)
+    trainer = StreamingTrainer(
+        n_features=2 ** 10,
+        chunk_size=100,
+        min_df=1,
+        validation_fraction=0.5,
+        max_validation=2,
+        pool=ExtractionPool(max_workers=0)
+    )
+    _, metrics = trainer.fit(iter_directory(str(corpus)))
+    assert metrics['n_validation'] == 2
+    assert fitted == [metrics['n_documents'] - 2]
+
+
+def test_streaming_training_needs_two_classes(corpus):
+    trainer = StreamingTrainer(n_features=2 ** 10, pool=ExtractionPool(max_workers=0))
+    with pytest.raises(ValueError):
+        trainer.fit(iter_directory(str(corpus / "invoice"), lambda name: "invoice"))
+
+
+def test_streaming_training_uses_extraction_cache(corpus, tmp_path):
+    cache = ExtractionCache(str(tmp_path / "extractions.db"))
+    for _ in range(2):
+        trainer = StreamingTrainer(
+            n_features=2 ** 10, min_df=1, pool=ExtractionPool(max_workers=0), cache=cache
+        )
+        _, metrics = trainer.fit(iter_directory(str(corpus)))
+        assert metrics['n_documents'] == 36
+    assert cache.stats() == {'size': 36, 'hits': 36, 'misses': 36}
@@ -0,0 +1,142 @@
+import io
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+from src.cache import content_key
+from src.extractor.mupdf import PyMuPDFExtractor
+from src.extractor.pdf import PDFExtractor
+from src.extractor.pool import ExtractionPool
+from src.extractor.sniff import SNIFF_BYTES
+from src.extractor.uploads import disk_path, spool_upload
+from src.extractor.word import DocxExtractor
+
+project_root = Path(__file__).parent.parent
+
+
+@pytest.mark.parametrize("spool_bytes", [1, 10 ** 9])
+def test_spool_preserves_content_and_key(tmp_path, spool_bytes):
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    stream = io.BytesIO(data)
+    stream.seek(100)
+    with spool_upload(stream, spool_bytes=spool_bytes, spool_dir=str(tmp_path)) as upload:
+        assert upload.size == len(data)
+        assert upload.head == data[:SNIFF_BYTES]
+        assert upload.key("pdf", "v1") == content_key(data, "pdf", "v1")
+        assert (upload.path is not None) == (spool_bytes == 1)
+        with upload.open() as view:
+            assert view.read() == data
+        path = upload.path
+    assert upload.path is None
+    assert path is None or not os.path.exists(path)
+    assert stream.tell() == 0
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="unnamed temp files need /proc")
+def test_upload_already_on_disk_is_not_copied(tmp_path):
+    data = os.urandom(2 * 1024 * 1024)
+    stream = tempfile.SpooledTemporaryFile(max_size=1024)
+    stream.write(data)
+    with spool_upload(stream, spool_bytes=1, spool_dir=str(tmp_path)) as upload:
+        assert upload.key("pdf") == content_key(data, "pdf")
+        assert upload.head == data[:SNIFF_BYTES]
+        assert upload.path is not None and not upload.owned
+        with upload.open() as view:
+            assert view.read() == data
+    assert list(tmp_path.iterdir()) == []
+    # The request's file is left for the framework to close
+    assert stream.read() == data
+
+
+class FileProxy:
+    """Exposes only the public file interface of the stream it wraps."""
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.name = stream.name
+
+    def fileno(self):
+        return self._stream.fileno()
+
+
+def test_disk_path_uses_only_the_public_file_interface():
+    in_memory = tempfile.SpooledTemporaryFile(max_size=1024)
+    in_memory.write(b"small")
+    assert disk_path(in_memory) is None
+    # Checking did not roll the body over to disk
+    assert in_memory.name is None
+
+    rolled = tempfile.SpooledTemporaryFile(max_size=4)
+    rolled.write(b"larger than four bytes")
+    rolled.seek(0)
+    path = disk_path(FileProxy(rolled))
+    if sys.platform.startswith('linux'):
+        with open(path, 'rb') as f:
+            assert f.read() == b"larger than four bytes"
+    else:
+        assert path is None
+    assert disk_path(io.BytesIO(b"in memory")) is None
+
+
+def test_named_file_is_used_in_place(tmp_path):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(b"%PDF-1.4 body")
+    with open(path, 'rb') as stream:
+        with spool_upload(stream, spool_bytes=1, spool_dir=str(tmp_path)) as upload:
+            assert upload.path == str(path)
+    assert path.read_bytes() == b"%PDF-1.4 body"
+
+
+def test_spooled_upload_pickles_without_digest(tmp_path):
+    with spool_upload(io.BytesIO(b"%PDF-1.4 body"), spool_bytes=1, spool_dir=str(tmp_path)) as upload:
+        copy = pickle.loads(pickle.dumps(upload))
+        assert copy.path == upload.path
+        assert copy.data is None
+
+
+def test_empty_upload(tmp_path):
+    with spool_upload(io.BytesIO(b""), spool_bytes=0, spool_dir=str(tmp_path)) as upload:
+        assert upload.size == 0 and upload.head == b""
+        with upload.open() as view:
+            assert view.read() == b""
+
+
+@pytest.mark.parametrize("extractor, name", [
+    (PyMuPDFExtractor(), "invoice_1.pdf"),
+    (PDFExtractor(), "invoice_1.pdf"),
+    (DocxExtractor(), "invoice_1.docx"),
+])
+def test_extract_file_matches_extract(extractor, name):
+    path = project_root / "files" / name
+    expected = extractor.extract(io.BytesIO(path.read_bytes()))
+    assert extractor.extract_file(str(path)) == expected
+
+
+@pytest.mark.parametrize("max_workers", [0, 1])
+def test_pool_extracts_request_files_in_place(max_workers):
+    pool = ExtractionPool(max_workers=max_workers)
+    data = (project_root / "files" / "invoice_1.pdf").read_bytes()
+    stream = tempfile.SpooledTemporaryFile(max_size=1024)
+    stream.write(data)
+    try:
+        with spool_upload(stream) as upload:
+            content = pool.extract(PyMuPDFExtractor(), upload)
+    finally:
+        pool.shutdown()
+        stream.close()
+    assert content == PyMuPDFExtractor().extract(io.BytesIO(data))
+
+
+@pytest.mark.parametrize("max_workers", [0, 1])
+def test_pool_extracts_spooled_uploads(tmp_path, max_workers):
+    pool = ExtractionPool(max_workers=max_workers)
+    data = (project_root / "files" / "invoice_1.pdf").read_bytes()
+    try:
+        with spool_upload(io.BytesIO(data), spool_bytes=1, spool_dir=str(tmp_path)) as upload:
+            content = pool.extract(PyMuPDFExtractor(), upload)
+    finally:
+        pool.shutdown()
+    assert content == PyMuPDFExtractor().extract(io.BytesIO(data))
@@ -0,0 +1,117 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip("torch")
+transformers = pytest.importorskip("transformers")
+tokenizers = pytest.importorskip("tokenizers")
+
+from src.zero_shot import HYPOTHESIS_TEMPLATE, ZeroShotEngine, compare_quantization, entailment_index
+
+LABELS = ["invoice", "bank_statement", "drivers_licence"]
+TEXTS = [
+    "INVOICE Total Amount due Payment Terms Net 30",
+    "",
+    "BANK STATEMENT Current Balance Recent Transactions Salary Credit",
+    "DRIVER LICENSE State of Oregon Class C",
+    "invoice",
+]
+
+
+@pytest.fixture(scope="module")
+def model_dir(tmp_path_factory):
+    """A tiny randomly initialized NLI model and tokenizer, saved locally."""
+    path = tmp_path_factory.mktemp("nli")
+    words = " ".join(TEXTS + [HYPOTHESIS_TEMPLATE.format(label) for label in LABELS])
+    vocab = {"[PAD]": 0, "[UNK]": 1}
+    for word in words.split():
+        vocab.setdefault(word, len(vocab))
+
+    backend = tokenizers.Tokenizer(tokenizers.models.WordLevel(vocab, unk_token="[UNK]"))
+    backend.pre_tokenizer = tokenizers.pre_tokenizers.Whitespace()
+    tokenizer = transformers.PreTrainedTokenizerFast(
+        tokenizer_object=backend, unk_token="[UNK]", pad_token="[PAD]")
+    tokenizer.save_pretrained(str(path))
+
+    torch.manual_seed(0)
+    config = transformers.BertConfig(
+        vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+        intermediate_size=64, max_position_embeddings=128, num_labels=3,
+        id2label={0: "contradiction", 1: "neutral", 2: "entailment"},
+        label2id={"contradiction": 0, "neutral": 1, "entailment": 2})
+    transformers.BertForSequenceClassification(config).save_pretrained(str(path))
+    return str(path)
+
+
+@pytest.fixture(scope="module")
+def engine(model_dir):
+    return ZeroShotEngine(model_dir, LABELS, batch_size=2, local_files_only=True)
+
+
+def count_forward_passes(engine):
+    calls = []
+    engine.model.register_forward_hook(lambda module, args, output: calls.append(output.logits.shape[0]))
+    return calls
+
+
+def test_entailment_index():
+    assert entailment_index({"CONTRADICTION": 0, "Entailment": 2, "neutral": 1}) == 2
+    assert entailment_index({"LABEL_0": 0, "LABEL_1": 1}) == -1
+
+
+def test_scores_are_distributions_over_labels(engine):
+    scores = engine.scores(TEXTS)
+    assert scores.shape == (len(TEXTS), len(LABELS))
+    assert np.allclose(scores[[0, 2, 3, 4]].sum(axis=1), 1.0, atol=1e-5)
+    assert not scores[1].any()
+
+
+def test_batched_matches_one_document_at_a_time(engine):
+    batched = engine.scores(TEXTS)
+    single = np.vstack([engine.scores([text]) for text in TEXTS])
+    assert np.allclose(batched, single, atol=1e-5)
+
+
+def test_all_hypotheses_share_one_forward_pass(model_dir):
+    engine = ZeroShotEngine(model_dir, LABELS, batch_size=3, local_files_only=True)
+    calls = count_forward_passes(engine)
+    engine.classify_batch(TEXTS)
+    # Four non-empty documents in batches of three, one row per label
+    assert calls == [9, 3]
+
+
+def test_empty_texts_skip_the_model(model_dir):
+    engine = ZeroShotEngine(model_dir, LABELS, local_files_only=True)
+    calls = count_forward_passes(engine)
+    assert engine.classify_batch(["", "  "]) == [("unknown", 0.0), ("unknown", 0.0)]
+    assert calls == []
+
+
+def test_classify_returns_best_label(engine):
+    scores = engine.scores(TEXTS[:1])[0]
+    assert engine.classify(TEXTS[0]) == pytest.approx((LABELS[int(scores.argmax())], float(scores.max())))
+
+
+def test_quantized_engine_and_report(model_dir, engine):
+    quantized = ZeroShotEngine(model_dir, LABELS, quantize=True, local_files_only=True)
+    assert quantized.quantized
+    assert any(isinstance(module, torch.ao.nn.quantized.dynamic.Linear) for module in quantized.model.modules())
+
+    report = compare_quantization(engine, quantized, TEXTS, ["invoice", None, "bank_statement", None, "invoice"])
+    assert report['documents'] == len(TEXTS)
+    assert 0.0 <= report['agreement'] <= 1.0
+    assert report['max_score_diff'] < 0.1
+    assert report['accuracy_delta'] == pytest.approx(report['quantized_accuracy'] - report['full_accuracy'])
+
+
+def test_thread_setting(model_dir):
+    previous = torch.get_num_threads()
+    try:
+        ZeroShotEngine(model_dir, LABELS, num_threads=1, local_files_only=True)
+        assert torch.get_num_threads() == 1
+    finally:
+        torch.set_num_threads(previous)
+
+
+def test_requires_labels(model_dir):
+    with pytest.raises(ValueError):
+        ZeroShotEngine(model_dir, [], local_files_only=True)